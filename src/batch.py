@@ -0,0 +1,265 @@
+"""
+Runs tasks without the interactive menu, for cron and CI:
+    python -m src.batch --category Work --workers 4 --timeout 600 --output summary.json
+Tasks run in dependsOn order, exit status is 0 when every selected task finished with exit code 0,
+see BatchExitStatusEnum for the rest
+"""
+from _datetime import datetime
+from src.loader import JsonTaskLoader, TaskLoadReport
+from src.menu.TaskQuery import parse_filter, matches_filter, FilterParseException
+from src.task.Task import Task, TaskState
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskScheduler import TaskScheduler, SchedulingPolicyEnum, get_default_worker_count
+from src.task.TaskWatchdog import TaskWatchdog, DEFAULT_KILL_GRACE_PERIOD
+from src.task.TaskGraph import TaskGraph, TaskGraphExecutor
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskStatistics import TaskStatistics
+from src.task.TaskOutputStore import TaskOutputStore, OutputCompressionEnum, DEFAULT_MAX_AGE, DEFAULT_MAX_STORE_SIZE
+from src.task.TaskResultCache import TaskResultCache, DEFAULT_RESULT_CACHE_SIZE
+from src.task.TaskShutdown import TaskShutdown, DEFAULT_SHUTDOWN_GRACE_PERIOD
+from src.task.Logger import Logger
+from src.instrumentation import Instrumentation
+from enum import Enum
+from pathlib import Path
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+
+class BatchExitStatusEnum(Enum):
+    SUCCESS = 0, 'Success'
+    TASK_FAILED = 1, 'TaskFailed'  # non-zero exit code, terminated or skipped because of a dependency
+    TIMED_OUT = 2, 'TimedOut'  # global timeout hit, unfinished tasks were terminated
+    USAGE_ERROR = 3, 'UsageError'  # bad arguments, selected tasks failed to load or nothing selected
+
+    def __str__(self):
+        return self.value[1]
+
+    def __init__(self, order: int, label: str):
+        self.order = order
+        self.label = label
+
+
+class BatchRunner:
+    """
+    Runs selected tasks in dependency order through TaskGraphExecutor, at most max_parallel at once,
+    and waits for all of them or until the global timeout
+    """
+    __slots__ = ['tasks', 'timeout', 'grace_period', 'executor', 'first_runs', 'timed_out', 'wall_time']
+    tasks: list[Task]
+    timeout: float | None
+    grace_period: float
+    executor: TaskGraphExecutor
+    first_runs: dict[int, int]
+    timed_out: list[Task]
+    wall_time: float
+
+    def __init__(self, graph: TaskGraph, tasks: list[Task], timeout: float | None, max_parallel: int | None = None,
+                 grace_period: float = DEFAULT_SHUTDOWN_GRACE_PERIOD):
+        """
+        :param grace_period: seconds commands still running at timeout get to exit, before they're killed
+        """
+        self.tasks = tasks
+        self.timeout = timeout
+        self.grace_period = grace_period
+        self.executor = TaskGraphExecutor(graph, tasks, max_parallel)
+        self.first_runs = {task.id: len(task.commandRuns) for task in tasks}
+        self.timed_out = []
+        self.wall_time = 0.0
+
+    def run(self):
+        # Task prints go to stderr, so stdout stays clean for the JSON summary
+        with contextlib.redirect_stdout(sys.stderr):
+            if not self.executor.run(self.timeout):
+                reason = f"Batch timed out after {self.timeout:g}s"
+                self.timed_out = [task for task in self.executor.started
+                                  if task.state is TaskState.QUEUED or task.state is TaskState.IN_PROGRESS]
+                print(TaskShutdown.stop_tasks(self.timed_out, reason, self.grace_period).get_summary_msg())
+                for task in self.executor.get_not_started():
+                    self.executor.skipped[task.id] = reason
+        self.wall_time = self.executor.wall_time
+
+    def is_failed(self, task: Task) -> bool:
+        if task.id in self.executor.skipped or task.state is not TaskState.FINISHED:
+            return True
+        runs = task.commandRuns[self.first_runs[task.id]:]
+        return not runs or runs[-1].return_code != 0
+
+    def get_exit_status(self) -> BatchExitStatusEnum:
+        if self.timed_out:
+            return BatchExitStatusEnum.TIMED_OUT
+        if any(self.is_failed(task) for task in self.tasks):
+            return BatchExitStatusEnum.TASK_FAILED
+        return BatchExitStatusEnum.SUCCESS
+
+    def get_task_summary(self, task: Task) -> dict:
+        runs = task.commandRuns[self.first_runs[task.id]:]
+        run = runs[-1] if runs else None
+        return {
+            'id': task.id,
+            'name': task.name,
+            'command': task.command,
+            'state': str(task.state),
+            'failed': self.is_failed(task),
+            'timedOut': task in self.timed_out,
+            'terminationReason': task.terminationReason,
+            'skipped': self.executor.skipped.get(task.id),
+            'exitCode': run.return_code if run else None,
+            'duration': run.wall_time if run else None,
+            'beginDate': task.beginDate.isoformat() if task.beginDate else None,
+            'finishDate': task.finishDate.isoformat() if task.finishDate else None,
+            'run': run.to_dict() if run else None
+        }
+
+    def get_summary(self) -> dict:
+        """
+        :return: states, durations and exit codes of every task, ready to be dumped to JSON
+        """
+        task_summaries = [self.get_task_summary(task) for task in self.tasks]
+        states = {}
+        for task_summary in task_summaries:
+            states[task_summary['state']] = states.get(task_summary['state'], 0) + 1
+        critical_path, critical_path_duration = self.executor.get_critical_path()
+        return {
+            'date': datetime.now().isoformat(),
+            'status': str(self.get_exit_status()),
+            'tasks': len(self.tasks),
+            'failed': sum(task_summary['failed'] for task_summary in task_summaries),
+            'timedOut': len(self.timed_out),
+            'skipped': len(self.executor.skipped),
+            'states': states,
+            'wallTime': self.wall_time,
+            'workers': TaskScheduler.worker_count(),
+            'engine': str(TaskScheduler.engine_type()),
+            'criticalPath': {'tasks': [task.name for task in critical_path], 'duration': critical_path_duration},
+            'results': task_summaries
+        }
+
+
+def get_filters(args: argparse.Namespace) -> dict[str, list]:
+    filter_texts = list(args.filter)
+    for field_name in ('category', 'priority', 'state'):
+        for value in getattr(args, field_name):
+            filter_texts.append(f"{field_name}={value}")
+    for name in args.name:
+        filter_texts.append(f"name={name}")
+    for prefix in args.name_prefix:
+        filter_texts.append(f"name^={prefix}")
+    task_filter = {}
+    for filter_text in filter_texts:
+        field_name, condition = parse_filter(filter_text)
+        task_filter.setdefault(field_name, []).append(condition)
+    return task_filter
+
+
+def select_tasks(tasks: list[Task], task_filter: dict[str, list]) -> list[Task]:
+    # Conditions of one field have to match all, same as filters in the menu
+    return [task for task in tasks if matches_filter(task, task_filter)]
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description="Run tasks without the interactive menu")
+    arg_parser.add_argument('--tasks-dir', default=os.path.join(str(Path(__file__).resolve().parent.parent), 'rsc'),
+                            help="directory with task files")
+    arg_parser.add_argument('--category', action='append', default=[], help="e.g. Work")
+    arg_parser.add_argument('--priority', action='append', default=[], help="e.g. UrgentImportant")
+    arg_parser.add_argument('--state', action='append', default=[], help="e.g. ToDo")
+    arg_parser.add_argument('--name', action='append', default=[], help="exact task name")
+    arg_parser.add_argument('--name-prefix', action='append', default=[], help="start of task name")
+    arg_parser.add_argument('--filter', action='append', default=[],
+                            help="any menu filter, e.g. 'deadlineDate<2025-06-01', can be given many times")
+    arg_parser.add_argument('--workers', type=int, default=get_default_worker_count(),
+                            help="max number of task commands running at the same time")
+    arg_parser.add_argument('--engine', choices=[str(engine) for engine in TaskEngineEnum], default='thread')
+    arg_parser.add_argument('--schedule', choices=[str(policy) for policy in SchedulingPolicyEnum], default='deadline')
+    arg_parser.add_argument('--kill-grace', type=float, default=DEFAULT_KILL_GRACE_PERIOD,
+                            help="seconds a timed out command gets to exit after being terminated, before it's killed")
+    arg_parser.add_argument('--shutdown-grace', type=float, default=DEFAULT_SHUTDOWN_GRACE_PERIOD,
+                            help="seconds commands still running at --timeout get to exit, before they're killed")
+    arg_parser.add_argument('--max-parallel', type=int, default=None,
+                            help="max number of selected tasks started at once, --workers when not given")
+    arg_parser.add_argument('--with-dependencies', action='store_true',
+                            help="run unfinished tasks the selected ones depend on too, instead of skipping them")
+    arg_parser.add_argument('--timeout', type=float, default=None,
+                            help="seconds to wait for all tasks, unfinished ones are terminated afterward")
+    arg_parser.add_argument('--no-output-store', action='store_true',
+                            help="keep output of runs only in the log instead of compressed files of their own")
+    arg_parser.add_argument('--output-store-dir', default=None,
+                            help="directory of stored outputs, 'outputs' when not given")
+    arg_parser.add_argument('--output-compression', choices=[str(compression) for compression in OutputCompressionEnum],
+                            default='gzip', help="compression of stored outputs")
+    arg_parser.add_argument('--output-max-age', type=float, default=DEFAULT_MAX_AGE,
+                            help="seconds stored outputs are kept for")
+    arg_parser.add_argument('--output-max-size', type=int, default=DEFAULT_MAX_STORE_SIZE,
+                            help="max bytes of stored outputs, the oldest ones are removed above it")
+    arg_parser.add_argument('--no-result-cache', action='store_true',
+                            help="run commands of tasks with resultCache every time instead of reusing their output")
+    arg_parser.add_argument('--result-cache-dir', default=None,
+                            help="directory of cached command outputs, 'cache/results' when not given")
+    arg_parser.add_argument('--result-cache-size', type=int, default=DEFAULT_RESULT_CACHE_SIZE,
+                            help="max bytes of cached outputs, least recently used ones are removed above it")
+    arg_parser.add_argument('--output', default=None, help="file to write JSON summary to, stdout when not given")
+    args = arg_parser.parse_args()
+
+    try:
+        task_filter = get_filters(args)
+    except FilterParseException as e:
+        print(e, file=sys.stderr)
+        return BatchExitStatusEnum.USAGE_ERROR.order
+    TaskScheduler.configure(args.workers, TaskEngineEnum.get_task_engine(args.engine),
+                            SchedulingPolicyEnum.get_scheduling_policy(args.schedule))
+    TaskWatchdog.configure(args.kill_grace)
+    TaskOutputStore.configure(not args.no_output_store, args.output_store_dir,
+                              OutputCompressionEnum.get_output_compression(args.output_compression),
+                              args.output_max_age, args.output_max_size)
+    TaskResultCache.configure(not args.no_result_cache, args.result_cache_dir, args.result_cache_size)
+
+    load_report = TaskLoadReport()
+    with Instrumentation.timer('batch.load'):
+        tasks = JsonTaskLoader.load_all_tasks(args.tasks_dir, load_report)
+    print(load_report.get_summary_msg(), file=sys.stderr)
+    # Tasks dropped for their dependencies are still matched, so a selection missing its dependencies fails.
+    # Files that can't be read at all can't be matched, they're only warned about
+    rejected_tasks = select_tasks(list(load_report.rejected_tasks.values()), task_filter)
+    if rejected_tasks:
+        print(f"Selected tasks failed to load: {', '.join(task.name for task in rejected_tasks)}", file=sys.stderr)
+        return BatchExitStatusEnum.USAGE_ERROR.order
+    task_statistics = TaskStatistics(TaskRegistry(tasks))
+    selected_tasks = select_tasks(tasks, task_filter)
+    if not selected_tasks:
+        print("No task matches the selection", file=sys.stderr)
+        return BatchExitStatusEnum.USAGE_ERROR.order
+    if load_report.errors:
+        print(f"Warning: running without {len(load_report.errors)} files that failed to load, "
+              f"no selected task depends on them", file=sys.stderr)
+
+    graph = TaskGraph(tasks)
+    if args.with_dependencies:
+        upstream_ids = {task.id for task in graph.get_upstream(selected_tasks)}
+        selected_tasks = [task for task in tasks if task.id in upstream_ids and
+                          (task.state is not TaskState.FINISHED or task in selected_tasks)]
+
+    runner = BatchRunner(graph, selected_tasks, args.timeout, args.max_parallel, args.shutdown_grace)
+    runner.run()
+    TaskScheduler.shutdown()
+    Logger.shutdown()
+    Instrumentation.shutdown()
+
+    summary = runner.get_summary()
+    summary['statistics'] = task_statistics.get_summary()
+    if args.output is None:
+        print(json.dumps(summary, indent=2))
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+    print(f"{summary['tasks']} tasks, {summary['failed']} failed, {summary['skipped']} skipped, "
+          f"{summary['timedOut']} timed out in {summary['wallTime']:.1f}s", file=sys.stderr)
+    print(runner.executor.get_critical_path_msg(), file=sys.stderr)
+    return runner.get_exit_status().order
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Benchmarks of the hot paths on synthetic tasks. Every result is a JSON object, so runs of two versions can be diffed:
+    python -m src.benchmark --sizes 1000,100000 --output before.json
+"""
+from _datetime import datetime, timedelta
+from src.loader import JsonTaskLoader, TaskLoadReport
+from src.cache import TaskParseCache
+from src.menu.MenuRefactor import MenuSettings, ConsoleWindowManager, MainConsoleWindow
+from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskScheduler import TaskScheduler, get_default_worker_count
+from src.task.TaskStatistics import TaskStatistics
+from src.task.TaskTable import TaskTable
+from src.task.Logger import Logger, DEFAULT_FLUSH_SIZE, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_FILE_SIZE
+from src.task.TaskOutputStore import TaskOutputStore
+from collections.abc import Callable
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_REPEAT = 3
+# Writing a million files takes longer than the benchmark itself, so directories stay smaller unless asked for
+DEFAULT_MAX_FILE_COUNT = 100000
+BASE_DATE = datetime(2025, 1, 1)
+DEFAULT_MENU_ACTIONS = 3000
+# Browse tasks, show scheduler status, back, show statistics, show summary, back
+MENU_SCRIPT_CYCLE = ['1', '4', '0', '2', '4', '0']
+
+_commands = ['echo hello', 'python --version', 'ls -la', 'make build', 'sleep 1']
+
+
+def generate_task_records(count: int, seed: int = 0) -> list[dict]:
+    """
+    Task records as they're stored in task files, with every state, priority and category
+    and completion times spread over a few orders of magnitude
+    """
+    rnd = random.Random(seed)
+    records = []
+    for i in range(count):
+        state = rnd.choice((TaskState.TO_DO, TaskState.IN_PROGRESS, TaskState.FINISHED, TaskState.TERMINATED))
+        begin_date = None
+        finish_date = None
+        if state is not TaskState.TO_DO:
+            begin_date = BASE_DATE + timedelta(seconds=rnd.randrange(365 * 24 * 3600))
+        if state is TaskState.FINISHED or state is TaskState.TERMINATED:
+            finish_date = begin_date + timedelta(seconds=rnd.lognormvariate(2, 2))
+        records.append({
+            'name': f"Task {i}",
+            'state': state.order,
+            'priority': rnd.choice(list(TaskPriority)).order,
+            'category': rnd.choice(list(TaskCategory)).order,
+            'description': f"Synthetic task number {i}",
+            'beginDate': begin_date.isoformat() if begin_date else None,
+            'finishDate': finish_date.isoformat() if finish_date else None,
+            'deadlineDate': (BASE_DATE + timedelta(days=rnd.randrange(730))).isoformat(),
+            'command': rnd.choice(_commands)
+        })
+    return records
+
+
+def write_task_files(dir_path: str, records: list[dict]):
+    # Spread over subdirectories like a real task tree, a single directory with 100k files is slow on its own
+    for i, record in enumerate(records):
+        sub_dir_path = os.path.join(dir_path, str(i // 1000))
+        if i % 1000 == 0:
+            os.makedirs(sub_dir_path, exist_ok=True)
+        with open(os.path.join(sub_dir_path, f"task{i}.json"), 'w') as file:
+            json.dump(record, file)
+
+
+def create_tasks(records: list[dict]) -> list[Task]:
+    tasks = []
+    for record in records:
+        parsed = dict(record)
+        for date_field in ('beginDate', 'finishDate', 'deadlineDate'):
+            parsed[date_field] = datetime.fromisoformat(record[date_field]) if record[date_field] else None
+        tasks.append(JsonTaskLoader.create_task_from_record(parsed))
+    return tasks
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> dict:
+    """
+    :param setup: called before every repetition, not measured
+    :return: best, median and every measured time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        begin = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - begin)
+    return {'best': min(times), 'median': statistics.median(times), 'times': times}
+
+
+class BenchmarkSuite:
+    __slots__ = ['sizes', 'repeat', 'max_file_count', 'work_dir_path', 'results']
+    sizes: list[int]
+    repeat: int
+    max_file_count: int
+    work_dir_path: str
+    results: list[dict]
+
+    def __init__(self, sizes: list[int], repeat: int, max_file_count: int, work_dir_path: str):
+        self.sizes = sizes
+        self.repeat = repeat
+        self.max_file_count = max_file_count
+        self.work_dir_path = work_dir_path
+        self.results = []
+
+    def add_result(self, name: str, size: int, timing: dict, **extra):
+        result = {'benchmark': name, 'size': size, **timing, 'perItem': timing['best'] / size if size else None,
+                  **extra}
+        self.results.append(result)
+        print(f"{name:<28} {size:>9} best {timing['best']:.4f}s median {timing['median']:.4f}s", file=sys.stderr)
+
+    def run_load(self, size: int, records: list[dict]):
+        if size > self.max_file_count:
+            return
+        dir_path = os.path.join(self.work_dir_path, f"tasks{size}")
+        write_task_files(dir_path, records)
+        self.add_result('load_all_tasks', size,
+                        measure(lambda: JsonTaskLoader.load_all_tasks(dir_path, TaskLoadReport(), 1), self.repeat))
+        self.add_result('load_all_tasks_parallel', size,
+                        measure(lambda: JsonTaskLoader.load_all_tasks(dir_path, TaskLoadReport()), self.repeat))
+        cache_path = os.path.join(self.work_dir_path, f"tasks{size}.cache")
+        JsonTaskLoader.load_all_tasks(dir_path, TaskLoadReport(), cache=TaskParseCache.open(cache_path))
+        self.add_result('load_all_tasks_cached', size,
+                        measure(lambda: JsonTaskLoader.load_all_tasks(dir_path, TaskLoadReport(),
+                                                                      cache=TaskParseCache.open(cache_path)),
+                                self.repeat))
+
+    def run_render(self, size: int, tasks: list[Task]):
+        settings = MenuSettings()
+        for field_name in settings.task_sort_allowed:
+            if field_name not in settings.task_print:
+                settings.add_print(field_name)
+
+        def clear_cache():
+            for task in tasks:
+                task.renderCache = None
+
+        self.add_result('get_tasks_print_msg', size,
+                        measure(lambda: settings.get_tasks_print_msg(tasks), self.repeat, clear_cache))
+        self.add_result('get_tasks_print_msg_cached', size,
+                        measure(lambda: settings.get_tasks_print_msg(tasks), self.repeat))
+
+    def run_statistics(self, size: int, tasks: list[Task]):
+        # Registry and statistics listen to every task until they're closed
+        with TaskRegistry(tasks) as registry:
+            created_statistics = []
+            self.add_result('TaskStatistics', size,
+                            measure(lambda: created_statistics.append(TaskStatistics(registry)), self.repeat))
+            for task_statistics in created_statistics:
+                task_statistics.close()
+            created_tables = []
+            self.add_result('TaskTable', size, measure(lambda: created_tables.append(TaskTable(registry)), self.repeat))
+            for task_table in created_tables:
+                task_table.close()
+            task_statistics = TaskStatistics(registry)
+            task_table = TaskTable(registry)
+            self.add_result('get_category_counts', size, measure(task_statistics.get_category_counts, self.repeat))
+            self.add_result('calc_complete_times', size, measure(task_table.calc_complete_times, self.repeat))
+            self.add_result('get_summary', size, measure(task_statistics.get_summary, self.repeat))
+            task_table.close()
+            task_statistics.close()
+
+    def run_menu(self, size: int, tasks: list[Task], action_count: int):
+        # Menu output goes nowhere, only the navigation and rendering of pages is measured
+        cycle_count = max(1, action_count // len(MENU_SCRIPT_CYCLE))
+        script = '\n'.join(MENU_SCRIPT_CYCLE * cycle_count) + '\n'
+        # Menu windows register registry listeners that live as long as the registry, so every repetition
+        # gets a registry of its own, otherwise listeners of the ones before would slow it down
+        current = []
+
+        def close_registry():
+            for closeable in current:
+                closeable.close()
+            current.clear()
+
+        def open_registry():
+            close_registry()
+            registry = TaskRegistry(tasks)
+            current.extend((TaskStatistics(registry), registry))
+
+        def navigate():
+            task_statistics, registry = current
+            window_manager = ConsoleWindowManager(registry)
+            window_manager.add_new_window(MainConsoleWindow(registry, MenuSettings(), task_statistics=task_statistics))
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                window_manager.run_script(io.StringIO(script))
+
+        self.add_result('menu_navigation', cycle_count * len(MENU_SCRIPT_CYCLE),
+                        measure(navigate, self.repeat, open_registry), tasks=size)
+        close_registry()
+
+    def run_logger(self, size: int, writer_count: int):
+        records_per_writer = max(1, size // writer_count)
+        msg = "Task name: benchmark\nfinished work with output:\n" + 'x' * 200
+
+        def write_records():
+            for _ in range(records_per_writer):
+                Logger.log(msg)
+
+        def log_concurrently():
+            writers = [threading.Thread(target=write_records) for _ in range(writer_count)]
+            for writer in writers:
+                writer.start()
+            for writer in writers:
+                writer.join()
+            Logger.shutdown()  # waits until every record is written
+
+        self.add_result('Logger.log', records_per_writer * writer_count, measure(log_concurrently, self.repeat),
+                        writers=writer_count)
+
+    def run_commands(self, size: int, command: str):
+        def run_tasks():
+            tasks = [Task.create_unfinished_task(f"Command {i}", TaskPriority.URGENT_IMPORTANT, TaskCategory.WORK,
+                                                 "", BASE_DATE, command) for i in range(size)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                for task in tasks:
+                    task.start_task()
+            for task in tasks:
+                task.commandFinished.wait()
+
+        self.add_result('start_finish_commands', size, measure(run_tasks, self.repeat), command=command,
+                        engine=str(TaskScheduler.engine_type()), workers=TaskScheduler.worker_count())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmarks of task manager hot paths")
+    arg_parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                            help="comma separated numbers of synthetic tasks, e.g. 1000,10000,1000000")
+    arg_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="measurements of every benchmark")
+    arg_parser.add_argument('--max-files', type=int, default=DEFAULT_MAX_FILE_COUNT,
+                            help="load benchmark is skipped for sizes over this")
+    arg_parser.add_argument('--log-writers', type=int, default=8, help="threads logging at the same time")
+    arg_parser.add_argument('--menu-actions', type=int, default=DEFAULT_MENU_ACTIONS,
+                            help="scripted menu actions in menu benchmark")
+    arg_parser.add_argument('--command-count', type=int, default=200, help="commands started in command benchmark")
+    arg_parser.add_argument('--command', default='true', help="command run by command benchmark")
+    arg_parser.add_argument('--workers', type=int, default=get_default_worker_count())
+    arg_parser.add_argument('--engine', choices=[str(engine) for engine in TaskEngineEnum], default='thread')
+    arg_parser.add_argument('--only', default=None,
+                            help="comma separated benchmark groups to run: load, render, statistics, menu, logger, "
+                                 "commands")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', default=None, help="file to write JSON results to, stdout when not given")
+    args = arg_parser.parse_args()
+
+    groups = args.only.split(',') if args.only else ['load', 'render', 'statistics', 'menu', 'logger', 'commands']
+    sizes = [int(size) for size in args.sizes.split(',')]
+    TaskScheduler.configure(args.workers, TaskEngineEnum.get_task_engine(args.engine))
+
+    with tempfile.TemporaryDirectory(prefix='task-benchmark-') as work_dir_path:
+        Logger.configure(DEFAULT_FLUSH_SIZE, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_FILE_SIZE,
+                         os.path.join(work_dir_path, 'logs'))
+        TaskOutputStore.configure(True, os.path.join(work_dir_path, 'outputs'))
+        suite = BenchmarkSuite(sizes, args.repeat, args.max_files, work_dir_path)
+        for size in sizes:
+            records = generate_task_records(size, args.seed)
+            if 'load' in groups:
+                suite.run_load(size, records)
+            if 'render' in groups or 'statistics' in groups or 'menu' in groups:
+                tasks = create_tasks(records)
+                if 'render' in groups:
+                    suite.run_render(size, tasks)
+                if 'statistics' in groups:
+                    suite.run_statistics(size, tasks)
+                if 'menu' in groups:
+                    suite.run_menu(size, tasks, args.menu_actions)
+            if 'logger' in groups:
+                suite.run_logger(size, args.log_writers)
+        if 'commands' in groups:
+            suite.run_commands(args.command_count, args.command)
+        TaskScheduler.shutdown()
+        Logger.shutdown()
+
+    report = {
+        'date': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpuCount': os.cpu_count(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': suite.results
+    }
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import os
+import pickle
+
+# Bumped whenever task records change shape or meaning, entries of other versions are dropped on open
+CACHE_FORMAT_VERSION = 2
+
+
+class TaskParseCache:
+    """
+    On-disk cache of already parsed task records.
+    Entry is valid as long as the file still has the same modification time and size
+    """
+    __slots__ = ['cache_file_path', 'entries', 'dirty']
+    cache_file_path: str
+    entries: dict[str, tuple[int, int, dict]]
+    dirty: bool
+
+    def __init__(self, cache_file_path: str):
+        self.cache_file_path = cache_file_path
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def open(cls, cache_file_path: str) -> 'TaskParseCache':
+        cache = cls(cache_file_path)
+        try:
+            with open(cache_file_path, 'rb') as file:
+                version, entries = pickle.load(file)
+            if version == CACHE_FORMAT_VERSION:
+                cache.entries = entries
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Broken cache only costs a full parse, it is rewritten on save
+            print(f"Ignoring unreadable task cache {cache_file_path}: {e}")
+        return cache
+
+    def get(self, file_path: str, file_stat: os.stat_result) -> dict | None:
+        entry = self.entries.get(file_path)
+        if entry is None or entry[0] != file_stat.st_mtime_ns or entry[1] != file_stat.st_size:
+            return None
+        return entry[2]
+
+    def put(self, file_path: str, file_stat: os.stat_result, record: dict):
+        self.entries[file_path] = (file_stat.st_mtime_ns, file_stat.st_size, record)
+        self.dirty = True
+
+    def remove(self, file_path: str):
+        if self.entries.pop(file_path, None) is not None:
+            self.dirty = True
+
+    def retain(self, file_paths):
+        # Drops entries of files that no longer exist
+        removed = self.entries.keys() - set(file_paths)
+        for file_path in removed:
+            del self.entries[file_path]
+        if removed:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        dir_path = os.path.dirname(self.cache_file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        # Written aside and swapped, so a crash mid-write never leaves a half written cache
+        tmp_file_path = self.cache_file_path + '.tmp'
+        with open(tmp_file_path, 'wb') as file:
+            pickle.dump((CACHE_FORMAT_VERSION, self.entries), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file_path, self.cache_file_path)
+        self.dirty = False
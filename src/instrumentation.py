@@ -0,0 +1,204 @@
+import cProfile
+import json
+import os
+import threading
+import time
+
+ENABLE_ENV_VAR = 'TASK_MANAGER_INSTRUMENT'
+PROFILE_ENV_VAR = 'TASK_MANAGER_PROFILE'
+EXPORT_ENV_VAR = 'TASK_MANAGER_METRICS'
+
+
+class TimerStat:
+    __slots__ = ['count', 'total', 'min', 'max']
+    count: int
+    total: float
+    min: float
+    max: float
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'total': self.total, 'avg': self.total / self.count if self.count else None,
+                'min': self.min if self.count else None, 'max': self.max}
+
+
+class Timer:
+    __slots__ = ['name', 'begin']
+    name: str
+    begin: float
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        Instrumentation.add_time(self.name, time.perf_counter() - self.begin)
+        return False
+
+
+class NullTimer:
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_null_timer = NullTimer()
+
+
+class Instrumentation:
+    """
+    Named timers and counters of the hot paths. While disabled, timer() hands out one shared no-op context
+    and count() returns right away, so instrumented code costs a call and a flag check.
+    Turned on with --instrument or TASK_MANAGER_INSTRUMENT=1, cProfile of the main thread is taken
+    with --profile or TASK_MANAGER_PROFILE=<file>, report is written on shutdown with --metrics-output
+    or TASK_MANAGER_METRICS=<file>
+    """
+    enabled: bool = os.environ.get(ENABLE_ENV_VAR, '') not in ('', '0')
+    _lock = threading.Lock()
+    _timers: dict[str, TimerStat] = {}
+    _counters: dict[str, int] = {}
+    _profiler: cProfile.Profile | None = None
+    _profile_file_path: str | None = None
+    _export_file_path: str | None = None
+    _started: float = time.perf_counter()
+
+    @classmethod
+    def configure(cls, enabled: bool, profile_file_path: str | None = None, export_file_path: str | None = None):
+        """
+        :param profile_file_path: start profiling the calling thread right away, stats are written there on shutdown
+        :param export_file_path: JSON report is written there on shutdown
+        """
+        cls.enabled = enabled
+        cls._export_file_path = export_file_path
+        if profile_file_path:
+            cls.start_profile(profile_file_path)
+
+    @classmethod
+    def enable(cls):
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    @classmethod
+    def timer(cls, name: str) -> Timer | NullTimer:
+        """
+        with Instrumentation.timer('task.start'): ...
+        """
+        if not cls.enabled:
+            return _null_timer
+        return Timer(name)
+
+    @classmethod
+    def add_time(cls, name: str, seconds: float):
+        if not cls.enabled:
+            return
+        with cls._lock:
+            stat = cls._timers.get(name)
+            if stat is None:
+                stat = cls._timers[name] = TimerStat()
+            stat.add(seconds)
+
+    @classmethod
+    def count(cls, name: str, amount: int = 1):
+        if not cls.enabled:
+            return
+        with cls._lock:
+            cls._counters[name] = cls._counters.get(name, 0) + amount
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._timers = {}
+            cls._counters = {}
+            cls._started = time.perf_counter()
+
+    @classmethod
+    def start_profile(cls, file_path: str):
+        """
+        Profiles the calling thread until stop_profile(), stats are dumped to file_path in pstats format
+        """
+        if cls._profiler is not None:
+            return
+        cls._profile_file_path = file_path
+        cls._profiler = cProfile.Profile()
+        cls._profiler.enable()
+
+    @classmethod
+    def stop_profile(cls) -> str | None:
+        """
+        :return: path of the written profile, None when nothing was profiled
+        """
+        if cls._profiler is None:
+            return None
+        cls._profiler.disable()
+        cls._profiler.dump_stats(cls._profile_file_path)
+        cls._profiler = None
+        return cls._profile_file_path
+
+    @classmethod
+    def shutdown(cls) -> list[str]:
+        """
+        Stops profiling and writes the report, if they were asked for
+
+        :return: paths of written files
+        """
+        written = []
+        profile_file_path = cls.stop_profile()
+        if profile_file_path is not None:
+            written.append(profile_file_path)
+        if cls._export_file_path is not None:
+            cls.export_json(cls._export_file_path)
+            written.append(cls._export_file_path)
+        return written
+
+    @classmethod
+    def get_report(cls) -> dict:
+        """
+        :return: every timer and counter, ready to be dumped to JSON
+        """
+        with cls._lock:
+            return {
+                'enabled': cls.enabled,
+                'uptime': time.perf_counter() - cls._started,
+                'timers': {name: stat.to_dict() for name, stat in sorted(cls._timers.items())},
+                'counters': dict(sorted(cls._counters.items()))
+            }
+
+    @classmethod
+    def get_report_msg(cls) -> str:
+        report = cls.get_report()
+        msg_list = [f"Instrumentation {'enabled' if report['enabled'] else 'disabled'}, "
+                    f"{report['uptime']:.1f}s since start"]
+        for name, stat in report['timers'].items():
+            msg_list.append(f"{name}: {stat['count']} x avg {stat['avg'] * 1000:.3f}ms, "
+                            f"max {stat['max'] * 1000:.3f}ms, total {stat['total']:.3f}s")
+        for name, value in report['counters'].items():
+            msg_list.append(f"{name}: {value}")
+        return '\n'.join(msg_list)
+
+    @classmethod
+    def export_json(cls, file_path: str):
+        with open(file_path, 'w') as file:
+            json.dump(cls.get_report(), file, indent=2)
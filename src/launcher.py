@@ -1,16 +1,115 @@
-from src.loader import JsonTaskLoader
+from src.loader import JsonTaskLoader, TaskLoadReport
+from src.cache import TaskParseCache
+from src.watcher import TaskDirectoryWatcher, DEFAULT_POLL_INTERVAL
 from src.menu.MenuRefactor import ConsoleWindowManager, MainConsoleWindow, MenuSettings
+from src.task.TaskScheduler import TaskScheduler, SchedulingPolicyEnum, get_default_worker_count
+from src.task.TaskWatchdog import TaskWatchdog, DEFAULT_KILL_GRACE_PERIOD
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskOutput import TaskOutputBuffer, DEFAULT_BUFFER_SIZE
+from src.task.TaskOutputStore import TaskOutputStore, OutputCompressionEnum, DEFAULT_MAX_AGE, DEFAULT_MAX_STORE_SIZE
+from src.task.TaskResultCache import TaskResultCache, DEFAULT_RESULT_CACHE_SIZE
+from src.task.TaskShutdown import DEFAULT_SHUTDOWN_GRACE_PERIOD
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskStatistics import TaskStatistics
+from src.menu.TaskCharts import TaskChartRenderer, CHART_FILE_FORMATS
+from src.menu.TaskDashboard import DEFAULT_REFRESH_INTERVAL
+from src.instrumentation import Instrumentation, PROFILE_ENV_VAR, EXPORT_ENV_VAR
 from pathlib import Path
+import argparse
+import os
+
+arg_parser = argparse.ArgumentParser(description="Console task manager")
+arg_parser.add_argument('--workers', type=int, default=get_default_worker_count(),
+                        help="max number of task commands running at the same time")
+arg_parser.add_argument('--engine', choices=[str(engine) for engine in TaskEngineEnum], default='thread',
+                        help="'thread' runs every command on its own worker thread, "
+                             "'asyncio' runs all of them on a single event loop")
+arg_parser.add_argument('--schedule', choices=[str(policy) for policy in SchedulingPolicyEnum], default='deadline',
+                        help="order of queued tasks, 'deadline' runs the earliest deadline first, "
+                             "'priority' the most important first")
+arg_parser.add_argument('--kill-grace', type=float, default=DEFAULT_KILL_GRACE_PERIOD,
+                        help="seconds a timed out command gets to exit after being terminated, before it's killed")
+arg_parser.add_argument('--shutdown-grace', type=float, default=DEFAULT_SHUTDOWN_GRACE_PERIOD,
+                        help="seconds running commands get to exit on quit, before they're killed")
+arg_parser.add_argument('--load-workers', type=int, default=None,
+                        help="size of the pool parsing task files, 1 loads them one by one")
+arg_parser.add_argument('--load-processes', action='store_true',
+                        help="parse task files in a process pool instead of a thread pool")
+arg_parser.add_argument('--no-load-cache', action='store_true',
+                        help="parse every task file instead of reusing records of unchanged ones")
+arg_parser.add_argument('--watch-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="seconds between checks of task directory for changes, 0 turns reloading off")
+arg_parser.add_argument('--output-buffer', type=int, default=DEFAULT_BUFFER_SIZE,
+                        help="number of last output characters kept in memory for every task")
+arg_parser.add_argument('--spill-dir', default=None,
+                        help="directory to write full output of every task to")
+arg_parser.add_argument('--no-output-store', action='store_true',
+                        help="keep output of runs only in the log instead of compressed files of their own")
+arg_parser.add_argument('--output-store-dir', default=None,
+                        help="directory of stored outputs, 'outputs' when not given")
+arg_parser.add_argument('--output-compression', choices=[str(compression) for compression in OutputCompressionEnum],
+                        default='gzip', help="compression of stored outputs")
+arg_parser.add_argument('--output-max-age', type=float, default=DEFAULT_MAX_AGE,
+                        help="seconds stored outputs are kept for")
+arg_parser.add_argument('--output-max-size', type=int, default=DEFAULT_MAX_STORE_SIZE,
+                        help="max bytes of stored outputs, the oldest ones are removed above it")
+arg_parser.add_argument('--no-result-cache', action='store_true',
+                        help="run commands of tasks with resultCache every time instead of reusing their output")
+arg_parser.add_argument('--result-cache-dir', default=None,
+                        help="directory of cached command outputs, 'cache/results' when not given")
+arg_parser.add_argument('--result-cache-size', type=int, default=DEFAULT_RESULT_CACHE_SIZE,
+                        help="max bytes of cached outputs, least recently used ones are removed above it")
+arg_parser.add_argument('--chart-dir', default=None,
+                        help="save charts to this directory in the background instead of opening a window")
+arg_parser.add_argument('--chart-format', choices=CHART_FILE_FORMATS, default='png',
+                        help="file format of charts saved to --chart-dir")
+arg_parser.add_argument('--dashboard-refresh', type=float, default=DEFAULT_REFRESH_INTERVAL,
+                        help="seconds between redraws of the live dashboard")
+arg_parser.add_argument('--script', default=None,
+                        help="read menu answers from this file, one per line, instead of the console; "
+                             "quits at its end")
+arg_parser.add_argument('--instrument', action='store_true', default=Instrumentation.enabled,
+                        help="collect timings of the hot paths, same as TASK_MANAGER_INSTRUMENT=1")
+arg_parser.add_argument('--profile', default=os.environ.get(PROFILE_ENV_VAR),
+                        help="cProfile the whole session into this file, readable with pstats")
+arg_parser.add_argument('--metrics-output', default=os.environ.get(EXPORT_ENV_VAR),
+                        help="write collected timings as JSON to this file on quit")
+args = arg_parser.parse_args()
+Instrumentation.configure(args.instrument, args.profile, args.metrics_output)
+TaskScheduler.configure(args.workers, TaskEngineEnum.get_task_engine(args.engine),
+                        SchedulingPolicyEnum.get_scheduling_policy(args.schedule))
+TaskWatchdog.configure(args.kill_grace)
+TaskOutputBuffer.configure(args.output_buffer, args.spill_dir)
+TaskOutputStore.configure(not args.no_output_store, args.output_store_dir,
+                          OutputCompressionEnum.get_output_compression(args.output_compression), args.output_max_age,
+                          args.output_max_size)
+TaskResultCache.configure(not args.no_result_cache, args.result_cache_dir, args.result_cache_size)
 
 launcher_path = Path(__file__).resolve()
-rsc_path = str(launcher_path.parent.parent) + r"\rsc"
+rsc_path = os.path.join(str(launcher_path.parent.parent), 'rsc')
+cache_path = os.path.join(str(launcher_path.parent.parent), 'cache', 'tasks.cache')
 
-tasks = JsonTaskLoader.load_all_tasks(rsc_path)
+load_report = TaskLoadReport()
+load_cache = None if args.no_load_cache else TaskParseCache.open(cache_path)
+loaded_tasks = JsonTaskLoader.load_all_tasks(rsc_path, load_report, args.load_workers, args.load_processes,
+                                             load_cache)
+print(load_report.get_summary_msg())
+tasks = TaskRegistry(loaded_tasks)
+# Counters follow the tasks from the moment they're loaded, not from the first time statistics are shown
+task_statistics = TaskStatistics(tasks)
+if args.watch_interval > 0:
+    TaskDirectoryWatcher(rsc_path, tasks, load_report, args.watch_interval, load_cache).start()
 
-print("Tasks" + str(tasks))
-window_manager = ConsoleWindowManager(tasks)
-window_manager.add_new_window(MainConsoleWindow(tasks, MenuSettings()))
-window_manager.show_current_window()
+print("Tasks" + str(loaded_tasks))
+chart_renderer = None if args.chart_dir is None else TaskChartRenderer(args.chart_dir, args.chart_format)
+window_manager = ConsoleWindowManager(tasks, args.shutdown_grace, chart_renderer)
+window_manager.add_new_window(MainConsoleWindow(tasks, MenuSettings(), chart_renderer, args.dashboard_refresh,
+                                                task_statistics))
+if args.script is None:
+    window_manager.run()
+else:
+    with open(args.script, 'r') as script_file:
+        window_manager.run_script(script_file)
 
 """
 TODO: ( Fixes, improvements, new features )
@@ -1,36 +1,244 @@
 import json
 from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from src.task.TaskExceptions import CorruptedTaskDataException
+from src.cache import TaskParseCache
+from src.task.TaskGraph import TaskGraph
+from src.task.TaskResultCache import ResultCachePolicy
+from src.instrumentation import Instrumentation
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from typing import List
 import glob
 import os
 from _datetime import datetime
 
+TASK_FILE_EXTENSIONS = ('.json',)
+# Below this many files spinning up a pool costs more than it saves
+PARALLEL_LOAD_THRESHOLD = 64
+# Fields of records made by parse_task_record, cached records without exactly these are parsed again
+TASK_RECORD_FIELDS = frozenset(('name', 'state', 'priority', 'category', 'description', 'beginDate', 'finishDate',
+                                'deadlineDate', 'command', 'timeout', 'dependsOn', 'resultCache'))
+
+
+def parse_date(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def parse_task_record(file_path: str) -> dict:
+    """
+    Reads task file into a plain record, so it can be parsed in another process and turned into Task later
+
+    :raises CorruptedTaskDataException: file is missing fields or has values that don't map to task enums
+    """
+    with open(file_path, 'r') as file:
+        data = json.load(file)
+    try:
+        record = {
+            'name': data['name'],
+            'state': data['state'],
+            'priority': data['priority'],
+            'category': data['category'],
+            'description': data['description'],
+            'beginDate': parse_date(data['beginDate']),
+            'finishDate': parse_date(data['finishDate']),
+            'deadlineDate': parse_date(data['deadlineDate']),
+            'command': data['command'],
+            'timeout': data.get('timeout'),  # optional, older task files don't have it
+            'dependsOn': data.get('dependsOn', []),
+            'resultCache': data.get('resultCache')
+        }
+    except KeyError as e:
+        raise CorruptedTaskDataException(f"Task file is missing field {e}")
+    if TaskState.get_task_state(record['state']) is None:
+        raise CorruptedTaskDataException(f"Unknown task state '{record['state']}'")
+    if TaskPriority.get_task_priority(record['priority']) is None:
+        raise CorruptedTaskDataException(f"Unknown task priority '{record['priority']}'")
+    if TaskCategory.get_task_category(record['category']) is None:
+        raise CorruptedTaskDataException(f"Unknown task category '{record['category']}'")
+    timeout = record['timeout']
+    if timeout is not None and not is_positive_number(timeout):
+        raise CorruptedTaskDataException(f"Task timeout must be a positive number of seconds, got '{timeout}'")
+    depends_on = record['dependsOn']
+    if not isinstance(depends_on, list) or any(isinstance(ref, bool) or not isinstance(ref, (str, int))
+                                               for ref in depends_on):
+        raise CorruptedTaskDataException(f"Task dependsOn must be a list of task names and ids, got '{depends_on}'")
+    validate_result_cache(record['resultCache'])
+    return record
+
+
+def is_positive_number(value) -> bool:
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and value > 0
+
+
+def is_string_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def validate_result_cache(result_cache: dict | None):
+    if result_cache is None:
+        return
+    if not isinstance(result_cache, dict) or not is_positive_number(result_cache.get('ttl')):
+        raise CorruptedTaskDataException(f"Task resultCache needs a positive ttl in seconds, got '{result_cache}'")
+    for field_name in ('env', 'files'):
+        if not is_string_list(result_cache.get(field_name, [])):
+            raise CorruptedTaskDataException(f"Task resultCache {field_name} must be a list of strings, "
+                                             f"got '{result_cache[field_name]}'")
+
+
+def try_parse_task_record(file_path: str) -> tuple[dict | None, str | None]:
+    # Errors are returned instead of raised, so one bad file doesn't cancel the rest of the pool
+    try:
+        return parse_task_record(file_path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class TaskLoadReport:
+    __slots__ = ['loaded_files', 'errors', 'file_stats', 'rejected_tasks']
+    loaded_files: list[str]
+    errors: dict[str, str]
+    file_stats: dict[str, os.stat_result]  # every found file as it was before being read, failed ones included
+    rejected_tasks: dict[str, Task]  # tasks read fine but dropped because of their dependencies, by file
+
+    def __init__(self):
+        self.loaded_files = []
+        self.errors = {}
+        self.file_stats = {}
+        self.rejected_tasks = {}
+
+    def get_summary_msg(self) -> str:
+        msg_list = [f"Loaded {len(self.loaded_files)} tasks, {len(self.errors)} files failed"]
+        for file_path, error in self.errors.items():
+            msg_list.append(f"\n  {file_path}: {error}")
+        return ''.join(msg_list)
+
 
 class JsonTaskLoader:
     @classmethod
     def load_task(cls, file_path: str) -> Task:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            data_begin_date = data['beginDate']
-            data_finish_date = data['finishDate']
-            data_deadline_date = data['deadlineDate']
-            result_task = Task.create_task(
-                data['name'],
-                TaskState.get_task_state(data['state']),
-                TaskPriority.get_task_priority(data['priority']),
-                TaskCategory.get_task_category(data['category']),
-                data['description'],
-                datetime.fromisoformat(data_begin_date) if data_begin_date else None,
-                datetime.fromisoformat(data_finish_date) if data_begin_date else None,
-                datetime.fromisoformat(data_deadline_date) if data_begin_date else None,
-                data['command']
-            )
-        return result_task
+        return cls.create_task_from_record(parse_task_record(file_path))
+
+    @classmethod
+    def create_task_from_record(cls, record: dict) -> Task:
+        return Task.create_task(
+            record['name'],
+            TaskState.get_task_state(record['state']),
+            TaskPriority.get_task_priority(record['priority']),
+            TaskCategory.get_task_category(record['category']),
+            record['description'],
+            record['beginDate'],
+            record['finishDate'],
+            record['deadlineDate'],
+            record['command'],
+            # Optional, records generated by the benchmark don't have these
+            record.get('timeout'),
+            record.get('dependsOn'),
+            ResultCachePolicy.from_record(record.get('resultCache'))
+        )
+
+    @classmethod
+    def find_task_files(cls, dir_path: str, extensions: tuple[str, ...] = TASK_FILE_EXTENSIONS) -> List[str]:
+        # Sorted, so tasks get the same ids on every launch no matter how the pool finishes
+        return sorted(file_path for file_path in glob.glob(os.path.join(dir_path, '**'), recursive=True)
+                      if file_path.endswith(extensions) and os.path.isfile(file_path))
 
     @classmethod
-    def load_all_tasks(cls, dir_path: str) -> List[Task]:
+    def load_all_tasks(cls, dir_path: str, report: TaskLoadReport | None = None, max_workers: int | None = None,
+                       use_processes: bool = False, cache: TaskParseCache | None = None) -> List[Task]:
+        """
+        Loads every task file in directory tree. Files that fail to load are skipped and put into the report
+
+        :param report: collects loaded files and per-file errors, errors are printed when it's not given
+        :param max_workers: size of the parsing pool, 1 parses files one by one
+        :param use_processes: parse in a process pool, worth it only for a lot of files
+        :param cache: records of unchanged files are taken from it instead of being parsed, it's saved afterward
+        """
+        with Instrumentation.timer('loader.find_files'):
+            file_paths = cls.find_task_files(dir_path)
+        if report is None:
+            report = TaskLoadReport()
+            print_errors = True
+        else:
+            print_errors = False
+
+        results = {}
+        # Taken before parsing, so a file changed while it's loaded is seen as changed by the watcher
+        file_stats = report.file_stats
+        for file_path in file_paths:
+            try:
+                file_stats[file_path] = os.stat(file_path)
+            except OSError as e:
+                # Removed after it was found, reported like a file that can't be parsed
+                results[file_path] = (None, f"{type(e).__name__}: {e}")
+        files_to_parse = [file_path for file_path in file_paths if file_path not in results]
+        cache_hits = 0
+        if cache is not None:
+            files_to_check = files_to_parse
+            files_to_parse = []
+            for file_path in files_to_check:
+                record = cache.get(file_path, file_stats[file_path])
+                if record is None or record.keys() != TASK_RECORD_FIELDS:
+                    files_to_parse.append(file_path)
+                else:
+                    results[file_path] = (record, None)
+                    cache_hits += 1
+
+        with Instrumentation.timer('loader.parse_files'):
+            parsed = cls.__parse_files(files_to_parse, max_workers, use_processes)
+        for file_path, (record, error) in zip(files_to_parse, parsed):
+            results[file_path] = (record, error)
+            if cache is not None and error is None:
+                cache.put(file_path, file_stats[file_path], record)
+        Instrumentation.count('loader.files_parsed', len(files_to_parse))
+        Instrumentation.count('loader.cache_hits', cache_hits)
+
+        if cache is not None:
+            cache.retain(file_paths)
+            cache.save()
+
+        loaded = []
+        with Instrumentation.timer('loader.create_tasks'):
+            for file_path in file_paths:
+                record, error = results[file_path]
+                if error is not None:
+                    report.errors[file_path] = error
+                    continue
+                loaded.append((file_path, cls.create_task_from_record(record)))
+        dependency_errors = cls.find_dependency_errors([task for _, task in loaded])
+
         result = []
-        for file_path in glob.glob(dir_path + "/**", recursive=True):
-            if os.path.isfile(file_path):
-                result.append(cls.load_task(file_path))
+        for file_path, task in loaded:
+            if task.id in dependency_errors:
+                report.errors[file_path] = dependency_errors[task.id]
+                report.rejected_tasks[file_path] = task
+                continue
+            result.append(task)
+            report.loaded_files.append(file_path)
+
+        if print_errors and report.errors:
+            print(report.get_summary_msg())
         return result
+
+    @classmethod
+    def find_dependency_errors(cls, tasks: List[Task]) -> dict[int, str]:
+        """
+        Finds tasks with unknown or ambiguous dependencies, tasks in dependency cycles and every task depending on them
+
+        :return: task id -> error
+        """
+        if not any(task.dependsOn for task in tasks):
+            return {}
+        graph = TaskGraph(tasks)
+        errors = dict(graph.errors)
+        for task in graph.get_downstream(graph.errors):
+            errors.setdefault(task.id, "Depends on a task that failed to load")
+        return errors
+
+    @classmethod
+    def __parse_files(cls, file_paths: List[str], max_workers: int | None,
+                      use_processes: bool) -> List[tuple[dict | None, str | None]]:
+        if max_workers == 1 or len(file_paths) < PARALLEL_LOAD_THRESHOLD:
+            return [try_parse_task_record(file_path) for file_path in file_paths]
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_cls(max_workers=max_workers) as executor:
+            chunk_size = max(1, len(file_paths) // (4 * (max_workers or os.cpu_count() or 1)))
+            return list(executor.map(try_parse_task_record, file_paths, chunksize=chunk_size))
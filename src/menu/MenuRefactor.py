@@ -1,17 +1,30 @@
 from _datetime import datetime
-from collections.abc import Callable
-from src.task.TaskExceptions import InvalidStateChangeException, \
-    CorruptedTaskDataException
+from collections.abc import Callable, Iterable
 from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from src.task.TaskScheduler import TaskScheduler
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskTable import TaskTable
+from src.task.TaskStatistics import TaskStatistics
+from src.task.TaskResultCache import TaskResultCache
+from src.task.TaskShutdown import TaskShutdown, DEFAULT_SHUTDOWN_GRACE_PERIOD
+from src.task.TaskOutputStore import TaskOutputSegment
+from src.menu.TaskQuery import TaskQueryEngine, parse_filter, FilterParseException
+from src.menu.TaskCharts import ChartData, TaskChartRenderer, show_chart, DEFAULT_CHART_WAIT_PERIOD
+from src.menu.TaskDashboard import TaskDashboard, DEFAULT_REFRESH_INTERVAL
+from src.task.Logger import Logger
+from src.instrumentation import Instrumentation
 from enum import Enum
-from typing import Optional
-import matplotlib.pyplot as plt
-from collections import defaultdict
+from typing import Optional, TextIO
+from operator import attrgetter
+import sys
+
+DEFAULT_PAGE_SIZE = 20
+OUTPUT_PAGE_SIZE = 4 * 1024  # bytes of stored output shown at once
 
 
 class MenuSettings:
     __slots__ = ['task_filter', 'task_filter_allowed', 'task_sort', 'task_sort_allowed', 'task_print',
-                 'task_print_allowed', 'sort_ascending']
+                 'task_print_allowed', 'sort_ascending', 'query_engine', 'page_size', 'print_fields']
     task_filter: dict[str: list]
     task_filter_allowed: list[str]
     task_sort: str
@@ -19,10 +32,14 @@ class MenuSettings:
     task_print: list[str]
     task_print_allowed: list[str]
     sort_ascending: bool
+    query_engine: TaskQueryEngine | None
+    page_size: int
+    print_fields: tuple[tuple[str, attrgetter], ...]
 
     def __init__(self):
         self.task_print_allowed = ['id', 'name', 'state', 'priority', 'category', 'description', 'beginDate',
-                                   'finishDate', 'deadlineDate', 'command', 'commandThread', 'commandProcess']
+                                   'finishDate', 'deadlineDate', 'timeout', 'terminationReason', 'dependsOn',
+                                   'command', 'commandThread', 'commandProcess']
         self.task_print = ['id', 'name', 'command', 'state']
         self.task_sort_allowed = ['id', 'name', 'state', 'priority', 'category', 'beginDate', 'finishDate',
                                   'deadlineDate']
@@ -31,31 +48,95 @@ class MenuSettings:
 
         self.task_filter = {}
         self.task_filter_allowed = ['id', 'name', 'state', 'priority', 'category', 'deadlineDate']
+        self.query_engine = None
+        self.page_size = DEFAULT_PAGE_SIZE
+        self.print_fields = ()
+        self.__compile_print_fields()
+
+    def __compile_print_fields(self):
+        # Done once per print settings change instead of once per printed task
+        self.print_fields = tuple((field_name + ' [', attrgetter(field_name))
+                                  for field_name in self.task_print_allowed if field_name in self.task_print)
 
     def get_task_print_msg(self, task: Task) -> str:
+        # Line is cached on the task until either the task or the printed fields change
+        print_fields = self.print_fields
+        cache = task.renderCache
+        if cache is not None and cache[0] is print_fields and cache[1] == task.version:
+            return cache[2]
+        version = task.version
         msg_list = []
-        for i in range(0, len(self.task_print_allowed)):
-            field_name = self.task_print_allowed[i]
-            if self.task_print.__contains__(field_name):
-                msg_list.append(field_name)
-                msg_list.append(' [')
-                msg_list.append(str(task.get_field_by_name(field_name)))
-                msg_list.append('], ')
-
-        return ''.join(msg_list)
-
-    def get_tasks_print_msg(self, tasks: list[Task]) -> str:
-        tsk_msg_list = []
-        for tsk in tasks:
-            tsk_msg_list.append(self.get_task_print_msg(tsk))
-            tsk_msg_list.append('\n\n')
-        return ''.join(tsk_msg_list)
+        for field_prefix, field_getter in print_fields:
+            msg_list.append(field_prefix)
+            msg_list.append(str(field_getter(task)))
+            msg_list.append('], ')
+        msg = ''.join(msg_list)
+        task.renderCache = (print_fields, version, msg)
+        return msg
+
+    def get_tasks_print_msg(self, tasks: Iterable[Task]) -> str:
+        with Instrumentation.timer('menu.render_tasks'):
+            tsk_msg_list = []
+            for tsk in tasks:
+                tsk_msg_list.append(self.get_task_print_msg(tsk))
+                tsk_msg_list.append('\n\n')
+            return ''.join(tsk_msg_list)
+
+    def get_page_count(self, tasks: list[Task]) -> int:
+        return max(1, -(-len(tasks) // self.page_size))
+
+    def get_tasks_page_msg(self, tasks: list[Task], page: int) -> str:
+        """
+        Formats only tasks visible on the page
+
+        :param page: page number starting at 1, clamped to existing pages
+        """
+        page = min(max(page, 1), self.get_page_count(tasks))
+        first = (page - 1) * self.page_size
+        page_msg = self.get_tasks_print_msg(tasks[first:first + self.page_size])
+        return page_msg + f"Page {page}/{self.get_page_count(tasks)} ( {len(tasks)} tasks )"
+
+    def change_page_size(self, page_size: int):
+        if page_size < 1:
+            raise WrongSettingException("Failed to change page size")
+        self.page_size = page_size
+
+    def get_visible_tasks(self, tasks: TaskRegistry) -> list[Task]:
+        """
+        :return: tasks matching every filter, in the chosen sort order
+        """
+        if self.query_engine is None or self.query_engine.registry is not tasks:
+            self.query_engine = TaskQueryEngine(tasks)
+        with Instrumentation.timer('menu.query'):
+            return self.query_engine.query(self.task_filter, self.task_sort, self.sort_ascending)
 
     def remove_filter(self, flt: str):
-        pass
+        """
+        :param flt: field name to remove every filter on that field, or filter exactly as it was added
+        """
+        if flt in self.task_filter:
+            del self.task_filter[flt]
+            return
+        for field_name, conditions in self.task_filter.items():
+            for condition in conditions:
+                if condition[2] == flt.strip():
+                    conditions.remove(condition)
+                    if not conditions:
+                        del self.task_filter[field_name]
+                    return
+        raise WrongSettingException("Failed to remove filter option")
 
     def add_filter(self, flt: str):
-        pass
+        """
+        :param flt: <field><operator><value>, e.g. 'state=InProgress', 'deadlineDate<2025-06-01', 'name^=Ja'
+        """
+        try:
+            field_name, condition = parse_filter(flt)
+        except FilterParseException as e:
+            raise WrongSettingException("Failed to add filter option: " + str(e))
+        if field_name not in self.task_filter_allowed:
+            raise WrongSettingException("Failed to add filter option")
+        self.task_filter.setdefault(field_name, []).append(condition)
 
     def change_sort(self, srt: str):
         if srt in self.task_sort_allowed:
@@ -70,12 +151,14 @@ class MenuSettings:
         if not self.task_print.__contains__(prt):
             if self.task_print_allowed.__contains__(prt):
                 self.task_print.append(prt)
+                self.__compile_print_fields()
                 return
         raise WrongSettingException("Failed to add print option")
 
     def remove_print(self, prt: str):
         if self.task_print.__contains__(prt):
             self.task_print.remove(prt)
+            self.__compile_print_fields()
             return
         raise WrongSettingException("Failed to remove print option")
 
@@ -134,56 +217,78 @@ def clear_console():
 
 
 class ConsoleWindowManager:
-    __slots__ = ['window_stack', 'tasks', 'master_options_reserved']
+    __slots__ = ['window_stack', 'tasks', 'master_options_reserved', 'shutdown_grace_period', 'chart_renderer',
+                 'running']
     window_stack: list[ConsoleWindowAbstract]
-    tasks: list[Task]
+    tasks: TaskRegistry
     master_options_reserved: list[int]
-
-    def __init__(self, tasks: list[Task]):
+    shutdown_grace_period: float
+    chart_renderer: TaskChartRenderer | None
+    running: bool
+
+    def __init__(self, tasks: TaskRegistry, shutdown_grace_period: float = DEFAULT_SHUTDOWN_GRACE_PERIOD,
+                 chart_renderer: TaskChartRenderer | None = None):
+        """
+        :param shutdown_grace_period: seconds running commands get to exit on quit, before they're killed
+        :param chart_renderer: renderer of the windows, charts it's still drawing are waited for on quit
+        """
         self.window_stack = []
         self.tasks = tasks
         self.master_options_reserved = [0]
-
-    def show_current_window(self):
-        window = self.window_stack[-1]
-
-        while True:
+        self.shutdown_grace_period = shutdown_grace_period
+        self.chart_renderer = chart_renderer
+        self.running = False
+
+    def run(self):
+        """
+        Shows the window on top of the stack and handles one action at a time until quit.
+        Windows are only pushed to and popped from the stack, so however long the menu runs the call stack stays flat.
+        Ends like quit when input runs out, e.g. at the end of a script
+        """
+        self.running = True
+        while self.running and self.window_stack:
+            window = self.window_stack[-1]
             self.print_master_options()
             self.print_options(window.options)
-            user_response = self.get_user_input()
-            if user_response is not None:
+            try:
+                user_response = self.get_user_input()
                 if self.check_if_master_option(user_response):
                     self.master_user_input_handler(user_response, window)
-                    break
                 elif self.check_if_match_any_option(user_response, window.options):
                     clear_console()
-                    action_result = None
-                    if isinstance(window, ConsoleWindowAbstract):
-                        action_result = window.actions[user_response]()  # That's so annoying to track
-                    elif isinstance(window, ConsoleWindowParamAbstract):
-                        # Relic of the past
-                        action_result = window.actions[user_response](window.var_dict, window.var_tuple)
-                    if action_result is not None:
-                        match action_result.action_result_type:
-                            case ActionResultTypeEnum.DO_NOTHING:
-                                pass
-                            case ActionResultTypeEnum.SHOW_NEXT:
-                                self.window_stack.append(action_result.next_window)
-                                self.show_current_window()
-                            case ActionResultTypeEnum.SHOW_PREVIOUS:
-                                self.window_stack.pop()
-                                self.show_current_window()
-                            case ActionResultTypeEnum.QUIT:
-                                self.quit()
-                            case ActionResultTypeEnum.SHOW_CURRENT:
-                                self.show_current_window()
-                            case _default:
-                                raise UnsupportedOperationException
-                    break
-            else:
-                clear_console()
+                    with Instrumentation.timer('menu.action'):
+                        action_result = window.actions[user_response]()
+                    self.handle_action_result(action_result)
+            except EOFError:
+                self.quit()
+            except (ValueError, IllegalMenuInputException, UnsupportedOperationException) as e:
+                print(e)
+
+    def run_script(self, script: TextIO):
+        """
+        Runs the menu with every answer read from script instead of the console, one per line
+        """
+        stdin = sys.stdin
+        sys.stdin = script
+        try:
+            self.run()
+        finally:
+            sys.stdin = stdin
 
-        # TODO: Handle action result here
+    def handle_action_result(self, action_result: ActionResult | None):
+        if action_result is None:
+            return
+        match action_result.action_result_type:
+            case ActionResultTypeEnum.DO_NOTHING | ActionResultTypeEnum.SHOW_CURRENT:
+                pass
+            case ActionResultTypeEnum.SHOW_NEXT:
+                self.window_stack.append(action_result.next_window)
+            case ActionResultTypeEnum.SHOW_PREVIOUS:
+                self.show_previous_window()
+            case ActionResultTypeEnum.QUIT:
+                self.quit()
+            case _default:
+                raise UnsupportedOperationException(f"Unknown action result {action_result.action_result_type}")
 
     def check_if_master_option(self, option: int):
         return option in self.master_options_reserved
@@ -227,60 +332,100 @@ class ConsoleWindowManager:
     def add_new_window(self, window: ConsoleWindowAbstract):
         self.window_stack.append(window)
 
-    # CHECK if I can perform .pop ( empty list )
     def show_previous_window(self):
-        self.window_stack.pop()
-        self.show_current_window()
+        # Main window is never popped, 0 there quits instead
+        if len(self.window_stack) > 1:
+            self.window_stack.pop()
 
     def quit(self):
         print("Trying to terminate all the running tasks")
-        for task in self.tasks:
-            if task.state == TaskState.IN_PROGRESS:
-                try:
-                    task.terminate_task()
-                except CorruptedTaskDataException | InvalidStateChangeException as e:
-                    print("Failed to terminate task: " + str(task))
-                    print("Reason: " + e)
+        running_tasks = self.tasks.get_by_state(TaskState.IN_PROGRESS) + self.tasks.get_by_state(TaskState.QUEUED)
+        shutdown_report = TaskShutdown.stop_tasks(running_tasks, "Terminated on quit", self.shutdown_grace_period)
+        print(shutdown_report.get_summary_msg())
+        if self.chart_renderer is not None and not self.chart_renderer.wait(DEFAULT_CHART_WAIT_PERIOD):
+            print(f"Charts not rendered within {DEFAULT_CHART_WAIT_PERIOD:g}s were dropped")
+        TaskScheduler.shutdown()
+        Logger.shutdown()
+        for file_path in Instrumentation.shutdown():
+            print("Instrumentation written to: " + file_path)
         print("Goodbye my spiky friend")
-        exit(0)
+        self.running = False
 
 
 class MainConsoleWindow(ConsoleWindowAbstract):
-    __slots__ = ['tasks', 'settings']
-    tasks: list[Task]
+    __slots__ = ['tasks', 'settings', 'task_table', 'task_statistics', 'chart_renderer', 'dashboard_refresh_interval']
+    tasks: TaskRegistry
     settings: MenuSettings
-
-    def __init__(self, tasks: list[Task], settings: MenuSettings):
+    task_table: TaskTable | None
+    task_statistics: TaskStatistics
+    chart_renderer: TaskChartRenderer | None
+    dashboard_refresh_interval: float
+
+    def __init__(self, tasks: TaskRegistry, settings: MenuSettings,
+                 chart_renderer: TaskChartRenderer | None = None,
+                 dashboard_refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 task_statistics: TaskStatistics | None = None):
+        """
+        :param task_statistics: statistics kept since the tasks were loaded, counted from now on when not given
+        """
         super().__init__(
-            {1: "browse tasks", 2: "show statistics"},
-            {1: self.browse_tasks, 2: self.next_stats_window}
+            {1: "browse tasks", 2: "show statistics", 3: "show instrumentation", 4: "show live dashboard"},
+            {1: self.browse_tasks, 2: self.next_stats_window, 3: self.show_instrumentation, 4: self.show_dashboard}
         )
         self.tasks = tasks
         self.settings = settings
+        self.task_table = None
+        self.task_statistics = task_statistics if task_statistics is not None else TaskStatistics(tasks)
+        self.chart_renderer = chart_renderer
+        self.dashboard_refresh_interval = dashboard_refresh_interval
 
     def print_tasks(self):
-        print(self.settings.get_tasks_print_msg(self.tasks))
+        print(self.settings.get_tasks_page_msg(self.settings.get_visible_tasks(self.tasks), 1))
 
     def browse_tasks(self) -> ActionResult:
         self.print_tasks()
         return ActionResult(ActionResultTypeEnum.SHOW_NEXT, BrowseTasksConsoleWindow(self.tasks, self.settings))
 
+    def show_instrumentation(self) -> ActionResult:
+        print(Instrumentation.get_report_msg())
+        if not Instrumentation.enabled:
+            print("Start with --instrument to collect timings")
+        else:
+            file_path = input("Enter file to export timings to as JSON ( empty to skip ): ").strip()
+            if file_path:
+                try:
+                    Instrumentation.export_json(file_path)
+                except OSError as e:
+                    print("Failed to export timings: " + str(e))
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def show_dashboard(self) -> ActionResult:
+        TaskDashboard(self.tasks, self.dashboard_refresh_interval).run()
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
     def next_stats_window(self):
-        return ActionResult(ActionResultTypeEnum.SHOW_NEXT, StatisticsConsoleWindow(self.tasks))
+        # Table is built once and then only synced with changed tasks every time statistics are shown
+        if self.task_table is None:
+            self.task_table = TaskTable(self.tasks)
+        return ActionResult(ActionResultTypeEnum.SHOW_NEXT,
+                            StatisticsConsoleWindow(self.tasks, self.task_table, self.task_statistics,
+                                                    self.chart_renderer))
 
 
 class BrowseTasksConsoleWindow(ConsoleWindowAbstract):
-    __slots__ = ['tasks', 'settings']
-    tasks: list[Task]
+    __slots__ = ['tasks', 'settings', 'page']
+    tasks: TaskRegistry
     settings: MenuSettings
+    page: int
 
-    def __init__(self, tasks: list[Task], settings: MenuSettings):
+    def __init__(self, tasks: TaskRegistry, settings: MenuSettings):
         super().__init__(
-            {1: 'select task', 2: 'settings', 3: 'add task'},
-            {1: self.select_task, 2: self.show_settings_menu, 3: self.add_task}
+            {1: 'select task', 2: 'settings', 3: 'add task', 4: 'show scheduler status'},
+            {1: self.select_task, 2: self.show_settings_menu, 3: self.add_task, 4: self.show_scheduler_status}
         )
         self.tasks = tasks
         self.settings = settings
+        self.page = 1
 
     def show_settings_menu(self) -> ActionResult:
         return ActionResult(ActionResultTypeEnum.SHOW_NEXT, MenuSettingsConsoleWindow(self.settings))
@@ -329,28 +474,41 @@ class BrowseTasksConsoleWindow(ConsoleWindowAbstract):
                 command=tsk_command
             )
 
-            self.tasks.append(new_task)
+            self.tasks.add(new_task)
             print("Task successfully added")
         except Exception as e:
             print(f"Failed to add task: {e}")
         return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
 
+    @staticmethod
+    def show_scheduler_status() -> ActionResult:
+        print(TaskScheduler.get_status_msg())
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
     def select_task(self) -> ActionResult:
-        print(self.settings.get_tasks_print_msg(self.tasks))
+        self.print_page()
         while True:
+            usr_text = input("Enter id of task you would like to use: ( '0' to go back, 'n' / 'p' to change page )")
+            if usr_text == 'n' or usr_text == 'p':
+                self.page += 1 if usr_text == 'n' else -1
+                self.print_page()
+                continue
             try:
-                usr_input = int(input("Enter id of task you would like to use: ( '0' to go back )"))
+                usr_input = int(usr_text)
                 if usr_input == 0:
                     return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
             except ValueError:
                 raise ValueError("Text you entered is not an integer :/")
-            for tsk in self.tasks:
-                if tsk.id == usr_input:
-                    selected_task = tsk
-                    clear_console()
-                    return ActionResult(ActionResultTypeEnum.SHOW_NEXT, TaskConsoleWindow(selected_task))
-            else:
-                print(TaskNotFoundException("You entered wrong task id, please try again"))
+            selected_task = self.tasks.get(usr_input)
+            if selected_task is not None:
+                clear_console()
+                return ActionResult(ActionResultTypeEnum.SHOW_NEXT, TaskConsoleWindow(selected_task))
+            print(TaskNotFoundException("You entered wrong task id, please try again"))
+
+    def print_page(self):
+        visible_tasks = self.settings.get_visible_tasks(self.tasks)
+        self.page = min(max(self.page, 1), self.settings.get_page_count(visible_tasks))
+        print(self.settings.get_tasks_page_msg(visible_tasks, self.page))
 
     def print_tasks(self):
         for task in self.tasks:
@@ -365,16 +523,65 @@ class MenuSettingsConsoleWindow(ConsoleWindowAbstract):
     def __init__(self, settings: MenuSettings):
         super().__init__(
             {1: 'add filter', 2: 'remove filter', 3: 'change sort', 4: 'change sort direction',
-             5: 'add task print data', 6: 'remove task print data'},
-            {1: self.not_implemented, 2: self.not_implemented, 3: self.not_implemented, 4: self.not_implemented,
-             5: self.add_print_data, 6: self.remove_print_data}
+             5: 'add task print data', 6: 'remove task print data', 7: 'change page size'},
+            {1: self.add_filter_data, 2: self.remove_filter_data, 3: self.change_sort_data,
+             4: self.change_sort_direction, 5: self.add_print_data, 6: self.remove_print_data,
+             7: self.change_page_size}
         )
         self.settings = settings
 
-    def not_implemented(self) -> ActionResult:
-        print('Not implemented')
+    def add_filter_data(self) -> ActionResult:
+        print('Data allowed to filter by: ' + str(self.settings.task_filter_allowed))
+        print('Current filters: ' + str(self.get_filter_msgs()))
+        print("Examples: 'state=InProgress', 'priority=UrgentImportant', 'deadlineDate<2025-06-01', 'name^=Ja'")
+        usr_filter = input("Enter filter ( enter '0' to back ): ")
+        if usr_filter == '0':
+            return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+        try:
+            self.settings.add_filter(usr_filter)
+        except WrongSettingException as e:
+            print("I hate writing this, enter proper data again [" + str(e) + ']')
         return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
 
+    def remove_filter_data(self) -> ActionResult:
+        print('Current filters: ' + str(self.get_filter_msgs()))
+        usr_filter = input("Enter filter or field name to be removed ( one from above, enter '0' to back ): ")
+        if usr_filter == '0':
+            return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+        try:
+            self.settings.remove_filter(usr_filter)
+        except WrongSettingException as e:
+            print("I hate writing this, enter proper data again [" + str(e) + ']')
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def change_sort_data(self) -> ActionResult:
+        print('Data allowed to sort by: ' + str(self.settings.task_sort_allowed))
+        print('Currently sorted by: ' + self.settings.task_sort)
+        usr_sort = input("Enter data to sort by ( one from above, enter '0' to back ): ")
+        if usr_sort == '0':
+            return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+        try:
+            self.settings.change_sort(usr_sort)
+        except WrongSettingException as e:
+            print("I hate writing this, enter proper data again [" + str(e) + ']')
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def change_sort_direction(self) -> ActionResult:
+        self.settings.change_sort_direction()
+        print('Sorting ' + ('ascending' if self.settings.sort_ascending else 'descending'))
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def change_page_size(self) -> ActionResult:
+        print('Tasks per page: ' + str(self.settings.page_size))
+        try:
+            self.settings.change_page_size(int(input("Enter number of tasks per page: ")))
+        except (ValueError, WrongSettingException) as e:
+            print("I hate writing this, enter proper data again [" + str(e) + ']')
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def get_filter_msgs(self) -> list[str]:
+        return [condition[2] for conditions in self.settings.task_filter.values() for condition in conditions]
+
     def add_print_data(self) -> ActionResult:
         print('Data allowed to print: ' + str(self.settings.task_print_allowed))
         print('Currently turned on: ' + str(self.settings.task_print))
@@ -403,8 +610,9 @@ class TaskConsoleWindow(ConsoleWindowAbstract):
     def __init__(self, task: Task):
         super().__init__(
             {1: "start task", 2: "terminate task", 3: "edit command",
-             4: "edit description"},
-            {1: self.start_task, 2: self.terminate_task, 3: self.edit_command, 4: self.edit_description}
+             4: "edit description", 5: "show output", 6: "show runs", 7: "page through stored output"},
+            {1: self.start_task, 2: self.terminate_task, 3: self.edit_command, 4: self.edit_description,
+             5: self.show_output, 6: self.show_runs, 7: self.page_output}
         )
         self.selected_task = task
 
@@ -428,70 +636,157 @@ class TaskConsoleWindow(ConsoleWindowAbstract):
         self.selected_task.change_description(new_description)
         return ActionResult(ActionResultTypeEnum.SHOW_PREVIOUS, None)
 
+    def show_output(self) -> ActionResult:
+        # Buffer is filled by the worker while the command runs, so this shows live output too
+        output = self.selected_task.commandOutput
+        if output is None:
+            print(DataNotAvailableException("Task has not produced any output yet"))
+        else:
+            print(f"Task '{self.selected_task.name}' ({self.selected_task.state}), {output.get_summary_msg()}:")
+            print(output.get_text())
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def show_runs(self) -> ActionResult:
+        runs = list(self.selected_task.commandRuns)
+        if not runs:
+            print(DataNotAvailableException("Task command has not finished yet"))
+        for number, run in enumerate(runs, 1):
+            print(f"{number}) {run.get_msg()}")
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def page_output(self) -> ActionResult:
+        segment = self.select_output_segment()
+        if segment is None:
+            return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+        page = 1
+        while True:
+            # Page count is read every time, output of a running command keeps growing
+            page_count = segment.get_page_count(OUTPUT_PAGE_SIZE)
+            page = min(max(page, 1), page_count)
+            print(segment.read_page(page, OUTPUT_PAGE_SIZE))
+            print(f"Page {page}/{page_count} ( {segment.get_summary_msg()} )")
+            usr_text = input("Enter 'n' / 'p' to change page, page number to jump to it, '0' to go back: ").strip()
+            if usr_text == 'n' or usr_text == 'p' or usr_text == '':
+                page += -1 if usr_text == 'p' else 1
+                continue
+            try:
+                usr_input = int(usr_text)
+            except ValueError:
+                raise ValueError("Text you entered is not an integer :/")
+            if usr_input == 0:
+                return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+            page = usr_input
+
+    def select_output_segment(self) -> TaskOutputSegment | None:
+        output = self.selected_task.commandOutput
+        if self.selected_task.state is TaskState.IN_PROGRESS and output is not None and output.segment is not None:
+            return output.segment
+        runs = [(number, run) for number, run in enumerate(self.selected_task.commandRuns, 1) if run.output_path]
+        if not runs:
+            print(DataNotAvailableException("Task has no stored output, start it with the output store enabled"))
+            return None
+        for number, run in runs:
+            print(f"{number}) {run.get_msg()}")
+        usr_text = input("Enter run number ( empty for the latest one, '0' to go back ): ").strip()
+        if usr_text == '0':
+            return None
+        run = runs[-1][1]
+        if usr_text:
+            try:
+                run = dict(runs)[int(usr_text)]
+            except (ValueError, KeyError):
+                print(DataNotAvailableException(f"Run '{usr_text}' has no stored output"))
+                return None
+        try:
+            return TaskOutputSegment.open(run.output_path)
+        except OSError as e:
+            print(DataNotAvailableException(f"Stored output is gone, it may have been pruned: {e}"))
+            return None
+        except (ValueError, KeyError) as e:
+            print(DataNotAvailableException(f"Index of stored output is damaged: {e}"))
+            return None
 
-class StatisticsConsoleWindow(ConsoleWindowAbstract):
-    __slots__ = ['tasks']
-    tasks: list[Task]
 
-    def __init__(self, tasks: list[Task]):
+class StatisticsConsoleWindow(ConsoleWindowAbstract):
+    __slots__ = ['tasks', 'task_table', 'task_statistics', 'chart_renderer']
+    tasks: TaskRegistry
+    task_table: TaskTable
+    task_statistics: TaskStatistics
+    chart_renderer: TaskChartRenderer | None
+
+    def __init__(self, tasks: TaskRegistry, task_table: TaskTable, task_statistics: TaskStatistics,
+                 chart_renderer: TaskChartRenderer | None = None):
         super().__init__(
-            {1: 'generate category chart', 2: 'generate priority chart', 3: 'generate avg completion time chart'},
-            {1: self.gen_category_chart, 2: self.gen_priority_chart, 3: self.gen_avg_complete_time_chart}
+            {1: 'generate category chart', 2: 'generate priority chart', 3: 'generate avg completion time chart',
+             4: 'show summary', 5: 'show completion time percentiles', 6: 'show resource usage by command'},
+            {1: self.gen_category_chart, 2: self.gen_priority_chart, 3: self.gen_avg_complete_time_chart,
+             4: self.show_summary, 5: self.show_latency_report, 6: self.show_resource_usage}
         )
         self.tasks = tasks
+        self.task_table = task_table
+        self.task_statistics = task_statistics
+        self.chart_renderer = chart_renderer
+
+    def show_summary(self) -> ActionResult:
+        print(self.task_statistics.get_summary_msg())
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def show_latency_report(self) -> ActionResult:
+        print(self.task_statistics.get_latency_report_msg())
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def show_resource_usage(self) -> ActionResult:
+        usage_msg = self.task_statistics.get_resource_usage_msg()
+        if usage_msg:
+            print(usage_msg)
+        else:
+            print(DataNotAvailableException("No task command has finished yet"))
+        print(TaskResultCache.get_status_msg())
+        return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
+
+    def show_chart(self, chart: ChartData):
+        # Without a renderer chart opens in a matplotlib window, with one it's saved to file in the background
+        if self.chart_renderer is None:
+            show_chart(chart)
+            return
+        file_path, up_to_date = self.chart_renderer.request(chart)
+        if up_to_date:
+            print(f"Chart is up to date: {file_path}")
+        else:
+            print(f"Chart will be saved to: {file_path}")
 
     def gen_category_chart(self) -> ActionResult:
         if self.tasks:
-            cat_count_dict = self.count_categories()
-            plt.bar(cat_count_dict.keys(), cat_count_dict.values())
-            plt.xlabel('category')
-            plt.ylabel('count')
-            plt.title('Tasks grouped by category')
-            plt.show()
+            self.show_chart(ChartData('categories', self.count_categories(), 'category', 'count',
+                                      'Tasks grouped by category'))
         return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
 
     def count_categories(self) -> dict[str, int]:
-        res = defaultdict(int)
-        for tsk in self.tasks:
-            res[str(tsk.category)] += 1
-        return res
+        return self.task_statistics.get_category_counts()
 
     def gen_priority_chart(self) -> ActionResult:
         if self.tasks:
-            cat_count_dict = self.count_priorities()
-            plt.bar(cat_count_dict.keys(), cat_count_dict.values())
-            plt.xlabel('priority')
-            plt.ylabel('count')
-            plt.title('Tasks grouped by priority')
-            plt.show()
+            self.show_chart(ChartData('priorities', self.count_priorities(), 'priority', 'count',
+                                      'Tasks grouped by priority'))
         return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
 
     def count_priorities(self) -> dict[str, int]:
-        res = defaultdict(int)
-        for tsk in self.tasks:
-            res[str(tsk.priority)] += 1
-        return res
+        return self.task_statistics.get_priority_counts()
 
     def gen_avg_complete_time_chart(self) -> ActionResult:
         if self.tasks:
             cat_count_dict = self.calc_complete_times()
             if cat_count_dict:
-                plt.bar(cat_count_dict.keys(), cat_count_dict.values())
-                plt.xlabel('task id | task name')
-                plt.ylabel('completion time ( seconds )')
-                plt.title('Time to complete task')
-                plt.show()
+                self.show_chart(ChartData('complete_times', cat_count_dict, 'task id | task name',
+                                          'completion time ( seconds )', 'Time to complete task'))
             else:
                 print(DataNotAvailableException("There's 0 tasks that finished / terminated"))
 
         return ActionResult(ActionResultTypeEnum.SHOW_CURRENT, None)
 
-    def calc_complete_times(self) -> dict[str, int]:
-        res = defaultdict(int)
-        for tsk in self.tasks:
-            if tsk.state == TaskState.FINISHED or tsk.state == TaskState.TERMINATED:
-                res[str(tsk.id) + ' | ' + tsk.name] += (tsk.finishDate - tsk.beginDate).total_seconds()
-        return res
+    def calc_complete_times(self) -> dict[str, float]:
+        self.task_table.sync()
+        return self.task_table.calc_complete_times()
 
 
 class DataNotAvailableException(Exception):
@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+
+CHART_FILE_FORMATS = ('png', 'svg')
+# How long quitting waits for charts that are still being rendered
+DEFAULT_CHART_WAIT_PERIOD = 10.0
+
+_pyplot = None
+
+
+def get_pyplot():
+    # matplotlib takes long to import, so it's loaded when the first chart is shown, not at startup
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib.pyplot as plt
+        _pyplot = plt
+    return _pyplot
+
+
+class ChartData:
+    __slots__ = ['name', 'values', 'xlabel', 'ylabel', 'title']
+    name: str
+    values: dict[str, float]
+    xlabel: str
+    ylabel: str
+    title: str
+
+    def __init__(self, name: str, values: dict[str, float], xlabel: str, ylabel: str, title: str):
+        self.name = name
+        self.values = dict(values)  # own copy, chart may be drawn on another thread
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.title = title
+
+    def __eq__(self, other):
+        return (isinstance(other, ChartData) and self.name == other.name and self.values == other.values
+                and self.xlabel == other.xlabel and self.ylabel == other.ylabel and self.title == other.title)
+
+    def draw(self, axes):
+        axes.bar(list(self.values.keys()), list(self.values.values()))
+        axes.set_xlabel(self.xlabel)
+        axes.set_ylabel(self.ylabel)
+        axes.set_title(self.title)
+
+
+def show_chart(chart: ChartData):
+    """
+    Shows chart in a matplotlib window, blocks until the window is closed
+    """
+    plt = get_pyplot()
+    figure, axes = plt.subplots()
+    chart.draw(axes)
+    plt.show()
+    plt.close(figure)
+
+
+class TaskChartRenderer:
+    """
+    Headless chart rendering. Charts are drawn with the Agg backend to files on a background thread,
+    so the menu never waits for them. File of a chart is redrawn only when its data changed
+    """
+    __slots__ = ['output_dir_path', 'file_format', 'jobs', 'worker', 'rendered', 'lock']
+    output_dir_path: str
+    file_format: str
+    jobs: queue.Queue
+    worker: threading.Thread | None
+    rendered: dict[str, ChartData]
+    lock: threading.Lock
+
+    def __init__(self, output_dir_path: str, file_format: str = 'png'):
+        if file_format not in CHART_FILE_FORMATS:
+            raise ValueError(f"Charts can be saved only as {CHART_FILE_FORMATS}")
+        self.output_dir_path = output_dir_path
+        self.file_format = file_format
+        self.jobs = queue.Queue()
+        self.worker = None
+        self.rendered = {}
+        self.lock = threading.Lock()
+
+    def get_chart_file_path(self, chart_name: str) -> str:
+        return os.path.join(self.output_dir_path, chart_name + '.' + self.file_format)
+
+    def request(self, chart: ChartData) -> tuple[str, bool]:
+        """
+        Schedules rendering of the chart, unless the same data is already rendered
+
+        :return: chart file path and whether the file is already up to date
+        """
+        file_path = self.get_chart_file_path(chart.name)
+        with self.lock:
+            if self.rendered.get(chart.name) == chart and os.path.exists(file_path):
+                return file_path, True
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.__render_charts, name="TaskChartRenderer", daemon=True)
+                self.worker.start()
+        self.jobs.put(chart)
+        return file_path, False
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until every requested chart is rendered, worker is a daemon thread, so charts it hasn't saved
+        when the program exits are lost
+
+        :return: False when timeout passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.jobs.all_tasks_done:
+            while self.jobs.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.jobs.all_tasks_done.wait(remaining)
+        return True
+
+    def __render_charts(self):
+        # pyplot is not used here, figures drawn straight on Agg canvas are safe outside the main thread
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        if not os.path.exists(self.output_dir_path):
+            os.makedirs(self.output_dir_path)
+        while True:
+            chart = self.jobs.get()
+            try:
+                with self.lock:
+                    up_to_date = self.rendered.get(chart.name) == chart
+                if not up_to_date:
+                    figure = Figure()
+                    FigureCanvasAgg(figure)
+                    chart.draw(figure.subplots())
+                    file_path = self.get_chart_file_path(chart.name)
+                    tmp_file_path = file_path + '.tmp'
+                    figure.savefig(tmp_file_path, format=self.file_format)
+                    os.replace(tmp_file_path, file_path)
+                    with self.lock:
+                        self.rendered[chart.name] = chart
+            except Exception as e:
+                print(f"Failed to render chart '{chart.name}': {e}")
+            finally:
+                self.jobs.task_done()
@@ -0,0 +1,209 @@
+from _datetime import datetime
+from src.task.Task import Task, TaskState
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskRun import get_size_msg
+from src.task.TaskScheduler import TaskScheduler
+from src.task.TaskShutdown import TaskShutdown, DEFAULT_SHUTDOWN_GRACE_PERIOD
+from typing import TextIO
+import os
+import queue
+import select
+import shutil
+import sys
+import threading
+
+try:
+    import termios
+    import tty
+except ImportError:
+    termios = None  # not on Windows, dashboard prints a single snapshot there
+
+DEFAULT_REFRESH_INTERVAL = 0.5
+DONE_ROW_COUNT = 10
+DASHBOARD_HELP = "Type a command and press Enter: 's <id>' start task, 't <id>' terminate task, 'q' back to menu"
+
+
+def is_interactive_terminal() -> bool:
+    return termios is not None and sys.stdin.isatty() and sys.stdout.isatty()
+
+
+def get_elapsed_msg(task: Task, now: datetime) -> str:
+    if task.beginDate is None or task.state is TaskState.QUEUED:
+        return '-'
+    end = task.finishDate if task.finishDate is not None and task.state is not TaskState.IN_PROGRESS else now
+    return f"{(end - task.beginDate).total_seconds():.1f}s"
+
+
+class DashboardScreen:
+    """
+    Draws whole screens of lines with ANSI escape codes, but rewrites only the rows that differ from the last screen
+    """
+    __slots__ = ['output', 'lines']
+    output: TextIO
+    lines: list[str]
+
+    def __init__(self, output: TextIO):
+        self.output = output
+        self.lines = []
+
+    def enter(self):
+        # Alternate screen keeps the menu above intact, it's back once the dashboard is left
+        self.output.write('\x1b[?1049h\x1b[?25l\x1b[2J')
+        self.lines = []
+
+    def leave(self):
+        self.output.write('\x1b[?25h\x1b[?1049l')
+        self.output.flush()
+
+    def draw(self, lines: list[str]) -> int:
+        """
+        :return: number of rewritten rows
+        """
+        width = shutil.get_terminal_size().columns
+        lines = [line[:width] for line in lines]
+        parts = []
+        for row, line in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != line:
+                parts.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+        if len(lines) < len(self.lines):
+            parts.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+        self.lines = lines
+        if parts:
+            self.output.write(''.join(parts))
+            self.output.flush()
+        return len(parts)
+
+
+class TaskDashboard:
+    """
+    Live view of queued and running tasks with their elapsed time and output so far, refreshed on a timer.
+    Keys are read without blocking in between, so commands can be typed while it refreshes.
+    Tasks that stopped running while the dashboard is open stay at the bottom with their final state.
+    Commands report through a queue of messages instead of print, the newest one is shown under the tasks
+    """
+    __slots__ = ['tasks', 'refresh_interval', 'screen', 'command', 'message', 'messages', 'seen', 'running']
+    tasks: TaskRegistry
+    refresh_interval: float
+    screen: DashboardScreen
+    command: str
+    message: str
+    messages: queue.SimpleQueue
+    seen: dict[int, Task]
+    running: bool
+
+    def __init__(self, tasks: TaskRegistry, refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.tasks = tasks
+        self.refresh_interval = refresh_interval
+        self.screen = DashboardScreen(sys.stdout)
+        self.command = ''
+        self.message = DASHBOARD_HELP
+        self.messages = queue.SimpleQueue()
+        self.seen = {}
+        self.running = False
+
+    def run(self):
+        """
+        Shows the dashboard until 'q' is entered. Without a terminal (e.g. scripted input) only prints it once
+        """
+        if not is_interactive_terminal():
+            print('\n'.join(self.get_task_lines()))
+            return
+        fd = sys.stdin.fileno()
+        terminal_attributes = termios.tcgetattr(fd)
+        self.screen.enter()
+        self.running = True
+        try:
+            tty.setcbreak(fd)
+            while self.running:
+                self.update_message()
+                self.screen.draw(self.get_lines())
+                ready, _, _ = select.select([fd], [], [], self.refresh_interval)
+                if ready:
+                    self.handle_input(os.read(fd, 1024).decode('utf-8', errors='ignore'))
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, terminal_attributes)
+            self.screen.leave()
+
+    def update_message(self):
+        # Messages are put from the UI thread and from threads stopping tasks, the newest one is shown
+        while True:
+            try:
+                self.message = self.messages.get_nowait()
+            except queue.Empty:
+                return
+
+    def get_lines(self) -> list[str]:
+        return self.get_task_lines() + ['', self.message, '> ' + self.command + '_']
+
+    def get_task_lines(self) -> list[str]:
+        now = datetime.now()
+        running = sorted(self.tasks.get_by_state(TaskState.IN_PROGRESS) + self.tasks.get_by_state(TaskState.QUEUED),
+                         key=lambda task: task.id)
+        for task in running:
+            self.seen[task.id] = task
+        running_ids = {task.id for task in running}
+        done = [task for task in self.seen.values() if task.id not in running_ids]
+        if len(done) > DONE_ROW_COUNT:
+            done.sort(key=lambda task: task.finishDate or now)
+            for task in done[:-DONE_ROW_COUNT]:
+                del self.seen[task.id]
+            done = done[-DONE_ROW_COUNT:]
+
+        lines = [f"Live dashboard {now.isoformat(sep=' ', timespec='seconds')}, {TaskScheduler.get_status_msg()}", '',
+                 f"{'Id':>6}  {'State':<11} {'Elapsed':>9} {'Output':>10}  Name"]
+        lines.extend(self.get_task_row(task, now) for task in running)
+        if not running:
+            lines.append("No task is running")
+        if done:
+            lines.append('')
+            lines.append("Stopped since the dashboard was opened:")
+            lines.extend(self.get_task_row(task, now) for task in done)
+        return lines
+
+    @staticmethod
+    def get_task_row(task: Task, now: datetime) -> str:
+        output_bytes = task.commandOutput.total_bytes if task.commandOutput is not None else 0
+        return (f"{task.id:>6}  {str(task.state):<11} {get_elapsed_msg(task, now):>9} "
+                f"{get_size_msg(output_bytes):>10}  {task.name}")
+
+    def handle_input(self, text: str):
+        for char in text:
+            if char == '\n' or char == '\r':
+                command = self.command.strip()
+                self.command = ''
+                if command:
+                    self.execute(command)
+            elif char == '\x7f' or char == '\b':
+                self.command = self.command[:-1]
+            elif char.isprintable():
+                self.command += char
+
+    def execute(self, command: str):
+        name, _, argument = command.partition(' ')
+        if name == 'q':
+            self.running = False
+            return
+        if name not in ('s', 't'):
+            self.messages.put(f"Unknown command '{command}'. {DASHBOARD_HELP}")
+            return
+        try:
+            task = self.tasks.get(int(argument))
+        except ValueError:
+            task = None
+        if task is None:
+            self.messages.put(f"No task with id '{argument.strip()}'")
+            return
+        if name == 's':
+            task.start_task(self.messages.put)
+            return
+        # Stopping waits up to the grace period, the screen keeps refreshing meanwhile
+        self.messages.put(f"Stopping task {task.id}...")
+        threading.Thread(target=self.stop_task, args=(task,), name="DashboardStop", daemon=True).start()
+
+    def stop_task(self, task: Task):
+        report = TaskShutdown.stop_tasks([task], "Terminated from dashboard", DEFAULT_SHUTDOWN_GRACE_PERIOD)
+        if report.cancelled or report.terminated or report.killed or report.unresponsive:
+            # Only the counts, names of killed tasks would go on lines of their own
+            self.messages.put(f"Task {task.id}: {report.get_summary_msg().splitlines()[0]}")
+        else:
+            self.messages.put(f"Task {task.id} is not running, nothing to stop")
@@ -0,0 +1,236 @@
+from _datetime import datetime
+from bisect import bisect_left, insort
+from enum import Enum
+from operator import attrgetter
+from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from src.task.TaskRegistry import TaskRegistry
+import re
+import threading
+
+_filter_pattern = re.compile(r'^\s*(\w+)\s*(>=|<=|\^=|=|>|<)\s*(.*?)\s*$')
+
+_filter_operators_allowed = {
+    'id': ['=', '>', '<', '>=', '<='],
+    'name': ['=', '^='],
+    'state': ['='],
+    'priority': ['='],
+    'category': ['='],
+    'deadlineDate': ['=', '>', '<', '>=', '<=']
+}
+
+_indexed_fields = ['state', 'priority', 'category']
+
+# Only narrow down by index when it leaves less than this part of all tasks, otherwise the sorted view is faster
+INDEX_NARROWING_RATIO = 8
+
+_filter_condition_type = tuple[str, object, str]  # operator, value, text entered by user
+
+
+def parse_enum(enum_cls: type[Enum], raw_value: str) -> Enum:
+    # Accepts label ('InProgress'), member name ('IN_PROGRESS') or order ('2')
+    for member in enum_cls:
+        if raw_value.lower() in (member.label.lower(), member.name.lower(), str(member.order)):
+            return member
+    raise FilterParseException(f"'{raw_value}' is not one of {[member.label for member in enum_cls]}")
+
+
+def parse_filter_value(field_name: str, raw_value: str):
+    try:
+        match field_name:
+            case 'id':
+                return int(raw_value)
+            case 'name':
+                return raw_value
+            case 'state':
+                return parse_enum(TaskState, raw_value)
+            case 'priority':
+                return parse_enum(TaskPriority, raw_value)
+            case 'category':
+                return parse_enum(TaskCategory, raw_value)
+            case 'deadlineDate':
+                return datetime.fromisoformat(raw_value)
+            case _d:
+                raise FilterParseException(f"Can't filter by '{field_name}'")
+    except ValueError as e:
+        raise FilterParseException(f"Wrong value for '{field_name}': {e}")
+
+
+def parse_filter(flt: str) -> tuple[str, _filter_condition_type]:
+    """
+    Parses filter entered by user, e.g. 'state=InProgress', 'deadlineDate<2025-06-01', 'name^=Ja'
+
+    :return: filtered field name and condition
+    """
+    match = _filter_pattern.match(flt)
+    if match is None:
+        raise FilterParseException(f"'{flt}' is not a filter, expected <field><operator><value>")
+    field_name, operator, raw_value = match.groups()
+    if field_name not in _filter_operators_allowed:
+        raise FilterParseException(f"Can't filter by '{field_name}'")
+    if operator not in _filter_operators_allowed[field_name]:
+        raise FilterParseException(f"Operator '{operator}' can't be used with '{field_name}'")
+    return field_name, (operator, parse_filter_value(field_name, raw_value), flt.strip())
+
+
+def matches_condition(value, operator: str, expected) -> bool:
+    if value is None:
+        return False
+    match operator:
+        case '=':
+            return value == expected
+        case '^=':
+            return value.startswith(expected)
+        case '>':
+            return value > expected
+        case '<':
+            return value < expected
+        case '>=':
+            return value >= expected
+        case '<=':
+            return value <= expected
+        case _d:
+            return False
+
+
+def matches_filter(task: Task, task_filter: dict[str, list[_filter_condition_type]]) -> bool:
+    for field_name, conditions in task_filter.items():
+        value = getattr(task, field_name)
+        for operator, expected, _ in conditions:
+            if not matches_condition(value, operator, expected):
+                return False
+    return True
+
+
+def get_sort_value(value) -> tuple:
+    # Missing values go last, enums sort by their order
+    if value is None:
+        return 1, 0
+    if isinstance(value, Enum):
+        return 0, value.order
+    if isinstance(value, datetime):
+        return 0, value.timestamp()
+    return 0, value
+
+
+class SortedTaskView:
+    """
+    Ids of all tasks kept sorted by one field. Changed task is moved with bisect instead of sorting everything again
+    """
+    __slots__ = ['field_getter', 'keys', 'task_keys']
+    field_getter: attrgetter
+    keys: list[tuple]
+    task_keys: dict[int, tuple]
+
+    def __init__(self, field_name: str, tasks: list[Task]):
+        self.field_getter = attrgetter(field_name)
+        self.task_keys = {task.id: self.get_key(task) for task in tasks}
+        self.keys = sorted(self.task_keys.values())
+
+    def get_key(self, task: Task) -> tuple:
+        return get_sort_value(self.field_getter(task)), task.id
+
+    def add(self, task: Task):
+        key = self.get_key(task)
+        self.task_keys[task.id] = key
+        insort(self.keys, key)
+
+    def remove(self, task: Task):
+        key = self.task_keys.pop(task.id, None)
+        if key is not None:
+            del self.keys[bisect_left(self.keys, key)]
+
+    def update(self, task: Task):
+        if self.task_keys.get(task.id) != self.get_key(task):
+            self.remove(task)
+            self.add(task)
+
+    def get_ids(self, ascending: bool) -> list[int]:
+        ids = [key[-1] for key in self.keys]
+        if not ascending:
+            ids.reverse()
+        return ids
+
+
+class TaskQueryEngine:
+    """
+    Applies MenuSettings filter and sort to tasks of a registry.
+    Sorted views are built once per sort field and then kept up to date from registry events,
+    last result is reused until a task or the query changes
+    """
+    __slots__ = ['registry', 'views', 'last_query', 'last_result', 'lock']
+    registry: TaskRegistry
+    views: dict[str, SortedTaskView]
+    last_query: tuple | None
+    last_result: list[Task]
+    lock: threading.Lock
+
+    def __init__(self, registry: TaskRegistry):
+        self.registry = registry
+        self.views = {}
+        self.last_query = None
+        self.last_result = []
+        self.lock = threading.Lock()
+        registry.add_listener(self._on_registry_event)
+
+    def query(self, task_filter: dict[str, list[_filter_condition_type]], sort_field: str,
+              ascending: bool) -> list[Task]:
+        filter_signature = tuple((field_name, tuple(text for _, _, text in conditions))
+                                 for field_name, conditions in task_filter.items())
+        # Registry lock first, same order as in registry events, so no task changes in the middle of a query
+        with self.registry.lock, self.lock:
+            query = (self.registry.version, filter_signature, sort_field, ascending)
+            if query == self.last_query:
+                return self.last_result
+            view = self.views.get(sort_field)
+            if view is None:
+                view = SortedTaskView(sort_field, list(self.registry))
+                self.views[sort_field] = view
+            candidates = self.__get_index_candidates(task_filter)
+            if candidates is not None:
+                ids = sorted(candidates, key=view.task_keys.__getitem__, reverse=not ascending)
+            else:
+                ids = view.get_ids(ascending)
+            result = []
+            for task_id in ids:
+                task = self.registry.get(task_id)
+                if matches_filter(task, task_filter):
+                    result.append(task)
+            self.last_query = query
+            self.last_result = result
+            return result
+
+    def __get_index_candidates(self, task_filter: dict[str, list[_filter_condition_type]]) -> list[int] | None:
+        # Smallest registry group matching an equality filter, None if there's no group worth using
+        candidates = None
+        for field_name in _indexed_fields:
+            for operator, expected, _ in task_filter.get(field_name, []):
+                if operator != '=':
+                    continue
+                match field_name:
+                    case 'state':
+                        group = self.registry.get_by_state(expected)
+                    case 'priority':
+                        group = self.registry.get_by_priority(expected)
+                    case _d:
+                        group = self.registry.get_by_category(expected)
+                if candidates is None or len(group) < len(candidates):
+                    candidates = group
+        if candidates is None or len(candidates) * INDEX_NARROWING_RATIO > len(self.registry):
+            return None
+        return [task.id for task in candidates]
+
+    def _on_registry_event(self, event: str, task: Task):
+        with self.lock:
+            for view in self.views.values():
+                match event:
+                    case 'add':
+                        view.add(task)
+                    case 'remove':
+                        view.remove(task)
+                    case 'change':
+                        view.update(task)
+
+
+class FilterParseException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
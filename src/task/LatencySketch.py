@@ -0,0 +1,160 @@
+import math
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Durations below this are counted as zero, log of them would need thousands of buckets for nothing
+MIN_TRACKED_DURATION = 1e-3
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class LatencySketch:
+    """
+    Streaming sketch of durations with log-spaced buckets, every value is known within relative_accuracy.
+    Memory depends on the range of durations, not on their number, and two sketches with the same accuracy
+    are merged by adding their bucket counts, so sketches of groups can be combined into a sketch of all of them.
+    Values can also be taken back, which is needed when a completed task is started again or removed
+    """
+    __slots__ = ['relative_accuracy', 'gamma', 'log_gamma', 'buckets', 'zero_count', 'count', 'total', 'min',
+                 'max']
+    relative_accuracy: float
+    gamma: float
+    log_gamma: float
+    buckets: dict[int, int]
+    zero_count: int
+    count: int
+    total: float
+    min: float | None
+    max: float | None
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, duration: float):
+        if duration < MIN_TRACKED_DURATION:
+            self.zero_count += 1
+        else:
+            index = self.__get_bucket_index(duration)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    def remove(self, duration: float):
+        if duration < MIN_TRACKED_DURATION:
+            if not self.zero_count:
+                return
+            self.zero_count -= 1
+        else:
+            index = self.__get_bucket_index(duration)
+            bucket_count = self.buckets.get(index)
+            if not bucket_count:
+                return
+            if bucket_count == 1:
+                del self.buckets[index]
+            else:
+                self.buckets[index] = bucket_count - 1
+        self.count -= 1
+        self.total -= duration
+        if duration == self.min or duration == self.max:
+            # Exact extreme is gone, the nearest remaining bucket is the best estimate left
+            self.__estimate_min_max()
+
+    def merge(self, other: 'LatencySketch'):
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for index, bucket_count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def get_percentile(self, percentile: float) -> float | None:
+        if not self.count:
+            return None
+        rank = percentile / 100 * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return min(max(self.__get_bucket_value(index), self.min), self.max)
+        return self.max
+
+    def get_avg(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def get_histogram(self, base: float = 2.0) -> list[tuple[float, float, int]]:
+        """
+        Counts regrouped into coarser buckets growing base times, e.g. [0.5s, 1s), [1s, 2s), [2s, 4s) for base 2
+
+        :return: (lower bound, upper bound, count) of every non-empty bucket, lower bound of the first one may be 0.
+            Buckets don't overlap, the lowest coarse bucket starts at MIN_TRACKED_DURATION where the zero one ends
+        """
+        histogram = {}
+        for index, bucket_count in self.buckets.items():
+            coarse_index = math.floor(math.log(self.__get_bucket_value(index), base))
+            histogram[coarse_index] = histogram.get(coarse_index, 0) + bucket_count
+        result = [(max(base ** index, MIN_TRACKED_DURATION), base ** (index + 1), histogram[index])
+                  for index in sorted(histogram)]
+        if self.zero_count:
+            result.insert(0, (0.0, MIN_TRACKED_DURATION, self.zero_count))
+        return result
+
+    def get_summary(self, percentiles: tuple[float, ...] = DEFAULT_PERCENTILES) -> dict:
+        """
+        :return: count, min, max, avg, requested percentiles and histogram, ready to be dumped to JSON
+        """
+        summary = {'count': self.count, 'min': self.min, 'max': self.max, 'avg': self.get_avg()}
+        for percentile in percentiles:
+            summary['p' + str(percentile)] = self.get_percentile(percentile)
+        summary['histogram'] = [[low, high, bucket_count] for low, high, bucket_count in self.get_histogram()]
+        return summary
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __get_bucket_index(self, duration: float) -> int:
+        return math.ceil(math.log(duration) / self.log_gamma)
+
+    def __get_bucket_value(self, index: int) -> float:
+        # Middle of the bucket (gamma^(i-1), gamma^i] with the same relative error to both ends
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def __estimate_min_max(self):
+        if not self.count:
+            self.min = None
+            self.max = None
+        elif not self.buckets:
+            self.min = 0.0
+            self.max = 0.0
+        else:
+            self.min = 0.0 if self.zero_count else self.__get_bucket_value(min(self.buckets))
+            self.max = self.__get_bucket_value(max(self.buckets))
+
+
+def get_histogram_msg(histogram: list[tuple[float, float, int]], width: int = 40) -> str:
+    if not histogram:
+        return ''
+    most = max(bucket_count for _, _, bucket_count in histogram)
+    lines = []
+    for low, high, bucket_count in histogram:
+        bar = '#' * max(1, round(bucket_count / most * width))
+        lines.append(f"[{low:>10.3f}s, {high:>10.3f}s) {bar} {bucket_count}")
+    return '\n'.join(lines)
@@ -0,0 +1,135 @@
+from _datetime import datetime
+from pathlib import Path
+from src.instrumentation import Instrumentation
+import os
+import queue
+import threading
+import time
+
+DEFAULT_FLUSH_SIZE = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+def log_id_gen():
+    curr = 1
+    while True:
+        yield curr
+        curr += 1
+
+
+def get_log_dir_file_path():
+    logger_cls_path = Path(__file__).resolve()
+    return os.path.join(str(logger_cls_path.parent.parent.parent), 'logs')
+
+
+def get_log_file_name() -> str:
+    return 'logs' + str(datetime.now().isoformat().replace(':', '-')) + '.txt'
+
+
+def setup_log_file_path(dir_path: str | None = None):
+    # https://stackoverflow.com/questions/273192/how-do-i-create-a-directory-and-any-missing-parent-directories
+    if dir_path is None:
+        dir_path = get_log_dir_file_path()
+    # Path(dir_path).mkdir(parents=True, exist_ok=True)
+    if not os.path.exists(dir_path):
+        os.makedirs(dir_path)
+    return os.path.join(dir_path, get_log_file_name())
+
+
+class Logger:
+    """
+    Callers only put records into a queue, a single background writer thread numbers them, batches them into
+    one open file and flushes when enough data piled up or enough time passed.
+    When the file grows over max_file_size, writer continues in a new file
+    """
+    _id_generator = log_id_gen()
+    _queue: queue.SimpleQueue = queue.SimpleQueue()
+    _writer_lock = threading.Lock()
+    _writer: threading.Thread | None = None
+    _log_file_path: str | None = None
+    _flush_size: int = DEFAULT_FLUSH_SIZE
+    _flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    _max_file_size: int = DEFAULT_MAX_FILE_SIZE
+    _log_dir_path: str | None = None
+    _stop_record = None
+
+    @classmethod
+    def configure(cls, flush_size: int, flush_interval: float, max_file_size: int, log_dir_path: str | None = None):
+        """
+        :param log_dir_path: directory of log files, 'logs' in project root when not given.
+            Takes effect with the next log file
+        """
+        cls._flush_size = flush_size
+        cls._flush_interval = flush_interval
+        cls._max_file_size = max_file_size
+        cls._log_dir_path = log_dir_path
+
+    @classmethod
+    def log(cls, log_msg: str):
+        with Instrumentation.timer('logger.log'):
+            # Checked and put under the lock, a record never lands behind the stop record of a writer shutting down
+            with cls._writer_lock:
+                if cls._writer is None:
+                    cls._writer = threading.Thread(target=cls.__write_records, name="LoggerWriter", daemon=True)
+                    cls._writer.start()
+                cls._queue.put((datetime.now(), log_msg))
+
+    @classmethod
+    def get_log_file_path(cls) -> str | None:
+        return cls._log_file_path
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Writes everything that is still queued and stops the writer. Logging afterwards starts a new writer
+        """
+        with cls._writer_lock:
+            writer = cls._writer
+            if writer is None:
+                return
+            cls._queue.put(cls._stop_record)
+            writer.join()
+            cls._writer = None
+
+    @classmethod
+    def __write_records(cls):
+        if cls._log_file_path is None:
+            cls._log_file_path = setup_log_file_path(cls._log_dir_path)
+        file = open(cls._log_file_path, 'a', encoding='utf-8')
+        pending = []
+        pending_size = 0
+        flush_deadline = time.monotonic() + cls._flush_interval
+        try:
+            while True:
+                try:
+                    record = cls._queue.get(timeout=max(flush_deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    record = None
+                else:
+                    if record is cls._stop_record:
+                        break
+                    log_date, log_msg = record
+                    entry = "Log: " + str(next(cls._id_generator)) + " " + str(log_date) + "\n" + log_msg + "\n\n"
+                    pending.append(entry)
+                    pending_size += len(entry)
+                if pending_size >= cls._flush_size or time.monotonic() >= flush_deadline:
+                    file = cls.__flush(file, pending)
+                    pending = []
+                    pending_size = 0
+                    flush_deadline = time.monotonic() + cls._flush_interval
+        finally:
+            # Last flush may rotate too, the file it returns is the one left open
+            file = cls.__flush(file, pending)
+            file.close()
+
+    @classmethod
+    def __flush(cls, file, pending: list[str]):
+        if pending:
+            file.write(''.join(pending))
+            file.flush()
+        if file.tell() >= cls._max_file_size:
+            file.close()
+            cls._log_file_path = setup_log_file_path(cls._log_dir_path)
+            file = open(cls._log_file_path, 'a', encoding='utf-8')
+        return file
@@ -3,65 +3,29 @@ from src.task.TaskCategory import TaskCategory
 from src.task.TaskPriority import TaskPriority
 from src.task.TaskState import TaskState
 from src.task.TaskValidator import TaskValidator
+from src.task.TaskScheduler import TaskScheduler
+from src.task.TaskWatchdog import TaskWatchdog
+from src.task.TaskOutput import TaskOutputBuffer, READ_CHUNK_SIZE
+from src.task.TaskRun import TaskRun, wait_process
+from src.task.TaskResultCache import TaskResultCache, ResultCachePolicy
+from src.task.Logger import Logger
+from src.instrumentation import Instrumentation
+from collections.abc import Callable
+import asyncio
+import itertools
 import subprocess
 import threading
-import os
-from pathlib import Path
+import time
 
-
-def task_id_gen():
-    curr = 1
-    while True:
-        yield curr
-        curr += 1
-
-
-def log_id_gen():
-    curr = 1
-    while True:
-        yield curr
-        curr += 1
-
-
-def get_log_dir_file_path():
-    logger_cls_path = Path(__file__).resolve()
-    return str(logger_cls_path.parent.parent.parent) + '\\logs'
-
-
-def get_log_file_name() -> str:
-    return 'logs' + str(datetime.now().isoformat().replace(':', '-')) + '.txt'
-
-
-def setup_log_file_path():
-    # https://stackoverflow.com/questions/273192/how-do-i-create-a-directory-and-any-missing-parent-directories
-    dir_path = get_log_dir_file_path()
-    # Path(dir_path).mkdir(parents=True, exist_ok=True)
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-    return dir_path + "\\" + get_log_file_name()
-
-
-class Logger:
-    _id_generator = log_id_gen()
-    _fileio_lock = threading.Lock()
-    _log_file_path = setup_log_file_path()
-
-    @classmethod
-    def log(cls, log_msg: str):
-        with cls._fileio_lock:
-            with open(cls._log_file_path, 'a') as file:
-                file.write("Log: " + str(next(cls._id_generator)) + " " + str(datetime.now()) + "\n")
-                file.write(log_msg + "\n\n")
-
-
-_id_generator = task_id_gen()
-_id_registry = set()
+# itertools.count can be shared between threads, a generator can't
+_id_generator = itertools.count(1)
 
 
 class Task:
-    __slots__ = ['id', 'name', 'state', 'priority', 'category', 'description', 'beginDate', 'finishDate',
-                 'deadlineDate',
-                 'command', 'commandThread', 'commandProcess']
+    __slots__ = ['id', 'name', '_state', '_priority', '_category', 'description', 'beginDate', 'finishDate',
+                 'deadlineDate', 'timeout', 'terminationReason', 'dependsOn', 'resultCache', 'resultCacheKey',
+                 'command', 'commandThread', 'commandProcess', 'commandFinished', 'commandOutput', 'commandRuns',
+                 'version', 'renderCache']
     id: int
     name: str
     state: TaskState
@@ -71,82 +35,344 @@ class Task:
     beginDate: datetime
     finishDate: datetime | None
     deadlineDate: datetime
+    timeout: float | None  # seconds the command may run before it's terminated, None runs it as long as it takes
+    terminationReason: str | None
+    dependsOn: list[str | int]  # names or ids of tasks that have to finish first, see TaskGraph
+    resultCache: ResultCachePolicy | None  # None always runs the command
+    resultCacheKey: str | None  # key the output of the current run is cached under
     command: str
     commandThread: threading.Thread | None
-    commandProcess: subprocess.Popen | None
+    commandProcess: subprocess.Popen | asyncio.subprocess.Process | None
+    commandFinished: threading.Event | None
+    commandOutput: TaskOutputBuffer | None
+    commandRuns: list[TaskRun]
+    version: int
+    renderCache: tuple | None
+
+    # Called with (task, field name, old value, new value) whenever task changes in a way visible to the user,
+    # field name is 'definition' when the whole definition was reloaded.
+    # Replaced instead of modified, so workers notifying listeners never see it change under them
+    _change_listeners: tuple[Callable[['Task', str, object, object], None], ...] = ()
+    _change_listeners_lock = threading.Lock()
 
     def __init__(self, name: str, state: TaskState, priority: TaskPriority, category: TaskCategory, description: str,
-                 begin_date: datetime | None, finish_date: datetime | None, deadline_date: datetime, command: str):
+                 begin_date: datetime | None, finish_date: datetime | None, deadline_date: datetime, command: str,
+                 timeout: float | None = None, depends_on: list[str | int] | None = None,
+                 result_cache: ResultCachePolicy | None = None):
         self.id = Task._get_available_id()
         self.name = name
-        self.state = state
-        self.priority = priority
-        self.category = category
+        self._state = state
+        self._priority = priority
+        self._category = category
         self.description = description
         self.beginDate = begin_date
         self.finishDate = finish_date
         self.deadlineDate = deadline_date
+        self.timeout = timeout
+        self.terminationReason = None
+        self.dependsOn = depends_on or []
+        self.resultCache = result_cache
+        self.resultCacheKey = None
         self.command = command
         self.commandThread = None
         self.commandProcess = None
+        self.commandFinished = None
+        self.commandOutput = None
+        self.commandRuns = []
+        self.version = 0
+        self.renderCache = None
 
     @classmethod
     def _get_available_id(cls):
-        while True:
-            test_id = next(_id_generator)
-            if not _id_registry.__contains__(test_id):
-                _id_registry.add(test_id)
-                break
-        return test_id
+        return next(_id_generator)
+
+    @classmethod
+    def add_change_listener(cls, listener: Callable[['Task', str, object, object], None]):
+        with cls._change_listeners_lock:
+            Task._change_listeners = (*Task._change_listeners, listener)
+
+    @classmethod
+    def remove_change_listener(cls, listener: Callable[['Task', str, object, object], None]):
+        with cls._change_listeners_lock:
+            listeners = list(Task._change_listeners)
+            listeners.remove(listener)
+            Task._change_listeners = tuple(listeners)
+
+    def _notify_change(self, field_name: str, old_value, new_value):
+        self.version += 1
+        for listener in Task._change_listeners:
+            listener(self, field_name, old_value, new_value)
+
+    @property
+    def state(self) -> TaskState:
+        return self._state
+
+    @state.setter
+    def state(self, new_state: TaskState):
+        old_state = self._state
+        self._state = new_state
+        if old_state is not new_state:
+            self._notify_change('state', old_state, new_state)
+
+    @property
+    def priority(self) -> TaskPriority:
+        return self._priority
+
+    @priority.setter
+    def priority(self, new_priority: TaskPriority):
+        old_priority = self._priority
+        self._priority = new_priority
+        if old_priority is not new_priority:
+            self._notify_change('priority', old_priority, new_priority)
+
+    @property
+    def category(self) -> TaskCategory:
+        return self._category
+
+    @category.setter
+    def category(self, new_category: TaskCategory):
+        old_category = self._category
+        self._category = new_category
+        if old_category is not new_category:
+            self._notify_change('category', old_category, new_category)
 
     @classmethod
     def create_task(cls, name: str, state: TaskState, priority: TaskPriority, category: TaskCategory, description: str,
-                    begin_date: datetime, finish_date: datetime, deadline_date: datetime, command: str):
+                    begin_date: datetime, finish_date: datetime, deadline_date: datetime, command: str,
+                    timeout: float | None = None, depends_on: list[str | int] | None = None,
+                    result_cache: ResultCachePolicy | None = None):
         return cls(name, state, priority, category, description, begin_date, finish_date, deadline_date,
-                   command)
+                   command, timeout, depends_on, result_cache)
 
     @classmethod
     def create_unfinished_task(cls, name: str, priority: TaskPriority, category: TaskCategory, description: str,
-                               deadline_date: datetime, command: str):
-        return cls(name, TaskState.TO_DO, priority, category, description, None, None, deadline_date, command)
-
-    def start_task(self):
-        TaskValidator.validate_start_task(self)
-
+                               deadline_date: datetime, command: str, timeout: float | None = None,
+                               depends_on: list[str | int] | None = None,
+                               result_cache: ResultCachePolicy | None = None):
+        return cls(name, TaskState.TO_DO, priority, category, description, None, None, deadline_date, command,
+                   timeout, depends_on, result_cache)
+
+    def start_task(self, report: Callable[[str], None] = print):
+        """
+        :param report: receives messages about the start instead of print, e.g. shown by the dashboard
+        """
+        with Instrumentation.timer('task.start'):
+            TaskValidator.validate_start_task(self, report)
+            if self.state is TaskState.QUEUED or self.state is TaskState.IN_PROGRESS:
+                return
+
+            self.terminationReason = None
+            self.resultCacheKey = None
+            if self.resultCache is not None and TaskResultCache.enabled():
+                self.resultCacheKey = TaskResultCache.get_key(self.command, self.resultCache)
+                if self.__finish_from_cache(report):
+                    return
+            self.state = TaskState.QUEUED
+            self.commandFinished = threading.Event()
+            report("Task: " + self.name + " queued")
+            TaskScheduler.submit(self)
+
+    def __finish_from_cache(self, report: Callable[[str], None]) -> bool:
+        # Cache never fails the task, when it can't be read the command just runs
+        begin_time = time.monotonic()
+        try:
+            cached = TaskResultCache.get(self.resultCacheKey, self.resultCache.ttl)
+        except OSError as e:
+            Logger.log(f"Result cache of task '{self.name}' can't be read: {e}")
+            return False
+        if cached is None:
+            return False
+        entry, text = cached
+        self.beginDate = datetime.now()
+        self.commandThread = None
+        self.commandProcess = None
+        self.commandFinished = threading.Event()
+        self.commandOutput = TaskOutputBuffer.create_for_task(self)
+        self.commandOutput.write_bytes(text.encode('utf-8'))
+        self.commandOutput.total_bytes = entry.total_bytes
+        self.commandOutput.close()
+        # Goes through IN_PROGRESS like a run would, so listeners see a task that was already finished start again
         self.state = TaskState.IN_PROGRESS
+        self.__add_run(TaskRun(self.beginDate, datetime.now(), entry.return_code, time.monotonic() - begin_time,
+                               cached=True))
+        report("Task: " + self.name + " finished with cached output")
+        self.__log_output()
+        self.__finish_task()
+        self.commandFinished.set()
+        return True
+
+    def _begin_execution(self):
+        # Called by TaskScheduler when a worker picks the task up
         self.beginDate = datetime.now()
-        self.commandThread = threading.Thread(target=self.__get_command_process)
-        print("Task: " + self.name + " started")
-        self.commandThread.start()
+        self.commandThread = threading.current_thread()
+        self.commandProcess = None
+        self.commandOutput = TaskOutputBuffer.create_for_task(self)
+        self.state = TaskState.IN_PROGRESS
+        TaskWatchdog.watch(self)
+
+    def _execute(self):
+        # Called by TaskScheduler on the worker thread, when it raises the engine ends the task with _fail_execution
+        self.__get_command_process()
+        self.commandFinished.set()
+
+    async def _execute_async(self):
+        # Called by TaskScheduler on the event loop of asyncio engine, fails the same way as _execute
+        try:
+            begin_time = time.monotonic()
+            with Instrumentation.timer('process.spawn'):
+                self.commandProcess = await asyncio.create_subprocess_shell(
+                    self.command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True)
+            self._notify_change('commandProcess', None, self.commandProcess)
+            first_chunk = True
+            while chunk := await self.commandProcess.stdout.read(READ_CHUNK_SIZE):
+                if first_chunk:
+                    Instrumentation.add_time('process.first_output', time.monotonic() - begin_time)
+                    first_chunk = False
+                self.commandOutput.write_bytes(chunk, False)
+                segment = self.commandOutput.segment
+                if segment is not None and segment.is_compression_due():
+                    # Compressing a chunk takes milliseconds, on the event loop it would hold up every other command
+                    await asyncio.to_thread(segment.compress_pending)
+            # Process is reaped by asyncio's child watcher, so its CPU time and memory can't be known here
+            with Instrumentation.timer('process.wait'):
+                return_code = await self.commandProcess.wait()
+            self.__add_run(TaskRun(self.beginDate, datetime.now(), return_code, time.monotonic() - begin_time))
+            self.commandOutput.close()
+            self.__store_result()
+            self.__log_output()
+            self.__finish_task()
+        finally:
+            self.commandOutput.close()
+        self.commandFinished.set()
+
+    def _fail_execution(self, reason: str):
+        # Called by the engine when running the command raised. Task ends as terminated instead of staying
+        # in progress, and its finished event is set only after that, so nothing waiting for it waits forever
+        if self.commandOutput is not None:
+            self.commandOutput.close()
+        if self.terminationReason is None:
+            self._set_termination_reason(reason)
+        if self.state is TaskState.IN_PROGRESS:
+            self._mark_terminated()
+        self.commandFinished.set()
 
     def __get_command_process(self):
-        self.commandProcess = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                               text=True, shell=True, encoding='utf-8', universal_newlines=True,
-                                               errors='ignore')
-        output, errors = self.commandProcess.communicate()
-        Logger.log("Task name: " + self.name + "\nfinished work with output: " + output + errors)
+        # Output is read as it comes, so memory used by a chatty command stays within the buffer size.
+        # Own session makes the command a process group, so stopping it reaches whatever the shell spawned
+        begin_time = time.monotonic()
+        with Instrumentation.timer('process.spawn'):
+            self.commandProcess = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                   shell=True, start_new_session=True)
+        self._notify_change('commandProcess', None, self.commandProcess)
+        try:
+            first_chunk = True
+            while chunk := self.commandProcess.stdout.read1(READ_CHUNK_SIZE):
+                if first_chunk:
+                    Instrumentation.add_time('process.first_output', time.monotonic() - begin_time)
+                    first_chunk = False
+                self.commandOutput.write_bytes(chunk)
+            with Instrumentation.timer('process.wait'):
+                run = wait_process(self.commandProcess, self.beginDate, begin_time)
+            self.__add_run(run)
+        finally:
+            self.commandProcess.stdout.close()
+            self.commandOutput.close()
+        self.__store_result()
+        self.__log_output()
         self.__finish_task()
 
+    def __add_run(self, run: TaskRun):
+        if not run.cached:
+            Instrumentation.add_time('process.run', run.wall_time)
+        if self.commandOutput.segment is not None:
+            run.output_path = self.commandOutput.segment.file_path
+        self.commandRuns.append(run)
+        self._notify_change('commandRuns', None, run)
+
+    def __store_result(self):
+        # Only complete output of a run that succeeded on its own is worth reusing
+        if self.resultCacheKey is None or self.terminationReason is not None or self.commandOutput.is_truncated():
+            return
+        run = self.commandRuns[-1]
+        if run.return_code != 0:
+            return
+        try:
+            TaskResultCache.put(self.resultCacheKey, self.command, self.commandOutput.get_text(),
+                                self.commandOutput.total_bytes, run.return_code)
+        except OSError as e:
+            Logger.log(f"Output of task '{self.name}' can't be cached: {e}")
+
+    def __log_output(self):
+        msg = ("Task name: " + self.name + "\nfinished work with " + self.commandOutput.get_summary_msg()
+               + ", " + self.commandRuns[-1].get_msg())
+        # Stored output is read from its segment, so the log doesn't carry every output mixed together
+        Logger.log(msg if self.commandOutput.segment is not None else msg + ":\n" + self.commandOutput.get_text())
+
     def __finish_task(self):
         self.finishDate = datetime.now()
-        self.state = TaskState.FINISHED
+        # Command stopped by watchdog or user ends as terminated, even though it exited on its own terms
+        self.state = TaskState.FINISHED if self.terminationReason is None else TaskState.TERMINATED
+
+    def _set_termination_reason(self, reason: str):
+        old_reason = self.terminationReason
+        self.terminationReason = reason
+        self._notify_change('terminationReason', old_reason, reason)
 
-    def terminate_task(self):
+    def terminate_task(self, reason: str = "Terminated by user"):
         TaskValidator.validate_terminate_task(self)
-        if self.commandProcess:
-            self.commandProcess.terminate()
-            self.commandProcess.wait()  # await termination
-        if self.commandThread:
-            self.commandThread.join()
+        if self._request_termination(reason):
+            self.__stop_command_process()
+        self._mark_terminated()
+
+    def _request_termination(self, reason: str) -> bool:
+        """
+        Takes the task out of the queue, or records why its command is being stopped
+
+        :return: True when the command is running (or about to), so it still has to be stopped
+        """
+        if self.terminationReason is None:
+            self._set_termination_reason(reason)
+        return not (self.state is TaskState.QUEUED and TaskScheduler.cancel(self))
+
+    def _mark_terminated(self):
         self.finishDate = datetime.now()
         self.state = TaskState.TERMINATED
 
+    def __stop_command_process(self):
+        if self.commandFinished is None:
+            return
+        # Worker may not have spawned the process yet, so keep checking until it reports the end of work
+        terminate_sent = False
+        while not self.commandFinished.wait(0.05):
+            if self.commandProcess and not terminate_sent:
+                TaskScheduler.terminate_process(self)
+                terminate_sent = True
+
+    def update_definition(self, name: str, priority: TaskPriority, category: TaskCategory, description: str,
+                          deadline_date: datetime, command: str, timeout: float | None = None,
+                          depends_on: list[str | int] | None = None, result_cache: ResultCachePolicy | None = None):
+        self.name = name
+        self.priority = priority
+        self.category = category
+        self.description = description
+        self.deadlineDate = deadline_date
+        self.command = command
+        self.timeout = timeout
+        self.dependsOn = depends_on or []
+        self.resultCache = result_cache
+        self._notify_change('definition', None, None)
+
     def change_description(self, new_description: str):
+        old_description = self.description
         self.description = new_description
+        self._notify_change('description', old_description, new_description)
 
     def change_command(self, new_command: str):
         TaskValidator.validate_change_command(self)
+        old_command = self.command
         self.command = new_command
+        self._notify_change('command', old_command, new_command)
 
     def to_dict(self):
         return {'id': self.id, 'name': self.name, 'state': self.state.order, 'priority': self.priority.order,
@@ -154,7 +380,9 @@ class Task:
                 'description': self.description,
                 'beginDate': self.beginDate.isoformat() if self.beginDate else None,
                 'finishDate': self.finishDate.isoformat() if self.finishDate else None,
-                'deadlineDate': self.deadlineDate.isoformat(), 'command': self.command}
+                'deadlineDate': self.deadlineDate.isoformat(), 'command': self.command, 'timeout': self.timeout,
+                'dependsOn': self.dependsOn,
+                'resultCache': self.resultCache.to_dict() if self.resultCache else None}
 
     def get_field_by_name(self, field_name: str):
         match field_name:
@@ -182,6 +410,14 @@ class Task:
                 return self.commandThread
             case 'commandProcess':
                 return self.commandProcess
+            case 'timeout':
+                return self.timeout
+            case 'terminationReason':
+                return self.terminationReason
+            case 'dependsOn':
+                return self.dependsOn
+            case 'resultCache':
+                return self.resultCache
             case _d:
                 return str(FieldNotFoundException(f"Class Task does not have field '{field_name}'"))
 
@@ -0,0 +1,241 @@
+from enum import Enum
+import asyncio
+import os
+import signal
+import sys
+import threading
+
+
+class TaskEngineEnum(Enum):
+    THREAD = 1, 'thread'
+    ASYNCIO = 2, 'asyncio'
+
+    def __str__(self):
+        return self.value[1]
+
+    def __init__(self, order: int, label: str):
+        self.order = order
+        self.label = label
+
+    @staticmethod
+    def get_task_engine(label: str):
+        match label:
+            case 'thread':
+                return TaskEngineEnum.THREAD
+            case 'asyncio':
+                return TaskEngineEnum.ASYNCIO
+            case _d:
+                return None
+
+
+def signal_process_group(process: 'subprocess.Popen | asyncio.subprocess.Process', kill: bool):
+    """
+    Commands are started in a session of their own, so signalling the group reaches everything spawned by the shell.
+    Group id is the pid of the command, which can't be reused while any process of the group is alive
+    """
+    try:
+        if not hasattr(os, 'killpg'):
+            if kill:
+                process.kill()
+            else:
+                process.terminate()
+        else:
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # whole group already exited
+
+
+class TaskEngineAbstract:
+    """
+    Engine decides how commands taken from TaskScheduler's queue are run.
+    Scheduler keeps the queue and counters, engine only provides the workers
+    """
+    __slots__ = ['scheduler']
+    scheduler: type['TaskScheduler']
+
+    def __init__(self, scheduler: type['TaskScheduler']):
+        self.scheduler = scheduler
+
+    def start(self, worker_count: int):
+        raise NotImplementedError
+
+    def wake(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def join(self):
+        """
+        Waits until a stopped engine finished commands it was running
+        """
+        raise NotImplementedError
+
+    def terminate_process(self, task: 'Task'):
+        raise NotImplementedError
+
+    def kill_process(self, task: 'Task'):
+        raise NotImplementedError
+
+
+class ThreadTaskEngine(TaskEngineAbstract):
+    """
+    Every worker is an OS thread blocked on its command
+    """
+    __slots__ = ['workers']
+    workers: list[threading.Thread]
+
+    def __init__(self, scheduler: type['TaskScheduler']):
+        super().__init__(scheduler)
+        self.workers = []
+
+    def start(self, worker_count: int):
+        self.workers = [threading.Thread(target=self.__work, name=f"TaskWorker-{i}", daemon=True)
+                        for i in range(worker_count)]
+        for worker in self.workers:
+            worker.start()
+
+    def wake(self):
+        pass  # workers wait on scheduler's condition, submit already notified them
+
+    def stop(self):
+        pass  # workers exit once scheduler stops running, after the command they run
+
+    def join(self):
+        for worker in self.workers:
+            if worker is not threading.current_thread():
+                worker.join()
+        self.workers = []
+
+    def terminate_process(self, task: 'Task'):
+        signal_process_group(task.commandProcess, False)
+
+    def kill_process(self, task: 'Task'):
+        signal_process_group(task.commandProcess, True)
+
+    def __work(self):
+        while True:
+            task = self.scheduler._take_next_task(True)
+            if task is None:
+                return
+            try:
+                task._execute()
+            except Exception as e:
+                print(f"Task '{task.name}' failed: {e}")
+                task._fail_execution(f"Command failed to run: {e}")
+            finally:
+                self.scheduler._release_worker()
+
+
+def attach_child_watcher(loop: asyncio.AbstractEventLoop):
+    # Before 3.12 asyncio waits for every child process on a separate thread,
+    # pidfd watcher keeps waiting on the event loop itself
+    if sys.platform == 'win32' or sys.version_info >= (3, 12) or not hasattr(os, 'pidfd_open'):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return  # kernel without pidfd support
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+
+
+class AsyncioTaskEngine(TaskEngineAbstract):
+    """
+    All commands run on a single asyncio event loop, worker count only limits how many run at once
+    """
+    __slots__ = ['loop', 'loop_thread', 'wakeup', 'running_tasks']
+    loop: asyncio.AbstractEventLoop | None
+    loop_thread: threading.Thread | None
+    wakeup: asyncio.Event | None
+    running_tasks: set[asyncio.Task]
+
+    def __init__(self, scheduler: type['TaskScheduler']):
+        super().__init__(scheduler)
+        self.loop = None
+        self.loop_thread = None
+        self.wakeup = None
+        self.running_tasks = set()
+
+    def start(self, worker_count: int):
+        self.loop = asyncio.new_event_loop()
+        loop_ready = threading.Event()
+        self.loop_thread = threading.Thread(target=self.__run_loop, args=(worker_count, loop_ready),
+                                            name="TaskEventLoop", daemon=True)
+        self.loop_thread.start()
+        loop_ready.wait()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def stop(self):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def join(self):
+        if self.loop_thread is not None and self.loop_thread is not threading.current_thread():
+            self.loop_thread.join()
+
+    def terminate_process(self, task: 'Task'):
+        self.__signal_on_loop(task, False)
+
+    def kill_process(self, task: 'Task'):
+        self.__signal_on_loop(task, True)
+
+    def __signal_on_loop(self, task: 'Task', kill: bool):
+        # asyncio processes belong to the loop, so the signal has to be sent from the loop thread
+        try:
+            self.loop.call_soon_threadsafe(signal_process_group, task.commandProcess, kill)
+        except RuntimeError:
+            pass  # loop is closed only after every command it ran has finished
+
+    def __run_loop(self, worker_count: int, loop_ready: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        attach_child_watcher(self.loop)
+        self.wakeup = asyncio.Event()
+        loop_ready.set()
+        try:
+            self.loop.run_until_complete(self.__dispatch(worker_count))
+        finally:
+            # Dispatch waits for running commands, anything left here is cancelled so its task still gets
+            # a final state before the loop is closed
+            for running_task in self.running_tasks:
+                running_task.cancel()
+            if self.running_tasks:
+                self.loop.run_until_complete(asyncio.gather(*self.running_tasks, return_exceptions=True))
+            self.loop.close()
+
+    async def __dispatch(self, worker_count: int):
+        free_workers = asyncio.Semaphore(worker_count)
+        while True:
+            await free_workers.acquire()
+            task = self.scheduler._take_next_task(False)
+            while task is None:
+                if not self.scheduler._is_running():
+                    # Shutdown doesn't touch commands that are already running, they still run to the end
+                    await asyncio.gather(*self.running_tasks, return_exceptions=True)
+                    return
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                task = self.scheduler._take_next_task(False)
+            running_task = self.loop.create_task(self.__run(task, free_workers))
+            self.running_tasks.add(running_task)
+            running_task.add_done_callback(self.running_tasks.discard)
+
+    async def __run(self, task: 'Task', free_workers: asyncio.Semaphore):
+        try:
+            await task._execute_async()
+        except asyncio.CancelledError:
+            # Loop is going away, the command is killed and reaped while it still can be
+            if task.commandProcess is not None:
+                signal_process_group(task.commandProcess, True)
+                await task.commandProcess.wait()
+            task._fail_execution("Event loop stopped before the command finished")
+            raise
+        except Exception as e:
+            print(f"Task '{task.name}' failed: {e}")
+            task._fail_execution(f"Command failed to run: {e}")
+        finally:
+            self.scheduler._release_worker()
+            free_workers.release()
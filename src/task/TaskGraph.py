@@ -0,0 +1,293 @@
+from src.task.Task import Task, TaskState
+from src.task.TaskScheduler import TaskScheduler
+from collections import deque
+from collections.abc import Iterable
+import queue
+import time
+
+_dependency_ref_type = str | int  # task name or task id
+
+
+class TaskGraph:
+    """
+    Dependencies between tasks, resolved from dependsOn references of every task.
+    Names must be unique to be referenced, ids are the ones given at load
+    """
+    __slots__ = ['tasks', 'dependencies', 'dependents', 'errors']
+    tasks: dict[int, Task]
+    dependencies: dict[int, list[Task]]
+    dependents: dict[int, list[Task]]
+    errors: dict[int, str]  # task id -> why its dependencies can't be resolved
+
+    def __init__(self, tasks: Iterable[Task]):
+        self.tasks = {task.id: task for task in tasks}
+        self.dependencies = {}
+        self.dependents = {task_id: [] for task_id in self.tasks}
+        self.errors = {}
+        tasks_by_name = {}
+        for task in self.tasks.values():
+            tasks_by_name.setdefault(task.name, []).append(task)
+        for task in self.tasks.values():
+            resolved = []
+            for ref in task.dependsOn:
+                dependency = self.__resolve(ref, tasks_by_name)
+                if isinstance(dependency, str):
+                    self.errors[task.id] = dependency
+                    break
+                resolved.append(dependency)
+            self.dependencies[task.id] = resolved
+        for task_id, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                self.dependents[dependency.id].append(self.tasks[task_id])
+        blocked = set(self.find_cycle())
+        for task_id in blocked:
+            cycle = self.get_cycle(task_id, blocked)
+            cycle_msg = ' -> '.join(self.tasks[cycle_id].name for cycle_id in cycle)
+            if cycle[0] == task_id:
+                self.errors.setdefault(task_id, "Dependency cycle: " + cycle_msg)
+            else:
+                self.errors.setdefault(task_id, "Depends on dependency cycle: " + cycle_msg)
+
+    def __resolve(self, ref: _dependency_ref_type, tasks_by_name: dict[str, list[Task]]) -> Task | str:
+        # Returns error message instead of task when the reference can't be resolved
+        if isinstance(ref, int):
+            dependency = self.tasks.get(ref)
+            return dependency if dependency is not None else f"Depends on unknown task id {ref}"
+        candidates = tasks_by_name.get(ref, [])
+        if len(candidates) != 1:
+            return f"Depends on {'unknown' if not candidates else 'ambiguous'} task name '{ref}'"
+        return candidates[0]
+
+    def find_cycle(self) -> list[int]:
+        """
+        :return: ids of tasks that are in a cycle or depend on one, found as the ones Kahn's algorithm can't order
+        """
+        remaining = {task_id: len(dependencies) for task_id, dependencies in self.dependencies.items()}
+        ready = deque(task_id for task_id, count in remaining.items() if count == 0)
+        while ready:
+            task_id = ready.popleft()
+            for dependent in self.dependents[task_id]:
+                remaining[dependent.id] -= 1
+                if remaining[dependent.id] == 0:
+                    ready.append(dependent.id)
+        return [task_id for task_id, count in remaining.items() if count > 0]
+
+    def get_cycle(self, task_id: int, blocked: set[int]) -> list[int]:
+        # Every task left by Kahn's algorithm depends on another one left, so following them has to repeat a task
+        path = []
+        seen = {}
+        while task_id not in seen:
+            seen[task_id] = len(path)
+            path.append(task_id)
+            task_id = next(dependency.id for dependency in self.dependencies[task_id] if dependency.id in blocked)
+        return path[seen[task_id]:] + [task_id]
+
+    def get_downstream(self, task_ids: Iterable[int]) -> list[Task]:
+        """
+        :return: tasks depending on any of given tasks, directly or not, without the given ones
+        """
+        start_ids = set(task_ids)
+        result = {}
+        stack = list(start_ids)
+        while stack:
+            for dependent in self.dependents[stack.pop()]:
+                if dependent.id not in result and dependent.id not in start_ids:
+                    result[dependent.id] = dependent
+                    stack.append(dependent.id)
+        return list(result.values())
+
+    def get_upstream(self, tasks: Iterable[Task]) -> list[Task]:
+        """
+        :return: given tasks and everything they depend on, directly or not
+        """
+        result = {}
+        stack = list(tasks)
+        while stack:
+            task = stack.pop()
+            if task.id in result:
+                continue
+            result[task.id] = task
+            stack.extend(self.dependencies.get(task.id, []))
+        return list(result.values())
+
+    def get_critical_path(self, durations: dict[int, float]) -> tuple[list[Task], float]:
+        """
+        Longest chain of dependent tasks by duration, the one that limits wall time of the whole graph
+
+        :param durations: seconds every task took, tasks missing from it count as 0
+        :return: tasks of the path from the first to the last one and its total duration
+        """
+        finish = {}
+        previous = {}
+        remaining = {task_id: len(dependencies) for task_id, dependencies in self.dependencies.items()}
+        ready = deque(task_id for task_id, count in remaining.items() if count == 0)
+        while ready:
+            task_id = ready.popleft()
+            dependencies = self.dependencies[task_id]
+            longest = max(dependencies, key=lambda dependency: finish[dependency.id], default=None)
+            previous[task_id] = longest.id if longest is not None else None
+            finish[task_id] = durations.get(task_id, 0.0) + (finish[longest.id] if longest is not None else 0.0)
+            for dependent in self.dependents[task_id]:
+                remaining[dependent.id] -= 1
+                if remaining[dependent.id] == 0:
+                    ready.append(dependent.id)
+        if not finish:
+            return [], 0.0
+        task_id = max(finish, key=finish.get)
+        total = finish[task_id]
+        path = []
+        while task_id is not None:
+            path.append(self.tasks[task_id])
+            task_id = previous[task_id]
+        path.reverse()
+        return path, total
+
+
+def get_last_return_code(task: Task) -> int:
+    # Task finished in an earlier session has no runs, it counts as succeeded
+    return task.commandRuns[-1].return_code if task.commandRuns else 0
+
+
+class TaskGraphExecutor:
+    """
+    Runs tasks in dependency order. Every task whose dependencies finished is started right away,
+    up to max_parallel at once, the rest of the limits is up to TaskScheduler.
+    Task whose dependency was terminated, exited with a non-zero code (or was skipped, or can't run) is skipped,
+    and so is everything after it
+    """
+    __slots__ = ['graph', 'tasks', 'max_parallel', 'skipped', 'started', 'durations', 'done', 'wall_time']
+    graph: TaskGraph
+    tasks: list[Task]
+    max_parallel: int
+    skipped: dict[int, str]  # task id -> reason
+    started: list[Task]
+    durations: dict[int, float]
+    done: queue.Queue
+    wall_time: float
+
+    def __init__(self, graph: TaskGraph, tasks: list[Task], max_parallel: int | None = None):
+        """
+        :param tasks: tasks to run, their dependencies outside of this list have to be finished already
+        """
+        self.graph = graph
+        self.tasks = tasks
+        self.max_parallel = max_parallel or TaskScheduler.worker_count()
+        self.skipped = {}
+        self.started = []
+        self.durations = {}
+        self.done = queue.Queue()
+        self.wall_time = 0.0
+
+    def run(self, timeout: float | None = None) -> bool:
+        """
+        :return: False when timeout passed before every task finished, tasks still running are left running
+        """
+        begin_time = time.monotonic()
+        deadline = None if timeout is None else begin_time + timeout
+        run_ids = {task.id for task in self.tasks}
+        remaining = {}
+        ready = deque()
+        for task in self.tasks:
+            if task.id in self.graph.errors:
+                self.__skip(task, self.graph.errors[task.id])
+                continue
+            waiting_for = 0
+            for dependency in self.graph.dependencies[task.id]:
+                if dependency.id in run_ids:
+                    waiting_for += 1
+                elif dependency.state is not TaskState.FINISHED:
+                    self.__skip(task, f"Depends on '{dependency.name}' which is {dependency.state} and not run now")
+                    break
+                elif get_last_return_code(dependency) != 0:
+                    self.__skip(task, f"Depends on '{dependency.name}' which exited with code "
+                                      f"{get_last_return_code(dependency)} and not run now")
+                    break
+            else:
+                remaining[task.id] = waiting_for
+                if waiting_for == 0:
+                    ready.append(task)
+        # Skipping is done after counting, so a skipped task takes its dependents with it
+        for task_id in list(self.skipped):
+            self.__skip_dependents(self.graph.tasks[task_id], run_ids)
+
+        Task.add_change_listener(self._on_task_changed)
+        running = set()
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_parallel:
+                    task = ready.popleft()
+                    if task.id in self.skipped:
+                        continue
+                    if task.state is TaskState.QUEUED or task.state is TaskState.IN_PROGRESS:
+                        # start_task does nothing for it. A run of this session is waited for, but a task loaded
+                        # in that state has no command that could ever finish
+                        if task.commandFinished is None:
+                            self.__skip(task, f"Was {task.state} when loaded, it can't run in this session")
+                            self.__skip_dependents(task, run_ids)
+                            continue
+                        running.add(task.id)
+                        self.started.append(task)
+                        continue
+                    running.add(task.id)
+                    self.started.append(task)
+                    task.start_task()
+                if not running:
+                    continue
+                try:
+                    wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+                    task = self.done.get(timeout=wait)
+                except queue.Empty:
+                    return False
+                if task.id not in running:
+                    continue
+                running.discard(task.id)
+                if task.commandRuns:
+                    self.durations[task.id] = task.commandRuns[-1].wall_time
+                if task.state is not TaskState.FINISHED:
+                    self.__skip_dependents(task, run_ids)
+                    continue
+                return_code = get_last_return_code(task)
+                if return_code != 0:
+                    self.__skip_dependents(task, run_ids, f"'{task.name}' exited with code {return_code}")
+                    continue
+                for dependent in self.graph.dependents[task.id]:
+                    if dependent.id in remaining and dependent.id not in self.skipped:
+                        remaining[dependent.id] -= 1
+                        if remaining[dependent.id] == 0:
+                            ready.append(dependent)
+            return True
+        finally:
+            Task.remove_change_listener(self._on_task_changed)
+            self.wall_time = time.monotonic() - begin_time
+
+    def get_not_started(self) -> list[Task]:
+        started_ids = {task.id for task in self.started}
+        return [task for task in self.tasks if task.id not in started_ids and task.id not in self.skipped]
+
+    def get_critical_path(self) -> tuple[list[Task], float]:
+        return self.graph.get_critical_path(self.durations)
+
+    def get_critical_path_msg(self) -> str:
+        path, total = self.get_critical_path()
+        if not path:
+            return "No task has run"
+        return f"Critical path ({total:.3f}s): " + ' -> '.join(
+            f"{task.name} ({self.durations.get(task.id, 0.0):.3f}s)" for task in path)
+
+    def __skip(self, task: Task, reason: str):
+        self.skipped.setdefault(task.id, reason)
+
+    def __skip_dependents(self, task: Task, run_ids: set[int], reason: str | None = None):
+        reason = reason or self.skipped.get(task.id) or f"'{task.name}' ended as {task.state}"
+        stack = [task]
+        while stack:
+            upstream = stack.pop()
+            for dependent in self.graph.dependents[upstream.id]:
+                if dependent.id in run_ids and dependent.id not in self.skipped:
+                    self.__skip(dependent, f"Upstream task skipped: {reason}")
+                    stack.append(dependent)
+
+    def _on_task_changed(self, task: Task, field_name: str, old_value, new_value):
+        # TERMINATED may be set by terminate_task after the worker already set FINISHED, only the first one counts
+        if field_name == 'state' and (new_value is TaskState.FINISHED or new_value is TaskState.TERMINATED):
+            self.done.put(task)
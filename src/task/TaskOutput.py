@@ -0,0 +1,122 @@
+from collections import deque
+from src.task.TaskOutputStore import TaskOutputStore, TaskOutputSegment
+import codecs
+from typing import TextIO
+import os
+import threading
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class TaskOutputBuffer:
+    """
+    Keeps only the last max_size characters of command output in memory.
+    Whole output can optionally be written to a spill file and / or a compressed segment of TaskOutputStore,
+    so nothing is lost when the buffer overflows
+    """
+    __slots__ = ['max_size', 'chunks', 'size', 'written_size', 'total_bytes', 'decoder', 'spill_file_path',
+                 'spill_file', 'segment', 'lock']
+    max_size: int
+    chunks: deque[str]
+    size: int
+    written_size: int
+    total_bytes: int
+    decoder: codecs.IncrementalDecoder
+    spill_file_path: str | None
+    spill_file: TextIO | None
+    segment: TaskOutputSegment | None
+    lock: threading.Lock
+
+    _default_max_size: int = DEFAULT_BUFFER_SIZE
+    _spill_dir_path: str | None = None
+
+    def __init__(self, max_size: int, spill_file_path: str | None, segment: TaskOutputSegment | None = None):
+        self.max_size = max_size
+        self.chunks = deque()
+        self.size = 0
+        self.written_size = 0
+        self.total_bytes = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self.spill_file_path = spill_file_path
+        self.spill_file = None
+        self.segment = segment
+        self.lock = threading.Lock()
+        if spill_file_path:
+            self.spill_file = open(spill_file_path, 'w', encoding='utf-8')
+
+    @classmethod
+    def configure(cls, max_size: int, spill_dir_path: str | None):
+        if max_size < 1:
+            raise ValueError("Output buffer needs to hold at least one character")
+        cls._default_max_size = max_size
+        if spill_dir_path and not os.path.exists(spill_dir_path):
+            os.makedirs(spill_dir_path)
+        cls._spill_dir_path = spill_dir_path
+
+    @classmethod
+    def create_for_task(cls, task: 'Task') -> 'TaskOutputBuffer':
+        spill_file_path = None
+        if cls._spill_dir_path:
+            spill_file_name = f"task{task.id}-{task.beginDate.isoformat().replace(':', '-')}.out"
+            spill_file_path = os.path.join(cls._spill_dir_path, spill_file_name)
+        return cls(cls._default_max_size, spill_file_path, TaskOutputStore.create_segment(task))
+
+    def write_bytes(self, data: bytes, compress_segment: bool = True):
+        """
+        :param compress_segment: False leaves full chunks of the segment to TaskOutputSegment.compress_pending()
+        """
+        self.total_bytes += len(data)
+        if self.segment is not None:
+            self.segment.write(data, compress_segment)
+        self.write(self.decoder.decode(data))
+
+    def write(self, text: str):
+        if not text:
+            return
+        with self.lock:
+            self.written_size += len(text)
+            if self.spill_file:
+                self.spill_file.write(text)
+            if len(text) >= self.max_size:
+                self.chunks.clear()
+                self.chunks.append(text[-self.max_size:])
+                self.size = self.max_size
+                return
+            self.chunks.append(text)
+            self.size += len(text)
+            while self.size > self.max_size:
+                overflow = self.size - self.max_size
+                oldest = self.chunks[0]
+                if len(oldest) <= overflow:
+                    self.chunks.popleft()
+                    self.size -= len(oldest)
+                else:
+                    self.chunks[0] = oldest[overflow:]
+                    self.size -= overflow
+
+    def get_text(self) -> str:
+        with self.lock:
+            return ''.join(self.chunks)
+
+    def is_truncated(self) -> bool:
+        return self.written_size > self.size
+
+    def close(self):
+        self.write(self.decoder.decode(b'', final=True))
+        with self.lock:
+            if self.spill_file:
+                self.spill_file.close()
+                self.spill_file = None
+        if self.segment is not None:
+            TaskOutputStore.close_segment(self.segment)
+
+    def get_summary_msg(self) -> str:
+        msg = f"{self.total_bytes} bytes of output"
+        if self.is_truncated():
+            msg += f", showing last {self.size} characters"
+        if self.spill_file_path:
+            msg += f", full output in {self.spill_file_path}"
+        if self.segment is not None:
+            msg += f", stored in {self.segment.file_path}"
+        return msg
@@ -0,0 +1,347 @@
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO
+import bisect
+import gzip
+import json
+import lzma
+import os
+import threading
+import time
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600.0
+DEFAULT_MAX_STORE_SIZE = 1024 * 1024 * 1024
+# Cheap levels, more output of a command is read only after its last full chunk is compressed
+GZIP_LEVEL = 6
+LZMA_PRESET = 1
+INDEX_FILE_EXTENSION = '.idx'
+# Pruning by age walks the directory, it's not worth doing after every run
+PRUNE_INTERVAL = 60.0
+
+
+def get_output_store_dir_path() -> str:
+    output_store_cls_path = Path(__file__).resolve()
+    return os.path.join(str(output_store_cls_path.parent.parent.parent), 'outputs')
+
+
+class OutputCompressionEnum(Enum):
+    GZIP = 1, 'gzip'
+    LZMA = 2, 'lzma'
+
+    def __str__(self):
+        return self.value[1]
+
+    def __init__(self, order: int, label: str):
+        self.order = order
+        self.label = label
+
+    @staticmethod
+    def get_output_compression(label: str):
+        match label:
+            case 'gzip':
+                return OutputCompressionEnum.GZIP
+            case 'lzma':
+                return OutputCompressionEnum.LZMA
+            case _d:
+                return None
+
+    def get_file_extension(self) -> str:
+        return '.out.gz' if self is OutputCompressionEnum.GZIP else '.out.xz'
+
+    def compress(self, data: bytes) -> bytes:
+        if self is OutputCompressionEnum.GZIP:
+            return gzip.compress(data, GZIP_LEVEL)
+        return lzma.compress(data, preset=LZMA_PRESET)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self is OutputCompressionEnum.GZIP:
+            return gzip.decompress(data)
+        return lzma.decompress(data)
+
+
+SEGMENT_FILE_EXTENSIONS = tuple(compression.get_file_extension() for compression in OutputCompressionEnum)
+
+
+class TaskOutputSegment:
+    """
+    Whole output of one run, compressed in chunks of about chunk_size bytes. Every chunk is a complete gzip member
+    (or xz stream), so the file is still readable with zcat / xzcat, but any part of it can be read by seeking
+    to the chunks it spans and decompressing only them. Offsets of chunks are kept in an index file next to it.
+    While the run goes on, chunks are read from memory too, so output can be paged through live
+    """
+    __slots__ = ['file_path', 'compression', 'chunk_size', 'metadata', 'raw_offsets', 'chunks', 'pending', 'size',
+                 'compressed_size', 'file', 'lock']
+    file_path: str
+    compression: OutputCompressionEnum
+    chunk_size: int
+    metadata: dict
+    raw_offsets: list[int]  # offset in the output every chunk starts at, for bisect
+    chunks: list[tuple[int, int, int]]  # (offset in file, compressed size, output size) of every chunk
+    pending: bytearray  # output not compressed yet
+    size: int  # bytes of output, pending included
+    compressed_size: int
+    file: BinaryIO | None  # None once the segment is closed
+    lock: threading.Lock
+
+    def __init__(self, file_path: str, compression: OutputCompressionEnum, chunk_size: int, metadata: dict):
+        self.file_path = file_path
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.metadata = metadata
+        self.raw_offsets = []
+        self.chunks = []
+        self.pending = bytearray()
+        self.size = 0
+        self.compressed_size = 0
+        self.file = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, file_path: str, compression: OutputCompressionEnum, chunk_size: int,
+               metadata: dict) -> 'TaskOutputSegment':
+        segment = cls(file_path, compression, chunk_size, metadata)
+        segment.file = open(file_path, 'wb')
+        return segment
+
+    @classmethod
+    def open(cls, file_path: str) -> 'TaskOutputSegment':
+        """
+        Opens finished segment for reading
+
+        :raises OSError: segment or its index is missing
+        :raises ValueError: index is not valid JSON or has unknown compression
+        :raises KeyError: index misses a field
+        """
+        with open(file_path + INDEX_FILE_EXTENSION, 'r') as file:
+            index = json.load(file)
+        compression = OutputCompressionEnum.get_output_compression(index['compression'])
+        if compression is None:
+            raise ValueError(f"Unknown output compression '{index['compression']}'")
+        segment = cls(file_path, compression, index['chunkSize'], index['metadata'])
+        for offset, compressed_size, raw_size in index['chunks']:
+            segment.__add_chunk(offset, compressed_size, raw_size)
+        segment.size = index['size']
+        segment.compressed_size = index['compressedSize']
+        return segment
+
+    def get_index_file_path(self) -> str:
+        return self.file_path + INDEX_FILE_EXTENSION
+
+    def write(self, data: bytes, compress: bool = True):
+        """
+        :param compress: compress a full chunk right away, otherwise it waits in memory for compress_pending()
+        """
+        with self.lock:
+            self.pending += data
+            self.size += len(data)
+            if compress and len(self.pending) >= self.chunk_size:
+                self.__flush_pending()
+
+    def is_compression_due(self) -> bool:
+        return len(self.pending) >= self.chunk_size
+
+    def compress_pending(self):
+        """
+        Compresses output waiting in memory once there's a full chunk of it, from any thread
+        """
+        with self.lock:
+            if self.file is not None and len(self.pending) >= self.chunk_size:
+                self.__flush_pending()
+
+    def close(self) -> bool:
+        """
+        :return: False when the segment was closed already
+        """
+        with self.lock:
+            if self.file is None:
+                return False
+            if self.pending:
+                self.__flush_pending()
+            self.file.close()
+            self.file = None
+            index = {'compression': str(self.compression), 'chunkSize': self.chunk_size, 'size': self.size,
+                     'compressedSize': self.compressed_size, 'metadata': self.metadata, 'chunks': self.chunks}
+            # Written aside and swapped, segment without an index is never mistaken for a complete one
+            tmp_index_file_path = self.get_index_file_path() + '.tmp'
+            with open(tmp_index_file_path, 'w') as file:
+                json.dump(index, file)
+            os.replace(tmp_index_file_path, self.get_index_file_path())
+            return True
+
+    def read(self, offset: int, size: int) -> bytes:
+        """
+        Decompresses only chunks the range spans
+
+        :return: up to size bytes of output starting at offset
+        """
+        with self.lock:
+            end = min(offset + size, self.size)
+            first = max(bisect.bisect_right(self.raw_offsets, offset) - 1, 0)
+            chunks = [(self.raw_offsets[i], *self.chunks[i]) for i in range(first, len(self.chunks))
+                      if self.raw_offsets[i] < end]
+            pending_offset = self.size - len(self.pending)
+            pending = bytes(self.pending[max(offset - pending_offset, 0):max(end - pending_offset, 0)])
+        if offset >= end:
+            return b''
+        parts = []
+        if chunks:
+            # Own handle, the writer keeps appending to the file meanwhile
+            with open(self.file_path, 'rb') as file:
+                for raw_offset, file_offset, compressed_size, raw_size in chunks:
+                    file.seek(file_offset)
+                    data = self.compression.decompress(file.read(compressed_size))
+                    parts.append(data[max(offset - raw_offset, 0):end - raw_offset])
+        parts.append(pending)
+        return b''.join(parts)
+
+    def get_page_count(self, page_size: int) -> int:
+        return max(1, -(-self.size // page_size))
+
+    def read_page(self, page: int, page_size: int) -> str:
+        """
+        :param page: page number starting at 1
+        """
+        # Page may start or end inside of a multibyte character, it's shown as a replacement character
+        return self.read((page - 1) * page_size, page_size).decode('utf-8', errors='replace')
+
+    def get_summary_msg(self) -> str:
+        msg = f"{self.size} bytes in {len(self.chunks)} {self.compression} chunks"
+        compressed_raw_size = self.size - len(self.pending)
+        if self.compressed_size and compressed_raw_size > 0:
+            msg += f" compressed to {self.compressed_size / compressed_raw_size:.0%}"
+        return msg + f", {self.file_path}"
+
+    def __flush_pending(self):
+        # Called with lock held
+        data = self.compression.compress(bytes(self.pending))
+        offset = self.file.tell()
+        self.file.write(data)
+        self.file.flush()
+        self.__add_chunk(offset, len(data), len(self.pending))
+        self.compressed_size += len(data)
+        self.pending = bytearray()
+
+    def __add_chunk(self, offset: int, compressed_size: int, raw_size: int):
+        self.raw_offsets.append(self.raw_offsets[-1] + self.chunks[-1][2] if self.chunks else 0)
+        self.chunks.append((offset, compressed_size, raw_size))
+
+
+class TaskOutputStore:
+    """
+    Directory of output segments, one per run. Segments older than max_age seconds are removed,
+    and so are the oldest ones while all of them take more than max_size bytes
+    """
+    _lock = threading.Lock()
+    _enabled: bool = True
+    _dir_path: str | None = None
+    _compression: OutputCompressionEnum = OutputCompressionEnum.GZIP
+    _chunk_size: int = DEFAULT_CHUNK_SIZE
+    _max_age: float = DEFAULT_MAX_AGE
+    _max_size: int = DEFAULT_MAX_STORE_SIZE
+    _open_file_paths: set[str] = set()
+    _size: int = 0  # estimate between prunes, grows with every closed segment
+    _last_prune: float | None = None
+
+    @classmethod
+    def configure(cls, enabled: bool, dir_path: str | None = None,
+                  compression: OutputCompressionEnum = OutputCompressionEnum.GZIP, max_age: float = DEFAULT_MAX_AGE,
+                  max_size: int = DEFAULT_MAX_STORE_SIZE, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        :param dir_path: directory of segments, 'outputs' in project root when not given
+        """
+        if chunk_size < 1:
+            raise ValueError("Output chunk needs to hold at least one byte")
+        with cls._lock:
+            cls._enabled = enabled
+            cls._dir_path = dir_path
+            cls._compression = compression
+            cls._max_age = max_age
+            cls._max_size = max_size
+            cls._chunk_size = chunk_size
+            cls._last_prune = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._enabled
+
+    @classmethod
+    def get_dir_path(cls) -> str:
+        return cls._dir_path or get_output_store_dir_path()
+
+    @classmethod
+    def create_segment(cls, task: 'Task') -> TaskOutputSegment | None:
+        if not cls._enabled:
+            return None
+        dir_path = cls.get_dir_path()
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        file_name = f"task{task.id}-{task.beginDate.isoformat().replace(':', '-')}"
+        file_path = os.path.join(dir_path, file_name + cls._compression.get_file_extension())
+        metadata = {'taskId': task.id, 'taskName': task.name, 'command': task.command,
+                    'beginDate': task.beginDate.isoformat()}
+        with cls._lock:
+            cls._open_file_paths.add(file_path)
+        return TaskOutputSegment.create(file_path, cls._compression, cls._chunk_size, metadata)
+
+    @classmethod
+    def close_segment(cls, segment: TaskOutputSegment):
+        if not segment.close():
+            return
+        with cls._lock:
+            cls._open_file_paths.discard(segment.file_path)
+            cls._size += segment.compressed_size
+            due = cls._last_prune is None or time.monotonic() - cls._last_prune > PRUNE_INTERVAL
+            if not due and cls._size <= cls._max_size:
+                return
+        cls.prune()
+
+    @classmethod
+    def prune(cls) -> int:
+        """
+        :return: number of removed segments
+        """
+        dir_path = cls.get_dir_path()
+        with cls._lock:
+            cls._last_prune = time.monotonic()
+            open_file_paths = set(cls._open_file_paths)
+        segments = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    # Segments of every compression are pruned, it may have changed since they were written
+                    if not entry.name.endswith(SEGMENT_FILE_EXTENSIONS) or entry.path in open_file_paths:
+                        continue
+                    file_stat = entry.stat()
+                    size = file_stat.st_size + get_file_size(entry.path + INDEX_FILE_EXTENSION)
+                    segments.append((file_stat.st_mtime, size, entry.path))
+        except FileNotFoundError:
+            return 0
+        segments.sort()
+        total_size = sum(size for _, size, _ in segments)
+        oldest_kept = time.time() - cls._max_age
+        removed = 0
+        for modified, size, file_path in segments:
+            if modified >= oldest_kept and total_size <= cls._max_size:
+                break
+            remove_file(file_path)
+            remove_file(file_path + INDEX_FILE_EXTENSION)
+            total_size -= size
+            removed += 1
+        with cls._lock:
+            cls._size = total_size
+        return removed
+
+
+def get_file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+def remove_file(file_path: str):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
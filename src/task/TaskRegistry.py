@@ -0,0 +1,146 @@
+from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from collections.abc import Callable, Iterable, Iterator
+import threading
+
+
+class TaskRegistry:
+    """
+    Central collection of tasks. Besides the index by id it keeps tasks grouped by state, priority and category.
+    Groups follow the tasks on their own, because registry listens to every state / priority / category change.
+    Groups are dicts keyed by id, so adding, removing and moving a task between groups is O(1).
+    Listeners are told about every added, removed and changed task with ('add' | 'remove' | 'change', task).
+    Registry listens to all tasks until it's closed, it can be used as a context manager to close it
+    """
+    __slots__ = ['tasks_by_id', 'tasks_by_state', 'tasks_by_priority', 'tasks_by_category', 'lock', 'listeners',
+                 'version']
+    tasks_by_id: dict[int, Task]
+    tasks_by_state: dict[TaskState, dict[int, Task]]
+    tasks_by_priority: dict[TaskPriority, dict[int, Task]]
+    tasks_by_category: dict[TaskCategory, dict[int, Task]]
+    lock: threading.RLock
+    listeners: list[Callable[[str, Task], None]]
+    version: int
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self.tasks_by_id = {}
+        self.tasks_by_state = {state: {} for state in TaskState}
+        self.tasks_by_priority = {priority: {} for priority in TaskPriority}
+        self.tasks_by_category = {category: {} for category in TaskCategory}
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.version = 0
+        for task in tasks:
+            self.add(task)
+        Task.add_change_listener(self._on_task_changed)
+
+    def add(self, task: Task):
+        with self.lock:
+            if task.id in self.tasks_by_id:
+                raise DuplicateTaskException(f"Task with id {task.id} is already registered")
+            self.tasks_by_id[task.id] = task
+            self.tasks_by_state[task.state][task.id] = task
+            self.tasks_by_priority[task.priority][task.id] = task
+            self.tasks_by_category[task.category][task.id] = task
+            self.__notify('add', task)
+
+    def remove(self, task: Task):
+        with self.lock:
+            if self.tasks_by_id.pop(task.id, None) is None:
+                raise TaskNotRegisteredException(f"Task with id {task.id} is not registered")
+            # Task may be changing its state right now, so it's dropped from every group, not only the current one
+            for index in (self.tasks_by_state, self.tasks_by_priority, self.tasks_by_category):
+                for group in index.values():
+                    group.pop(task.id, None)
+            self.__notify('remove', task)
+
+    def close(self):
+        """
+        Stops following task changes, indexes are no longer kept up to date afterward
+        """
+        Task.remove_change_listener(self._on_task_changed)
+
+    def __enter__(self) -> 'TaskRegistry':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_listener(self, listener: Callable[[str, Task], None]):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, Task], None]):
+        with self.lock:
+            self.listeners.remove(listener)
+
+    def get(self, task_id: int) -> Task | None:
+        return self.tasks_by_id.get(task_id)
+
+    def get_by_state(self, state: TaskState) -> list[Task]:
+        with self.lock:
+            return list(self.tasks_by_state[state].values())
+
+    def get_by_priority(self, priority: TaskPriority) -> list[Task]:
+        with self.lock:
+            return list(self.tasks_by_priority[priority].values())
+
+    def get_by_category(self, category: TaskCategory) -> list[Task]:
+        with self.lock:
+            return list(self.tasks_by_category[category].values())
+
+    def count_by_state(self, state: TaskState) -> int:
+        return len(self.tasks_by_state[state])
+
+    def count_by_priority(self, priority: TaskPriority) -> int:
+        return len(self.tasks_by_priority[priority])
+
+    def count_by_category(self, category: TaskCategory) -> int:
+        return len(self.tasks_by_category[category])
+
+    def __contains__(self, task: Task) -> bool:
+        return self.tasks_by_id.get(task.id) is task
+
+    def __len__(self) -> int:
+        return len(self.tasks_by_id)
+
+    def __bool__(self) -> bool:
+        return bool(self.tasks_by_id)
+
+    def __iter__(self) -> Iterator[Task]:
+        # Snapshot, so workers changing task states don't break iteration in the menu
+        with self.lock:
+            return iter(list(self.tasks_by_id.values()))
+
+    def _on_task_changed(self, task: Task, field_name: str, old_value, new_value):
+        match field_name:
+            case 'state':
+                index = self.tasks_by_state
+            case 'priority':
+                index = self.tasks_by_priority
+            case 'category':
+                index = self.tasks_by_category
+            case _d:
+                index = None
+        with self.lock:
+            if self.tasks_by_id.get(task.id) is not task:
+                return
+            if index is not None:
+                index[old_value].pop(task.id, None)
+                index[new_value][task.id] = task
+            self.__notify('change', task)
+
+    def __notify(self, event: str, task: Task):
+        # Called with lock held
+        self.version += 1
+        for listener in self.listeners:
+            listener(event, task)
+
+
+class DuplicateTaskException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class TaskNotRegisteredException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
@@ -0,0 +1,220 @@
+from collections import OrderedDict
+from pathlib import Path
+from src.task.Logger import Logger
+from src.instrumentation import Instrumentation
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+RESULT_CACHE_FORMAT_VERSION = 1
+DEFAULT_RESULT_CACHE_SIZE = 16 * 1024 * 1024
+INDEX_FILE_NAME = 'index.cache'
+
+
+def get_result_cache_dir_path() -> str:
+    result_cache_cls_path = Path(__file__).resolve()
+    return os.path.join(str(result_cache_cls_path.parent.parent.parent), 'cache', 'results')
+
+
+class ResultCachePolicy:
+    """
+    Opt-in of one task to the result cache, read from 'resultCache' of task file:
+        "resultCache": {"ttl": 86400, "env": ["JAVA_HOME"], "files": ["/etc/os-release"]}
+    Output is reused only while the command, the listed environment variables and the listed files stay the same
+    """
+    __slots__ = ['ttl', 'env', 'files']
+    ttl: float  # seconds a cached result stays valid
+    env: list[str]  # names of environment variables the output depends on
+    files: list[str]  # paths of files the output depends on, compared by modification time and size
+
+    def __init__(self, ttl: float, env: list[str] | None = None, files: list[str] | None = None):
+        self.ttl = ttl
+        self.env = env or []
+        self.files = files or []
+
+    @classmethod
+    def from_record(cls, record: dict | None) -> 'ResultCachePolicy | None':
+        if record is None:
+            return None
+        return cls(record['ttl'], record.get('env'), record.get('files'))
+
+    def to_dict(self) -> dict:
+        return {'ttl': self.ttl, 'env': self.env, 'files': self.files}
+
+    def get_fingerprint(self) -> str:
+        parts = []
+        for name in self.env:
+            value = os.environ.get(name)
+            # Unset and empty variables have to differ
+            parts.append(f"env:{name}={'-' if value is None else '+' + value}")
+        for file_path in self.files:
+            try:
+                file_stat = os.stat(file_path)
+                parts.append(f"file:{file_path}={file_stat.st_mtime_ns}:{file_stat.st_size}")
+            except OSError:
+                parts.append(f"file:{file_path}=missing")
+        return '\0'.join(parts)
+
+    def __str__(self):
+        return f"ttl {self.ttl:g}s, env {self.env}, files {self.files}"
+
+
+class ResultCacheEntry:
+    __slots__ = ['command', 'created', 'size', 'total_bytes', 'return_code']
+    command: str
+    created: float  # time.time() of the run the output comes from
+    size: int  # bytes of the output file
+    total_bytes: int  # bytes the command wrote, same as size unless it wrote invalid UTF-8
+    return_code: int
+
+    def __init__(self, command: str, created: float, size: int, total_bytes: int, return_code: int):
+        self.command = command
+        self.created = created
+        self.size = size
+        self.total_bytes = total_bytes
+        self.return_code = return_code
+
+
+class TaskResultCache:
+    """
+    On-disk cache of outputs of successful runs, keyed by a hash of the command and the fingerprint of its
+    ResultCachePolicy, so the key changes with anything the output is declared to depend on.
+    Every output is a file named by its key, the index keeps them in least recently used order
+    and the oldest ones are removed once all of them take more than max_size bytes
+    """
+    _lock = threading.Lock()
+    _enabled: bool = True
+    _dir_path: str | None = None
+    _max_size: int = DEFAULT_RESULT_CACHE_SIZE
+    _index: OrderedDict[str, ResultCacheEntry] | None = None
+    _size: int = 0
+
+    @classmethod
+    def configure(cls, enabled: bool, dir_path: str | None = None, max_size: int = DEFAULT_RESULT_CACHE_SIZE):
+        """
+        :param dir_path: directory of cached outputs, 'cache/results' in project root when not given
+        """
+        if max_size < 0:
+            raise ValueError("Result cache size can't be negative")
+        with cls._lock:
+            cls._enabled = enabled
+            cls._dir_path = dir_path
+            cls._max_size = max_size
+            cls._index = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._enabled
+
+    @classmethod
+    def get_key(cls, command: str, policy: ResultCachePolicy) -> str:
+        return hashlib.sha256((command + '\0' + policy.get_fingerprint()).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get(cls, key: str, ttl: float) -> tuple[ResultCacheEntry, str] | None:
+        """
+        :return: cached entry and output, None when there is none or it's older than ttl seconds
+        """
+        with cls._lock:
+            index = cls.__get_index()
+            entry = index.get(key)
+            if entry is not None and time.time() - entry.created > ttl:
+                cls.__remove(key)
+                cls.__save_index()
+                entry = None
+            if entry is None:
+                Instrumentation.count('result_cache.misses')
+                return None
+            try:
+                with open(cls.__get_output_file_path(key), 'r', encoding='utf-8') as file:
+                    text = file.read()
+            except OSError as e:
+                Logger.log(f"Dropping unreadable cached result {key}: {e}")
+                cls.__remove(key)
+                cls.__save_index()
+                Instrumentation.count('result_cache.misses')
+                return None
+            # New order is saved with the next put, losing it only makes eviction a bit less accurate
+            index.move_to_end(key)
+            Instrumentation.count('result_cache.hits')
+            return entry, text
+
+    @classmethod
+    def put(cls, key: str, command: str, text: str, total_bytes: int, return_code: int):
+        data = text.encode('utf-8')
+        with cls._lock:
+            if len(data) > cls._max_size:
+                return
+            index = cls.__get_index()
+            cls.__remove(key)
+            # Written aside and swapped, so a reader never sees half of an output
+            output_file_path = cls.__get_output_file_path(key)
+            with open(output_file_path + '.tmp', 'wb') as file:
+                file.write(data)
+            os.replace(output_file_path + '.tmp', output_file_path)
+            index[key] = ResultCacheEntry(command, time.time(), len(data), total_bytes, return_code)
+            cls._size += len(data)
+            while cls._size > cls._max_size:
+                cls.__remove(next(iter(index)))
+                Instrumentation.count('result_cache.evictions')
+            cls.__save_index()
+
+    @classmethod
+    def get_status_msg(cls) -> str:
+        with cls._lock:
+            # Disabled cache is never read or created, not even to show how much it holds
+            if not cls._enabled:
+                return "Result cache disabled"
+            index = cls.__get_index()
+            return (f"Result cache enabled: {len(index)} outputs, "
+                    f"{cls._size} of {cls._max_size} bytes in {cls.__get_dir_path()}")
+
+    @classmethod
+    def __get_dir_path(cls) -> str:
+        return cls._dir_path or get_result_cache_dir_path()
+
+    @classmethod
+    def __get_output_file_path(cls, key: str) -> str:
+        return os.path.join(cls.__get_dir_path(), key + '.out')
+
+    @classmethod
+    def __get_index(cls) -> OrderedDict[str, ResultCacheEntry]:
+        # Called with lock held, index is read on first use so tasks without a policy never touch the disk
+        if cls._index is not None:
+            return cls._index
+        dir_path = cls.__get_dir_path()
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        cls._index = OrderedDict()
+        try:
+            with open(os.path.join(dir_path, INDEX_FILE_NAME), 'rb') as file:
+                version, index = pickle.load(file)
+            if version == RESULT_CACHE_FORMAT_VERSION:
+                cls._index = index
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Outputs left without an entry are overwritten when the same key is cached again
+            Logger.log(f"Ignoring unreadable result cache index in {dir_path}: {e}")
+        cls._size = sum(entry.size for entry in cls._index.values())
+        return cls._index
+
+    @classmethod
+    def __remove(cls, key: str):
+        entry = cls._index.pop(key, None)
+        if entry is None:
+            return
+        cls._size -= entry.size
+        try:
+            os.remove(cls.__get_output_file_path(key))
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def __save_index(cls):
+        index_file_path = os.path.join(cls.__get_dir_path(), INDEX_FILE_NAME)
+        with open(index_file_path + '.tmp', 'wb') as file:
+            pickle.dump((RESULT_CACHE_FORMAT_VERSION, cls._index), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(index_file_path + '.tmp', index_file_path)
@@ -0,0 +1,93 @@
+from _datetime import datetime
+import os
+import subprocess
+import sys
+import time
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_max_rss_unit = 1 if sys.platform == 'darwin' else 1024
+
+
+class TaskRun:
+    """
+    Resources used by one execution of a task command.
+    CPU times and max RSS are None when the platform (or the engine) can't tell them, see wait_process.
+    Cached run didn't start any process, its output and return code come from TaskResultCache
+    """
+    __slots__ = ['begin_date', 'finish_date', 'return_code', 'wall_time', 'user_time', 'system_time', 'max_rss',
+                 'cached', 'output_path']
+    begin_date: datetime
+    finish_date: datetime
+    return_code: int | None
+    wall_time: float
+    user_time: float | None
+    system_time: float | None
+    max_rss: int | None
+    cached: bool
+    output_path: str | None  # segment of TaskOutputStore holding the whole output, see TaskOutputSegment.open
+
+    def __init__(self, begin_date: datetime, finish_date: datetime, return_code: int | None, wall_time: float,
+                 user_time: float | None = None, system_time: float | None = None, max_rss: int | None = None,
+                 cached: bool = False):
+        self.begin_date = begin_date
+        self.finish_date = finish_date
+        self.return_code = return_code
+        self.wall_time = wall_time
+        self.user_time = user_time
+        self.system_time = system_time
+        self.max_rss = max_rss
+        self.cached = cached
+        self.output_path = None
+
+    def get_cpu_time(self) -> float | None:
+        if self.user_time is None:
+            return None
+        return self.user_time + self.system_time
+
+    def to_dict(self) -> dict:
+        return {'beginDate': self.begin_date.isoformat(), 'finishDate': self.finish_date.isoformat(),
+                'returnCode': self.return_code, 'wallTime': self.wall_time, 'userTime': self.user_time,
+                'systemTime': self.system_time, 'maxRss': self.max_rss, 'cached': self.cached,
+                'outputPath': self.output_path}
+
+    def get_msg(self) -> str:
+        msg = (f"{self.begin_date.isoformat(sep=' ', timespec='seconds')}: exit code {self.return_code}, "
+               f"wall {self.wall_time:.3f}s")
+        if self.user_time is not None:
+            msg += f", user {self.user_time:.3f}s, sys {self.system_time:.3f}s, max RSS {get_size_msg(self.max_rss)}"
+        if self.cached:
+            msg += ", cache hit"
+        return msg
+
+
+def get_size_msg(size: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def wait_process(process: subprocess.Popen, begin_date: datetime, begin_time: float) -> TaskRun:
+    """
+    Waits for the process and collects what it used with os.wait4, where available.
+    Resource usage of every child is only known to the one that reaps it, so the process must not be waited on
+    anywhere else. If it was reaped by someone else anyway (e.g. poll() inside terminate()), only the return code
+    and wall time are recorded
+
+    :param begin_time: time.monotonic() taken when the process was spawned
+    """
+    usage = None
+    if hasattr(os, 'wait4') and process.returncode is None:
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+            # Popen doesn't know the process is gone, without this it would signal a pid that may be reused
+            process.returncode = os.waitstatus_to_exitcode(status)
+        except ChildProcessError:
+            usage = None
+    return_code = process.wait()
+    wall_time = time.monotonic() - begin_time
+    if usage is None:
+        return TaskRun(begin_date, datetime.now(), return_code, wall_time)
+    return TaskRun(begin_date, datetime.now(), return_code, wall_time, usage.ru_utime, usage.ru_stime,
+                   usage.ru_maxrss * _max_rss_unit)
@@ -0,0 +1,238 @@
+from src.task.TaskEngine import TaskEngineEnum, TaskEngineAbstract, ThreadTaskEngine, AsyncioTaskEngine, \
+    signal_process_group
+from enum import Enum
+import heapq
+import itertools
+import os
+import threading
+
+
+def get_default_worker_count() -> int:
+    return os.cpu_count() or 4
+
+
+class SchedulingPolicyEnum(Enum):
+    DEADLINE = 1, 'deadline'  # earliest deadline first, priority decides between equal deadlines
+    PRIORITY = 2, 'priority'  # most important first, deadline decides within a priority
+
+    def __str__(self):
+        return self.value[1]
+
+    def __init__(self, order: int, label: str):
+        self.order = order
+        self.label = label
+
+    @staticmethod
+    def get_scheduling_policy(label: str):
+        match label:
+            case 'deadline':
+                return SchedulingPolicyEnum.DEADLINE
+            case 'priority':
+                return SchedulingPolicyEnum.PRIORITY
+            case _d:
+                return None
+
+
+def get_task_sort_key(task: 'Task', policy: SchedulingPolicyEnum = SchedulingPolicyEnum.DEADLINE) -> tuple:
+    # Tasks without deadline go after every task with one
+    deadline = task.deadlineDate.timestamp() if task.deadlineDate else float('inf')
+    if policy is SchedulingPolicyEnum.PRIORITY:
+        return task.priority.order, deadline
+    return deadline, task.priority.order
+
+
+def create_engine(engine_type: TaskEngineEnum) -> TaskEngineAbstract:
+    match engine_type:
+        case TaskEngineEnum.THREAD:
+            return ThreadTaskEngine(TaskScheduler)
+        case TaskEngineEnum.ASYNCIO:
+            return AsyncioTaskEngine(TaskScheduler)
+        case _d:
+            raise SchedulerConfigurationException(f"Unknown task engine '{engine_type}'")
+
+
+class TaskScheduler:
+    """
+    Bounded pool of workers fed by a priority queue.
+    Tasks are picked by the earliest deadline (or by priority, see SchedulingPolicyEnum), so starting a lot of tasks
+    at once never runs more than worker_count commands at the same time
+    """
+    _lock = threading.Condition()
+    _queue: list[list] = []
+    _queue_entries: dict[int, list] = {}
+    _sequence = itertools.count()
+    _worker_count: int = get_default_worker_count()
+    _busy_workers: int = 0
+    _engine_type: TaskEngineEnum = TaskEngineEnum.THREAD
+    _policy: SchedulingPolicyEnum = SchedulingPolicyEnum.DEADLINE
+    _engine: TaskEngineAbstract | None = None
+    _stopped_engines: list[TaskEngineAbstract] = []
+    _running: bool = False
+
+    @classmethod
+    def configure(cls, worker_count: int, engine_type: TaskEngineEnum = TaskEngineEnum.THREAD,
+                  policy: SchedulingPolicyEnum = SchedulingPolicyEnum.DEADLINE):
+        if worker_count < 1:
+            raise SchedulerConfigurationException("Scheduler needs at least one worker")
+        with cls._lock:
+            if cls._running:
+                raise SchedulerConfigurationException("Can't reconfigure a running scheduler")
+            cls._worker_count = worker_count
+            cls._engine_type = engine_type
+            cls._policy = policy
+
+    @classmethod
+    def submit(cls, task: 'Task'):
+        cls.__join_stopped_engines()
+        with cls._lock:
+            if task.id in cls._queue_entries:
+                raise SchedulerConfigurationException(f"Task {task.id} is already queued")
+            # Entry is a list, so cancel can mark it without rebuilding the heap
+            entry = [*get_task_sort_key(task, cls._policy), next(cls._sequence), task]
+            cls._queue_entries[task.id] = entry
+            heapq.heappush(cls._queue, entry)
+            if not cls._running:
+                cls._running = True
+                cls._engine = create_engine(cls._engine_type)
+                cls._engine.start(cls._worker_count)
+            cls._lock.notify()
+            engine = cls._engine
+        engine.wake()
+
+    @classmethod
+    def cancel(cls, task: 'Task') -> bool:
+        """
+        Removes task from the queue
+
+        :return: True if task was still waiting in the queue, False if a worker already took it
+        """
+        with cls._lock:
+            entry = cls._queue_entries.pop(task.id, None)
+            if entry is None:
+                return False
+            entry[-1] = None
+            return True
+
+    @classmethod
+    def terminate_process(cls, task: 'Task'):
+        engine = cls.__get_signalling_engine()
+        if engine is not None:
+            engine.terminate_process(task)
+        elif task.commandProcess is not None:
+            signal_process_group(task.commandProcess, False)
+
+    @classmethod
+    def kill_process(cls, task: 'Task'):
+        engine = cls.__get_signalling_engine()
+        if engine is not None:
+            engine.kill_process(task)
+        elif task.commandProcess is not None:
+            signal_process_group(task.commandProcess, True)
+
+    @classmethod
+    def __get_signalling_engine(cls) -> TaskEngineAbstract | None:
+        # Commands left running by shutdown belong to the last stopped engine, a new one starts only after they
+        # finished. None once it's being joined, its processes are signalled directly then
+        with cls._lock:
+            if cls._engine is not None:
+                return cls._engine
+            return cls._stopped_engines[-1] if cls._stopped_engines else None
+
+    @classmethod
+    def queue_depth(cls) -> int:
+        return len(cls._queue_entries)
+
+    @classmethod
+    def busy_workers(cls) -> int:
+        return cls._busy_workers
+
+    @classmethod
+    def worker_count(cls) -> int:
+        return cls._worker_count
+
+    @classmethod
+    def engine_type(cls) -> TaskEngineEnum:
+        return cls._engine_type
+
+    @classmethod
+    def policy(cls) -> SchedulingPolicyEnum:
+        return cls._policy
+
+    @classmethod
+    def get_status_msg(cls) -> str:
+        return (f"Scheduler ({cls.engine_type()}, {cls.policy()} first): "
+                f"{cls.busy_workers()}/{cls.worker_count()} workers busy, {cls.queue_depth()} tasks queued")
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Drops queued tasks and lets idle workers exit. Commands that are already running are not touched,
+        a task submitted afterward waits for them to finish first
+        """
+        with cls._lock:
+            cls._queue.clear()
+            cls._queue_entries.clear()
+            cls._running = False
+            cls._lock.notify_all()
+            engine = cls._engine
+            cls._engine = None
+            if engine is not None:
+                cls._stopped_engines.append(engine)
+        if engine is not None:
+            engine.stop()
+
+    @classmethod
+    def join(cls):
+        """
+        Waits until commands left running by shutdown finished
+        """
+        cls.__join_stopped_engines()
+
+    @classmethod
+    def __join_stopped_engines(cls):
+        # Workers of a stopped engine may still run commands, a new engine starts only after them,
+        # so the two of them never run more than worker_count commands together
+        with cls._lock:
+            engines = cls._stopped_engines
+            cls._stopped_engines = []
+        for engine in engines:
+            engine.join()
+
+    @classmethod
+    def _is_running(cls) -> bool:
+        return cls._running
+
+    @classmethod
+    def _take_next_task(cls, wait: bool) -> 'Task | None':
+        """
+        Pops the most important queued task and marks it as running
+
+        :param wait: block until a task is queued, otherwise return None right away
+        :return: task to run or None when there's nothing to do / scheduler was shut down
+        """
+        with cls._lock:
+            while True:
+                while wait and cls._running and not cls._queue:
+                    cls._lock.wait()
+                if not cls._running or not cls._queue:
+                    return None
+                task = heapq.heappop(cls._queue)[-1]
+                if task is None:
+                    continue  # cancelled
+                del cls._queue_entries[task.id]
+                cls._busy_workers += 1
+                break
+        # Outside of the lock, state listeners and the watchdog may call back into the scheduler.
+        # Cancel meanwhile returns False, so the task is stopped like a running one
+        task._begin_execution()
+        return task
+
+    @classmethod
+    def _release_worker(cls):
+        with cls._lock:
+            cls._busy_workers -= 1
+
+
+class SchedulerConfigurationException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
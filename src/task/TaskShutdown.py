@@ -0,0 +1,94 @@
+from src.task.Task import Task, TaskState
+from src.task.TaskScheduler import TaskScheduler
+from collections.abc import Iterable
+import time
+
+DEFAULT_SHUTDOWN_GRACE_PERIOD = 3.0
+# Killed process can't ignore the signal, this only covers the kernel and the worker catching up
+KILL_WAIT_PERIOD = 1.0
+POLL_INTERVAL = 0.05
+
+
+class TaskShutdownReport:
+    __slots__ = ['cancelled', 'terminated', 'killed', 'unresponsive', 'wall_time']
+    cancelled: list[Task]  # still queued, or never started in this session
+    terminated: list[Task]  # exited within the grace period
+    killed: list[Task]  # still running after the grace period
+    unresponsive: list[Task]  # still not done after being killed, e.g. stuck spawning
+    wall_time: float
+
+    def __init__(self):
+        self.cancelled = []
+        self.terminated = []
+        self.killed = []
+        self.unresponsive = []
+        self.wall_time = 0.0
+
+    def get_summary_msg(self) -> str:
+        msg_list = [f"Stopped {len(self.cancelled) + len(self.terminated) + len(self.killed) + len(self.unresponsive)}"
+                    f" tasks in {self.wall_time:.2f}s: {len(self.cancelled)} cancelled, "
+                    f"{len(self.terminated)} terminated, {len(self.killed)} killed after grace period, "
+                    f"{len(self.unresponsive)} unresponsive"]
+        for label, tasks in (('Killed', self.killed), ('Unresponsive', self.unresponsive)):
+            for task in tasks:
+                msg_list.append(f"\n  {label}: '{task.name}' ({task.command})")
+        return ''.join(msg_list)
+
+
+class TaskShutdown:
+    """
+    Stops many tasks at once in bounded time: every command is asked to terminate first, all of them are waited for
+    against one deadline, and whatever is still running after it gets killed.
+    Exit time is about grace_period no matter how many tasks are running
+    """
+
+    @staticmethod
+    def stop_tasks(tasks: Iterable[Task], reason: str,
+                   grace_period: float = DEFAULT_SHUTDOWN_GRACE_PERIOD) -> TaskShutdownReport:
+        report = TaskShutdownReport()
+        begin_time = time.monotonic()
+        running = []
+        for task in tasks:
+            if task.state is not TaskState.QUEUED and task.state is not TaskState.IN_PROGRESS:
+                continue
+            # Task loaded as in progress has no command running in this session
+            if task._request_termination(reason) and task.commandFinished is not None:
+                running.append(task)
+            else:
+                report.cancelled.append(task)
+
+        pending = TaskShutdown.__wait(running, begin_time + grace_period, False)
+        # Command may have ended on its own between the state check and the request, its worker already finished it
+        report.terminated = [task for task in running if task not in pending and task.state is not TaskState.FINISHED]
+        report.unresponsive = TaskShutdown.__wait(pending, time.monotonic() + KILL_WAIT_PERIOD, True)
+        report.killed = [task for task in pending if task not in report.unresponsive]
+        for task in running + report.cancelled:
+            # Tasks their worker ended keep its state and finish date, the rest is ended here
+            if task.state is TaskState.QUEUED or task.state is TaskState.IN_PROGRESS:
+                task._mark_terminated()
+        report.wall_time = time.monotonic() - begin_time
+        return report
+
+    @staticmethod
+    def __wait(tasks: list[Task], deadline: float, kill: bool) -> list[Task]:
+        """
+        Signals every task as soon as its process exists and waits until all of them finish or deadline passes
+
+        :return: tasks still not finished
+        """
+        signalled = set()
+        pending = tasks
+        while True:
+            for task in pending:
+                # Worker may not have spawned the process yet, it's signalled once it's there
+                if task.id not in signalled and task.commandProcess is not None:
+                    signalled.add(task.id)
+                    if kill:
+                        TaskScheduler.kill_process(task)
+                    else:
+                        TaskScheduler.terminate_process(task)
+            pending = [task for task in pending if not task.commandFinished.is_set()]
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                return pending
+            pending[0].commandFinished.wait(min(POLL_INTERVAL, remaining))
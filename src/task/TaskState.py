@@ -6,6 +6,7 @@ class TaskState(Enum):
     IN_PROGRESS = (2, 'InProgress')
     FINISHED = (3, 'Finished')
     TERMINATED = (4, 'Terminated')
+    QUEUED = (5, 'Queued')
 
     def __str__(self):
         return self.value[1]
@@ -25,5 +26,7 @@ class TaskState(Enum):
                 return TaskState.FINISHED
             case 4:
                 return TaskState.TERMINATED
+            case 5:
+                return TaskState.QUEUED
             case _d:
                 return None
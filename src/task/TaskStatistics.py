@@ -0,0 +1,350 @@
+from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from src.task.TaskRegistry import TaskRegistry
+from src.task.LatencySketch import LatencySketch, get_histogram_msg
+from src.task.TaskRun import TaskRun, get_size_msg
+import threading
+
+LATENCY_GROUPS = ('category', 'priority', 'command')
+
+
+def get_complete_duration(task: Task) -> float | None:
+    if task.state is not TaskState.FINISHED and task.state is not TaskState.TERMINATED:
+        return None
+    if task.beginDate is None or task.finishDate is None:
+        return None  # terminated before it even started
+    return (task.finishDate - task.beginDate).total_seconds()
+
+
+def get_latency_msg(title: str, summary: dict) -> str:
+    if not summary['count']:
+        return f"{title}: no tasks"
+    msg = (f"{title}: count {summary['count']}, min {summary['min']:.3f}s, p50 {summary['p50']:.3f}s, "
+           f"p90 {summary['p90']:.3f}s, p99 {summary['p99']:.3f}s, max {summary['max']:.3f}s")
+    return msg + '\n' + get_histogram_msg(summary['histogram'])
+
+
+class DurationCounter:
+    __slots__ = ['total', 'count']
+    total: float
+    count: int
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, duration: float):
+        self.total += duration
+        self.count += 1
+
+    def remove(self, duration: float):
+        self.total -= duration
+        self.count -= 1
+
+    def get_avg(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+
+class ResourceCounter:
+    """
+    Resources used by all runs of one command, CPU time only counts runs that reported it.
+    Runs answered by the result cache are counted apart, they didn't use anything
+    """
+    __slots__ = ['runs', 'failed_runs', 'cached_runs', 'wall_time', 'cpu_time', 'max_rss']
+    runs: int
+    failed_runs: int
+    cached_runs: int
+    wall_time: float
+    cpu_time: float | None
+    max_rss: int | None
+
+    def __init__(self):
+        self.runs = 0
+        self.failed_runs = 0
+        self.cached_runs = 0
+        self.wall_time = 0.0
+        self.cpu_time = None
+        self.max_rss = None
+
+    def add(self, run: TaskRun):
+        if run.cached:
+            self.cached_runs += 1
+            return
+        self.runs += 1
+        if run.return_code != 0:
+            self.failed_runs += 1
+        self.wall_time += run.wall_time
+        if run.user_time is not None:
+            if self.cpu_time is None:
+                self.cpu_time = run.get_cpu_time()
+                self.max_rss = run.max_rss
+            else:
+                self.cpu_time += run.get_cpu_time()
+                self.max_rss = max(self.max_rss, run.max_rss)
+
+    def to_dict(self) -> dict:
+        return {'runs': self.runs, 'failedRuns': self.failed_runs, 'cachedRuns': self.cached_runs,
+                'wallTime': self.wall_time,
+                'cpuTime': self.cpu_time, 'maxRss': self.max_rss}
+
+
+class TaskStatistics:
+    """
+    Running task counts per state, priority and category and running sums of completion times.
+    Counters are updated when a task is added to / removed from the registry and on every task transition,
+    so reading any statistic never walks the tasks
+    """
+    __slots__ = ['registry', 'state_counts', 'priority_counts', 'category_counts', 'durations',
+                 'durations_by_state', 'durations_by_priority', 'durations_by_category', 'latencies', 'completed',
+                 'resources_by_command', 'lock']
+    registry: TaskRegistry
+    state_counts: dict[TaskState, int]
+    priority_counts: dict[TaskPriority, int]
+    category_counts: dict[TaskCategory, int]
+    durations: DurationCounter
+    durations_by_state: dict[TaskState, DurationCounter]
+    durations_by_priority: dict[TaskPriority, DurationCounter]
+    durations_by_category: dict[TaskCategory, DurationCounter]
+    # Completion time distribution of every run that finished or was terminated, per state and then per group,
+    # e.g. latencies[TaskState.FINISHED]['command']['make build']. Like resources_by_command it's history,
+    # a completion stays counted after its task is started again or removed
+    latencies: dict[TaskState, dict[str, dict[object, LatencySketch]]]
+    # Latest completion of every task with the groups it was counted in, so it can be taken back from the counters
+    # and moved between sketches (e.g. finished task terminated afterward) even after task dates change
+    completed: dict[int, tuple[float, TaskState, TaskPriority, TaskCategory, str]]
+    # Unlike the rest it's history, runs stay counted after their task is removed or started again
+    resources_by_command: dict[str, ResourceCounter]
+    lock: threading.RLock
+
+    def __init__(self, registry: TaskRegistry):
+        self.registry = registry
+        self.state_counts = {state: 0 for state in TaskState}
+        self.priority_counts = {priority: 0 for priority in TaskPriority}
+        self.category_counts = {category: 0 for category in TaskCategory}
+        self.durations = DurationCounter()
+        self.durations_by_state = {state: DurationCounter() for state in TaskState}
+        self.durations_by_priority = {priority: DurationCounter() for priority in TaskPriority}
+        self.durations_by_category = {category: DurationCounter() for category in TaskCategory}
+        self.latencies = {state: {group_name: {} for group_name in LATENCY_GROUPS}
+                          for state in (TaskState.FINISHED, TaskState.TERMINATED)}
+        self.completed = {}
+        self.resources_by_command = {}
+        self.lock = threading.RLock()
+        with registry.lock:
+            for task in registry:
+                self.__count_task(task, 1)
+                for run in task.commandRuns:
+                    self.__add_run(task, run)
+            registry.add_listener(self._on_registry_event)
+            Task.add_change_listener(self._on_task_changed)
+
+    def close(self):
+        """
+        Stops following the registry and its tasks, counters stay as they were
+        """
+        self.registry.remove_listener(self._on_registry_event)
+        Task.remove_change_listener(self._on_task_changed)
+
+    def get_state_counts(self) -> dict[str, int]:
+        return {str(state): count for state, count in self.state_counts.items() if count}
+
+    def get_priority_counts(self) -> dict[str, int]:
+        return {str(priority): count for priority, count in self.priority_counts.items() if count}
+
+    def get_category_counts(self) -> dict[str, int]:
+        return {str(category): count for category, count in self.category_counts.items() if count}
+
+    def get_avg_complete_time(self) -> float | None:
+        return self.durations.get_avg()
+
+    def get_avg_complete_times_by_state(self) -> dict[str, float]:
+        return {str(state): counter.get_avg() for state, counter in self.durations_by_state.items() if counter.count}
+
+    def get_avg_complete_times_by_priority(self) -> dict[str, float]:
+        return {str(priority): counter.get_avg() for priority, counter in self.durations_by_priority.items()
+                if counter.count}
+
+    def get_avg_complete_times_by_category(self) -> dict[str, float]:
+        return {str(category): counter.get_avg() for category, counter in self.durations_by_category.items()
+                if counter.count}
+
+    def get_summary(self) -> dict:
+        """
+        :return: every statistic as plain dict, ready to be dumped to JSON
+        """
+        with self.lock:
+            summary = self.get_counts_summary()
+            summary['completeTimeDistribution'] = self.get_latency_report()
+            summary['resourceUsageByCommand'] = self.get_resource_usage()
+            return summary
+
+    def get_counts_summary(self) -> dict:
+        """
+        :return: counts and average completion times, the part of get_summary that fits on one line each
+        """
+        with self.lock:
+            return {
+                'tasks': sum(self.state_counts.values()),
+                'states': self.get_state_counts(),
+                'priorities': self.get_priority_counts(),
+                'categories': self.get_category_counts(),
+                'completed': self.durations.count,
+                'resultCacheHits': sum(counter.cached_runs for counter in self.resources_by_command.values()),
+                'avgCompleteTime': self.get_avg_complete_time(),
+                'avgCompleteTimeByState': self.get_avg_complete_times_by_state(),
+                'avgCompleteTimeByPriority': self.get_avg_complete_times_by_priority(),
+                'avgCompleteTimeByCategory': self.get_avg_complete_times_by_category()
+            }
+
+    def get_resource_usage(self) -> dict[str, dict]:
+        """
+        :return: resources used by runs of every command, the most CPU hungry first
+        """
+        with self.lock:
+            counters = sorted(self.resources_by_command.items(), key=lambda item: item[1].cpu_time or 0.0,
+                              reverse=True)
+            return {command: counter.to_dict() for command, counter in counters}
+
+    def get_resource_usage_msg(self) -> str:
+        msg_list = []
+        for command, usage in self.get_resource_usage().items():
+            msg = f"{command}: {usage['runs']} runs ({usage['failedRuns']} failed), wall {usage['wallTime']:.3f}s"
+            if usage['cpuTime'] is not None:
+                msg += f", CPU {usage['cpuTime']:.3f}s, max RSS {get_size_msg(usage['maxRss'])}"
+            if usage['cachedRuns']:
+                msg += f", {usage['cachedRuns']} cache hits"
+            msg_list.append(msg)
+        return '\n'.join(msg_list)
+
+    def get_latency_sketch(self, state: TaskState, group_name: str | None = None,
+                           group_value=None) -> LatencySketch:
+        """
+        :return: completion times of tasks in given state, only of one group when group_name and group_value are given,
+            sketches of groups are merged otherwise
+        """
+        with self.lock:
+            groups = self.latencies[state][group_name or LATENCY_GROUPS[0]]
+            if group_name is not None:
+                return groups.get(group_value) or LatencySketch()
+            # Every task is in exactly one category, so merging categories gives all tasks of the state
+            merged = LatencySketch()
+            for sketch in groups.values():
+                merged.merge(sketch)
+            return merged
+
+    def get_latency_report(self) -> dict:
+        """
+        :return: percentiles and histogram of completion times, separately for finished and terminated tasks,
+            for all of them and grouped by category, priority and command
+        """
+        with self.lock:
+            report = {}
+            for state, groups in self.latencies.items():
+                state_report = {'all': self.get_latency_sketch(state).get_summary()}
+                for group_name, sketches in groups.items():
+                    state_report[group_name] = {str(group_value): sketch.get_summary()
+                                                for group_value, sketch in sketches.items() if sketch}
+                report[str(state)] = state_report
+            return report
+
+    def get_summary_msg(self) -> str:
+        # Distribution and resource usage don't fit on one line, see get_latency_report_msg and get_resource_usage_msg
+        summary = self.get_counts_summary()
+        return '\n'.join(f"{name}: {value}" for name, value in summary.items())
+
+    def get_latency_report_msg(self) -> str:
+        msg_list = []
+        for state, state_report in self.get_latency_report().items():
+            msg_list.append(f"--- {state} ---")
+            msg_list.append(get_latency_msg('all', state_report['all']))
+            for group_name in LATENCY_GROUPS:
+                for group_value, summary in state_report[group_name].items():
+                    msg_list.append(get_latency_msg(group_name + ' ' + group_value, summary))
+        return '\n'.join(msg_list)
+
+    def __count_task(self, task: Task, sign: int):
+        # Called with lock held or before listeners are registered
+        self.state_counts[task.state] += sign
+        self.priority_counts[task.priority] += sign
+        self.category_counts[task.category] += sign
+        if sign > 0:
+            self.__add_completed(task)
+        else:
+            self.__remove_completed(task.id, True)
+
+    def __add_completed(self, task: Task):
+        duration = get_complete_duration(task)
+        if duration is None:
+            return
+        self.completed[task.id] = (duration, task.state, task.priority, task.category, task.command)
+        self.durations.add(duration)
+        self.durations_by_state[task.state].add(duration)
+        self.durations_by_priority[task.priority].add(duration)
+        self.durations_by_category[task.category].add(duration)
+        for group_name, group_value in zip(LATENCY_GROUPS, (task.category, task.priority, task.command)):
+            sketches = self.latencies[task.state][group_name]
+            sketch = sketches.get(group_value)
+            if sketch is None:
+                sketch = sketches[group_value] = LatencySketch()
+            sketch.add(duration)
+
+    def __remove_completed(self, task_id: int, keep_latency: bool):
+        """
+        :param keep_latency: leave the completion in latency sketches, it's history once the task runs again
+        """
+        entry = self.completed.pop(task_id, None)
+        if entry is None:
+            return
+        duration, state, priority, category, command = entry
+        self.durations.remove(duration)
+        self.durations_by_state[state].remove(duration)
+        self.durations_by_priority[priority].remove(duration)
+        self.durations_by_category[category].remove(duration)
+        if keep_latency:
+            return
+        for group_name, group_value in zip(LATENCY_GROUPS, (category, priority, command)):
+            sketches = self.latencies[state][group_name]
+            sketches[group_value].remove(duration)
+            if not sketches[group_value]:
+                del sketches[group_value]  # commands come and go, empty sketches would pile up
+
+    def _on_registry_event(self, event: str, task: Task):
+        with self.lock:
+            match event:
+                case 'add':
+                    self.__count_task(task, 1)
+                case 'remove':
+                    self.__count_task(task, -1)
+
+    def _on_task_changed(self, task: Task, field_name: str, old_value, new_value):
+        if field_name == 'commandRuns':
+            self.__count_run(task, new_value)
+            return
+        match field_name:
+            case 'state':
+                counts = self.state_counts
+            case 'priority':
+                counts = self.priority_counts
+            case 'category':
+                counts = self.category_counts
+            case _d:
+                return
+        with self.registry.lock, self.lock:
+            if task not in self.registry:
+                return
+            counts[old_value] -= 1
+            counts[new_value] += 1
+            # Completion time is counted in the groups the task is in right now. Task that's no longer completed
+            # started again, its last completion stays in the sketches and the next one is added next to it
+            self.__remove_completed(task.id, get_complete_duration(task) is None)
+            self.__add_completed(task)
+
+    def __count_run(self, task: Task, run: TaskRun):
+        with self.registry.lock, self.lock:
+            if task in self.registry:
+                self.__add_run(task, run)
+
+    def __add_run(self, task: Task, run: TaskRun):
+        counter = self.resources_by_command.get(task.command)
+        if counter is None:
+            counter = self.resources_by_command[task.command] = ResourceCounter()
+        counter.add(run)
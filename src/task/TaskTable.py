@@ -0,0 +1,149 @@
+from src.task.Task import Task, TaskState
+from src.task.TaskRegistry import TaskRegistry
+import numpy as np
+import threading
+
+INITIAL_CAPACITY = 1024
+
+
+def to_epoch(date) -> float:
+    return date.timestamp() if date else np.nan
+
+
+class TaskTable:
+    """
+    Columnar snapshot of registry tasks for statistics.
+    Enums are kept as their order in small int arrays, dates as epoch seconds (NaN when missing),
+    so counting and durations run as NumPy operations instead of Python loops over Task objects.
+    Registry changes are only remembered and applied to the changed rows on the next sync()
+    """
+    __slots__ = ['registry', 'size', 'ids', 'states', 'priorities', 'categories', 'begin_dates', 'finish_dates',
+                 'deadline_dates', 'names', 'row_by_id', 'dirty_ids', 'lock']
+    registry: TaskRegistry
+    size: int
+    ids: np.ndarray
+    states: np.ndarray
+    priorities: np.ndarray
+    categories: np.ndarray
+    begin_dates: np.ndarray
+    finish_dates: np.ndarray
+    deadline_dates: np.ndarray
+    names: list[str]
+    row_by_id: dict[int, int]
+    dirty_ids: set[int]
+    lock: threading.Lock
+
+    def __init__(self, registry: TaskRegistry):
+        self.registry = registry
+        self.dirty_ids = set()
+        self.lock = threading.Lock()
+        with registry.lock:
+            registry.add_listener(self._on_registry_event)
+            self.__build(list(registry))
+
+    def close(self):
+        """
+        Stops following registry changes, sync() no longer sees them afterward
+        """
+        self.registry.remove_listener(self._on_registry_event)
+
+    def sync(self):
+        with self.lock:
+            for task_id in self.dirty_ids:
+                task = self.registry.get(task_id)
+                if task is None:
+                    self.__remove_row(task_id)
+                else:
+                    self.__set_row(task)
+            self.dirty_ids.clear()
+
+    def get_complete_durations(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: rows of finished / terminated tasks and their completion time in seconds
+        """
+        states = self.states[:self.size]
+        rows = np.flatnonzero((states == TaskState.FINISHED.order) | (states == TaskState.TERMINATED.order))
+        durations = self.finish_dates[rows] - self.begin_dates[rows]
+        known = ~np.isnan(durations)
+        return rows[known], durations[known]
+
+    def calc_complete_times(self) -> dict[str, float]:
+        rows, durations = self.get_complete_durations()
+        ids = self.ids[rows].tolist()
+        return {str(task_id) + ' | ' + self.names[row]: duration
+                for task_id, row, duration in zip(ids, rows.tolist(), durations.tolist())}
+
+    def calc_avg_complete_time(self) -> float | None:
+        _, durations = self.get_complete_durations()
+        return float(durations.mean()) if durations.size else None
+
+    def __build(self, tasks: list[Task]):
+        count = len(tasks)
+        capacity = max(INITIAL_CAPACITY, count)
+        self.size = count
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.priorities = np.zeros(capacity, dtype=np.int8)
+        self.categories = np.zeros(capacity, dtype=np.int8)
+        self.begin_dates = np.full(capacity, np.nan)
+        self.finish_dates = np.full(capacity, np.nan)
+        self.deadline_dates = np.full(capacity, np.nan)
+        self.ids[:count] = np.fromiter((task.id for task in tasks), dtype=np.int64, count=count)
+        self.states[:count] = np.fromiter((task.state.order for task in tasks), dtype=np.int8, count=count)
+        self.priorities[:count] = np.fromiter((task.priority.order for task in tasks), dtype=np.int8, count=count)
+        self.categories[:count] = np.fromiter((task.category.order for task in tasks), dtype=np.int8, count=count)
+        self.begin_dates[:count] = np.fromiter((to_epoch(task.beginDate) for task in tasks), dtype=float,
+                                               count=count)
+        self.finish_dates[:count] = np.fromiter((to_epoch(task.finishDate) for task in tasks), dtype=float,
+                                                count=count)
+        self.deadline_dates[:count] = np.fromiter((to_epoch(task.deadlineDate) for task in tasks), dtype=float,
+                                                  count=count)
+        self.names = [task.name for task in tasks]
+        self.row_by_id = {task.id: row for row, task in enumerate(tasks)}
+
+    def __set_row(self, task: Task):
+        row = self.row_by_id.get(task.id)
+        if row is None:
+            if self.size == len(self.ids):
+                self.__grow()
+            row = self.size
+            self.size += 1
+            self.row_by_id[task.id] = row
+            self.names.append(task.name)
+        self.ids[row] = task.id
+        self.states[row] = task.state.order
+        self.priorities[row] = task.priority.order
+        self.categories[row] = task.category.order
+        self.begin_dates[row] = to_epoch(task.beginDate)
+        self.finish_dates[row] = to_epoch(task.finishDate)
+        self.deadline_dates[row] = to_epoch(task.deadlineDate)
+        self.names[row] = task.name
+
+    def __remove_row(self, task_id: int):
+        # Last row is moved into the gap, so columns stay dense
+        row = self.row_by_id.pop(task_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            for column in (self.ids, self.states, self.priorities, self.categories, self.begin_dates,
+                           self.finish_dates, self.deadline_dates):
+                column[row] = column[last]
+            self.names[row] = self.names[last]
+            self.row_by_id[int(self.ids[row])] = row
+        self.names.pop()
+        self.size = last
+
+    def __grow(self):
+        capacity = len(self.ids) * 2
+        self.ids = np.resize(self.ids, capacity)
+        self.states = np.resize(self.states, capacity)
+        self.priorities = np.resize(self.priorities, capacity)
+        self.categories = np.resize(self.categories, capacity)
+        self.begin_dates = np.resize(self.begin_dates, capacity)
+        self.finish_dates = np.resize(self.finish_dates, capacity)
+        self.deadline_dates = np.resize(self.deadline_dates, capacity)
+
+    def _on_registry_event(self, event: str, task: Task):
+        with self.lock:
+            self.dirty_ids.add(task.id)
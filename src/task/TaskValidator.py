@@ -1,18 +1,21 @@
 from src.task.TaskState import TaskState
 from src.task.TaskExceptions import InvalidStateChangeException, CorruptedTaskDataException, \
     NotAllowedTaskOperationException
+from collections.abc import Callable
 
 
 class TaskValidator:
     @classmethod
-    def validate_start_task(cls, task: 'Task'):
+    def validate_start_task(cls, task: 'Task', report: Callable[[str], None] = print):
         if task.state is TaskState.FINISHED:
-            print(InvalidStateChangeException(
-                "Can't start a task that's already finished. Consider creating a new task."))
+            report(str(InvalidStateChangeException(
+                "Can't start a task that's already finished. Consider creating a new task.")))
         if task.state is TaskState.IN_PROGRESS:
-            print(InvalidStateChangeException("Can't start a task that's already running."))
+            report(str(InvalidStateChangeException("Can't start a task that's already running.")))
+        if task.state is TaskState.QUEUED:
+            report(str(InvalidStateChangeException("Can't start a task that's already waiting for a free worker.")))
         if task.state is TaskState.TERMINATED:
-            print(InvalidStateChangeException("Can't start a task that has already been terminated"))
+            report(str(InvalidStateChangeException("Can't start a task that has already been terminated")))
 
     @classmethod
     def validate_terminate_task(cls, task: 'Task'):
@@ -0,0 +1,75 @@
+from src.task.TaskScheduler import TaskScheduler
+import heapq
+import itertools
+import threading
+import time
+
+DEFAULT_KILL_GRACE_PERIOD = 5.0
+
+
+class TaskWatchdog:
+    """
+    Enforces task timeouts with one thread sleeping until the nearest expiry in a heap, not a timer per task.
+    Expired command is asked to terminate first, and killed when it's still running after the grace period.
+    Entries of commands that finished in time are not removed, they're dropped when they come up
+    """
+    _lock = threading.Condition()
+    _heap: list[tuple] = []
+    _sequence = itertools.count()
+    _thread: threading.Thread | None = None
+    _grace_period: float = DEFAULT_KILL_GRACE_PERIOD
+
+    @classmethod
+    def configure(cls, grace_period: float):
+        cls._grace_period = grace_period
+
+    @classmethod
+    def watch(cls, task: 'Task'):
+        """
+        Starts timeout of the current run of task, called when its command starts
+        """
+        if task.timeout is None:
+            return
+        cls.__push(time.monotonic() + task.timeout, task, 'terminate')
+
+    @classmethod
+    def pending_count(cls) -> int:
+        return len(cls._heap)
+
+    @classmethod
+    def __push(cls, expiry: float, task: 'Task', action: str):
+        with cls._lock:
+            # Finished event is new for every run, so an entry never fires for a later run of the same task
+            heapq.heappush(cls._heap, (expiry, next(cls._sequence), task, task.commandFinished, action))
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls.__watch_timeouts, name="TaskWatchdog", daemon=True)
+                cls._thread.start()
+            cls._lock.notify()
+
+    @classmethod
+    def __watch_timeouts(cls):
+        while True:
+            with cls._lock:
+                while not cls._heap or cls._heap[0][0] > time.monotonic():
+                    cls._lock.wait(cls._heap[0][0] - time.monotonic() if cls._heap else None)
+                _, _, task, finished, action = heapq.heappop(cls._heap)
+            if finished.is_set() or task.commandFinished is not finished:
+                continue
+            try:
+                cls.__expire(task, action)
+            except Exception as e:
+                print(f"Watchdog failed to stop task '{task.name}': {e}")
+
+    @classmethod
+    def __expire(cls, task: 'Task', action: str):
+        if action == 'terminate':
+            task._set_termination_reason(f"Timed out after {task.timeout:g}s")
+            if task.commandProcess is not None:
+                TaskScheduler.terminate_process(task)
+            cls.__push(time.monotonic() + cls._grace_period, task, 'kill')
+        elif task.commandProcess is not None:
+            task._set_termination_reason(f"{task.terminationReason}, killed after {cls._grace_period:g}s grace period")
+            TaskScheduler.kill_process(task)
+        else:
+            # Still spawning, try again once the process exists
+            cls.__push(time.monotonic() + cls._grace_period, task, 'kill')
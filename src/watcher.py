@@ -0,0 +1,194 @@
+from src.cache import TaskParseCache
+from src.loader import JsonTaskLoader, TaskLoadReport, try_parse_task_record
+from src.task.Task import Task, TaskState, TaskPriority, TaskCategory
+from src.task.Logger import Logger
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskResultCache import ResultCachePolicy
+import os
+import threading
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+def get_file_stat(file_path: str) -> os.stat_result | None:
+    try:
+        return os.stat(file_path)
+    except OSError:
+        return None
+
+
+def get_file_signature(file_stat: os.stat_result) -> tuple[int, int]:
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def get_task_definition(task: Task) -> tuple:
+    # Arguments of update_definition, so a rejected reload can put the old definition back
+    return (task.name, task.priority, task.category, task.description, task.deadlineDate, task.command, task.timeout,
+            task.dependsOn, task.resultCache)
+
+
+def is_task_running(task: Task) -> bool:
+    return task.state is TaskState.IN_PROGRESS or task.state is TaskState.QUEUED
+
+
+class TaskDirectoryWatcher:
+    """
+    Polls task directory and applies only added, changed and removed files to the live task registry.
+    Unchanged files are never parsed again. Changes to running tasks wait until the task stops running.
+    Reloaded dependencies are checked like at startup, a file that would break them is rejected and retried
+    on every poll, since the task it's missing may still be on its way
+    """
+    __slots__ = ['dir_path', 'tasks', 'poll_interval', 'cache', 'file_signatures', 'file_tasks', 'rejected_files',
+                 'thread', 'stop_event']
+    dir_path: str
+    tasks: TaskRegistry
+    poll_interval: float
+    cache: TaskParseCache | None
+    file_signatures: dict[str, tuple[int, int]]
+    file_tasks: dict[str, Task]
+    rejected_files: dict[str, str]  # file path -> why its reload was rejected
+    thread: threading.Thread | None
+    stop_event: threading.Event
+
+    def __init__(self, dir_path: str, tasks: TaskRegistry, load_report: TaskLoadReport,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, cache: TaskParseCache | None = None):
+        """
+        :param load_report: report of loading the tasks, files in it are in the same order as tasks.
+            Files are compared to how they were when loaded, not when the watcher starts
+        :param cache: parse cache the tasks were loaded with, kept up to date with reloaded files
+        """
+        self.dir_path = dir_path
+        self.tasks = tasks
+        self.poll_interval = poll_interval
+        self.cache = cache
+        self.file_tasks = dict(zip(load_report.loaded_files, tasks))
+        self.rejected_files = {}
+        self.file_signatures = {file_path: get_file_signature(file_stat)
+                                for file_path, file_stat in load_report.file_stats.items()}
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.__watch, name="TaskDirectoryWatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def poll(self) -> tuple[int, int, int]:
+        """
+        Applies changes made in directory since the last poll
+
+        :return: number of added, changed and removed tasks
+        """
+        removed = 0
+        file_paths = JsonTaskLoader.find_task_files(self.dir_path)
+        current_files = set(file_paths)
+        for file_path in self.file_signatures.keys() - current_files:
+            task = self.file_tasks.get(file_path)
+            if task is not None:
+                if is_task_running(task):
+                    continue  # retried on the next poll
+                self.tasks.remove(task)
+                del self.file_tasks[file_path]
+                removed += 1
+            del self.file_signatures[file_path]
+            if self.cache is not None:
+                self.cache.remove(file_path)
+
+        for file_path in self.rejected_files.keys() - current_files:
+            del self.rejected_files[file_path]
+
+        # Removals go first, so what they break isn't blamed on files reloaded below
+        applied = []  # (file path, task, definition before the reload or None for a new task)
+        errors_before = None
+        for file_path in file_paths:
+            file_stat = get_file_stat(file_path)
+            if file_stat is None:
+                continue  # removed in the meantime, dropped on the next poll
+            signature = get_file_signature(file_stat)
+            if self.file_signatures.get(file_path) == signature:
+                continue
+            task = self.file_tasks.get(file_path)
+            if task is not None and is_task_running(task):
+                continue  # retried on the next poll
+            record, error = try_parse_task_record(file_path)
+            self.file_signatures[file_path] = signature
+            if error is not None:
+                Logger.log(f"Failed to reload task file {file_path}: {error}")
+                continue
+            if self.cache is not None:
+                self.cache.put(file_path, file_stat, record)
+            if errors_before is None:
+                errors_before = JsonTaskLoader.find_dependency_errors(list(self.tasks))
+            if task is None:
+                task = JsonTaskLoader.create_task_from_record(record)
+                self.file_tasks[file_path] = task
+                self.tasks.add(task)
+                applied.append((file_path, task, None))
+            else:
+                applied.append((file_path, task, get_task_definition(task)))
+                self.__update_task(task, record)
+
+        rejected = self.__reject_dependency_errors(applied, errors_before or {}) if applied else set()
+        for file_path, _, _ in applied:
+            if file_path not in rejected:
+                self.rejected_files.pop(file_path, None)
+        added = sum(1 for file_path, _, definition in applied if definition is None and file_path not in rejected)
+        changed = sum(1 for file_path, _, definition in applied
+                      if definition is not None and file_path not in rejected)
+        if self.cache is not None:
+            self.cache.save()
+        if added or changed or removed:
+            Logger.log(f"Reloaded task definitions from {self.dir_path}: "
+                       f"{added} added, {changed} changed, {removed} removed")
+        return added, changed, removed
+
+    def __reject_dependency_errors(self, applied: list[tuple[str, Task, tuple | None]],
+                                   errors_before: dict[int, str]) -> set[str]:
+        """
+        Rolls back reloaded files that make dependencies fail the same checks as at startup
+
+        :return: paths of rejected files
+        """
+        rejected = set()
+        while True:
+            errors = {task_id: error for task_id, error in
+                      JsonTaskLoader.find_dependency_errors(list(self.tasks)).items() if task_id not in errors_before}
+            pending = [change for change in applied if change[0] not in rejected]
+            if not errors or not pending:
+                break
+            # Broken tasks are rolled back first. When only unchanged tasks broke, e.g. a task they depend on
+            # was renamed, every change of this poll is
+            to_reject = [change for change in pending if change[1].id in errors] or pending
+            for file_path, task, definition in to_reject:
+                reason = errors.get(task.id) or "Breaks dependencies of other tasks: " + next(iter(errors.values()))
+                if self.rejected_files.get(file_path) != reason:
+                    Logger.log(f"Rejected reload of task file {file_path}: {reason}")
+                self.rejected_files[file_path] = reason
+                rejected.add(file_path)
+                del self.file_signatures[file_path]
+                if definition is None:
+                    self.tasks.remove(task)
+                    del self.file_tasks[file_path]
+                else:
+                    task.update_definition(*definition)
+        return rejected
+
+    @staticmethod
+    def __update_task(task: Task, record: dict):
+        # Only the definition is reloaded, state and run dates belong to this session
+        task.update_definition(record['name'], TaskPriority.get_task_priority(record['priority']),
+                               TaskCategory.get_task_category(record['category']), record['description'],
+                               record['deadlineDate'], record['command'], record.get('timeout'),
+                               record.get('dependsOn'), ResultCachePolicy.from_record(record.get('resultCache')))
+
+    def __watch(self):
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                Logger.log(f"Task directory watcher failed to poll {self.dir_path}: {e}")
@@ -0,0 +1,46 @@
+from _datetime import datetime, timedelta
+from src.task.Logger import Logger, DEFAULT_FLUSH_SIZE, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_FILE_SIZE
+from src.task.Task import Task
+from src.task.TaskCategory import TaskCategory
+from src.task.TaskPriority import TaskPriority
+from src.task.TaskOutputStore import TaskOutputStore
+from src.task.TaskResultCache import TaskResultCache
+from src.task.TaskScheduler import TaskScheduler
+from src.task.TaskState import TaskState
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def log_dir(tmp_path_factory):
+    # Logs, stored outputs and cached results of the suite never end up in the project directory
+    Logger.configure(DEFAULT_FLUSH_SIZE, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_FILE_SIZE,
+                     str(tmp_path_factory.mktemp('logs')))
+    yield
+    Logger.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def isolated_task_environment():
+    TaskOutputStore.configure(False)
+    TaskResultCache.configure(False)
+    yield
+    TaskScheduler.shutdown()
+    TaskScheduler.join()
+
+
+def create_task(name: str, command: str = 'true', priority: TaskPriority = TaskPriority.NOT_URGENT_IMPORTANT,
+                category: TaskCategory = TaskCategory.WORK, deadline_date: datetime | None = None,
+                **kwargs) -> Task:
+    return Task.create_unfinished_task(name, priority, category, f"Test task {name}",
+                                       deadline_date or datetime.now() + timedelta(days=1), command, **kwargs)
+
+
+def create_loaded_task(name: str, state: TaskState, **kwargs) -> Task:
+    # Task as the loader creates it from a file saved in that state by an earlier session
+    return Task.create_task(name, state, TaskPriority.NOT_URGENT_IMPORTANT, TaskCategory.WORK, '', datetime(2025, 1, 1),
+                            None, datetime(2030, 1, 1), 'true', **kwargs)
+
+
+def wait_until_running(task: Task):
+    while task.commandProcess is None:
+        assert not task.commandFinished.wait(0.01), f"task '{task.name}' finished before it was seen running"
@@ -0,0 +1,119 @@
+from src import batch
+from src.batch import BatchExitStatusEnum
+from src.task.TaskScheduler import TaskScheduler, get_default_worker_count
+from src.task.TaskWatchdog import TaskWatchdog, DEFAULT_KILL_GRACE_PERIOD
+from tests.test_loader import write_task_file
+import json
+import pytest
+import sys
+
+
+@pytest.fixture
+def tasks_dir(tmp_path):
+    tasks_dir = tmp_path / 'tasks'
+    tasks_dir.mkdir()
+    yield tasks_dir
+    # Batch configures these for its own run, later tests expect the defaults
+    TaskScheduler.shutdown()
+    TaskScheduler.join()
+    TaskScheduler.configure(get_default_worker_count())
+    TaskWatchdog.configure(DEFAULT_KILL_GRACE_PERIOD)
+
+
+def run_batch(monkeypatch, tasks_dir, *args: str) -> tuple[int, dict | None]:
+    summary_file_path = tasks_dir.parent / 'summary.json'
+    monkeypatch.setattr(sys, 'argv', ['batch', '--tasks-dir', str(tasks_dir), '--no-output-store',
+                                      '--no-result-cache', '--output', str(summary_file_path), *args])
+    exit_code = batch.main()
+    if not summary_file_path.exists():
+        return exit_code, None
+    with open(summary_file_path) as file:
+        return exit_code, json.load(file)
+
+
+def get_result(summary: dict, name: str) -> dict:
+    return next(result for result in summary['results'] if result['name'] == name)
+
+
+def test_all_tasks_finished(monkeypatch, tasks_dir):
+    write_task_file(tasks_dir, 'build', command='echo built')
+    write_task_file(tasks_dir, 'test', command='true', dependsOn=['build'])
+    exit_code, summary = run_batch(monkeypatch, tasks_dir)
+    assert exit_code == BatchExitStatusEnum.SUCCESS.order == 0
+    assert summary['status'] == 'Success'
+    assert summary['tasks'] == 2
+    assert summary['failed'] == summary['skipped'] == summary['timedOut'] == 0
+    assert summary['states'] == {'Finished': 2}
+    assert summary['criticalPath']['tasks'] == ['build', 'test']
+    assert summary['statistics']['completed'] == 2
+    build = get_result(summary, 'build')
+    assert build['exitCode'] == 0
+    assert build['duration'] is not None
+    assert build['beginDate'] is not None and build['finishDate'] is not None
+
+
+def test_non_zero_exit_code_fails_batch(monkeypatch, tasks_dir):
+    write_task_file(tasks_dir, 'build', command='false')
+    write_task_file(tasks_dir, 'lint')
+    exit_code, summary = run_batch(monkeypatch, tasks_dir)
+    assert exit_code == BatchExitStatusEnum.TASK_FAILED.order == 1
+    assert summary['status'] == 'TaskFailed'
+    assert summary['failed'] == 1
+    build = get_result(summary, 'build')
+    assert build['failed']
+    assert build['exitCode'] == 1
+    assert not get_result(summary, 'lint')['failed']
+
+
+def test_timeout_terminates_running_tasks(monkeypatch, tasks_dir):
+    write_task_file(tasks_dir, 'slow', command='sleep 30')
+    write_task_file(tasks_dir, 'after', dependsOn=['slow'])
+    exit_code, summary = run_batch(monkeypatch, tasks_dir, '--timeout', '0.5', '--shutdown-grace', '1')
+    assert exit_code == BatchExitStatusEnum.TIMED_OUT.order == 2
+    assert summary['status'] == 'TimedOut'
+    assert summary['timedOut'] == 1
+    slow = get_result(summary, 'slow')
+    assert slow['timedOut']
+    assert slow['state'] == 'Terminated'
+    assert slow['terminationReason'] == "Batch timed out after 0.5s"
+    assert get_result(summary, 'after')['skipped'].startswith("Batch timed out")
+    assert summary['wallTime'] < 10
+
+
+def test_task_loaded_in_progress_fails_without_hanging(monkeypatch, tasks_dir):
+    write_task_file(tasks_dir, 'stale', state=2, beginDate='2025-01-01T00:00:00')
+    write_task_file(tasks_dir, 'after', dependsOn=['stale'])
+    exit_code, summary = run_batch(monkeypatch, tasks_dir, '--timeout', '10')
+    assert exit_code == BatchExitStatusEnum.TASK_FAILED.order
+    assert "can't run in this session" in get_result(summary, 'stale')['skipped']
+    assert get_result(summary, 'after')['skipped'] is not None
+    assert summary['timedOut'] == 0
+
+
+@pytest.mark.parametrize('args', [['--filter', 'unknownField=1'], ['--name', 'missing']])
+def test_usage_error(monkeypatch, tasks_dir, args):
+    write_task_file(tasks_dir, 'build')
+    exit_code, summary = run_batch(monkeypatch, tasks_dir, *args)
+    assert exit_code == BatchExitStatusEnum.USAGE_ERROR.order == 3
+    assert summary is None
+
+
+def test_unreadable_unselected_task_file_is_warning(monkeypatch, tasks_dir, capsys):
+    write_task_file(tasks_dir, 'build')
+    write_task_file(tasks_dir, 'after', dependsOn=['broken'])
+    (tasks_dir / 'broken.json').write_text('{')
+    exit_code, summary = run_batch(monkeypatch, tasks_dir, '--name', 'build')
+    assert exit_code == BatchExitStatusEnum.SUCCESS.order
+    assert summary['tasks'] == 1
+    assert "Warning: running without 2 files that failed to load" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('args', [['--name', 'after'], []], ids=['selected', 'all'])
+def test_selected_task_with_unreadable_dependency_is_usage_error(monkeypatch, tasks_dir, capsys, args):
+    write_task_file(tasks_dir, 'build')
+    write_task_file(tasks_dir, 'after', dependsOn=['broken'])
+    (tasks_dir / 'broken.json').write_text('{')
+    exit_code, summary = run_batch(monkeypatch, tasks_dir, *args)
+    assert exit_code == BatchExitStatusEnum.USAGE_ERROR.order
+    assert summary is None
+    assert "Selected tasks failed to load: after" in capsys.readouterr().err
@@ -0,0 +1,39 @@
+from src.menu.MenuRefactor import ConsoleWindowManager, MainConsoleWindow, MenuSettings
+from src.menu.TaskCharts import ChartData, TaskChartRenderer
+from src.task.TaskCategory import TaskCategory
+from src.task.TaskRegistry import TaskRegistry
+from tests.conftest import create_task
+import io
+import os
+import threading
+
+
+def test_charts_requested_before_quit_are_written(tmp_path):
+    chart_dir = tmp_path / 'charts'
+    renderer = TaskChartRenderer(str(chart_dir))
+    tasks = [create_task('work'), create_task('home', category=TaskCategory.PERSONAL)]
+    with TaskRegistry(tasks) as registry:
+        window_manager = ConsoleWindowManager(registry, chart_renderer=renderer)
+        window_manager.add_new_window(MainConsoleWindow(registry, MenuSettings(), renderer))
+        # Statistics, category and priority charts, then input runs out and the menu quits
+        window_manager.run_script(io.StringIO('2\n1\n2\n'))
+    assert sorted(os.listdir(chart_dir)) == ['categories.png', 'priorities.png']
+
+
+def test_wait_gives_up_after_timeout(tmp_path, monkeypatch):
+    release = threading.Event()
+    draw = ChartData.draw
+
+    def draw_slowly(chart, axes):
+        release.wait()
+        draw(chart, axes)
+
+    monkeypatch.setattr(ChartData, 'draw', draw_slowly)
+    renderer = TaskChartRenderer(str(tmp_path))
+    file_path, up_to_date = renderer.request(ChartData('slow', {'a': 1}, 'x', 'y', 'Slow'))
+    assert not up_to_date
+    assert not renderer.wait(0.1)
+    release.set()
+    assert renderer.wait(10.0)
+    assert os.path.exists(file_path)
+    assert renderer.request(ChartData('slow', {'a': 1}, 'x', 'y', 'Slow')) == (file_path, True)
@@ -0,0 +1,66 @@
+from src.menu.TaskDashboard import TaskDashboard
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskShutdown import DEFAULT_SHUTDOWN_GRACE_PERIOD
+from src.task.TaskState import TaskState
+from tests.conftest import create_task, wait_until_running
+import time
+
+WAIT_TIMEOUT = 10.0
+
+
+def wait_for_message(dashboard: TaskDashboard, prefix: str) -> str:
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        dashboard.update_message()
+        if dashboard.message.startswith(prefix):
+            return dashboard.message
+        time.sleep(0.01)
+    raise AssertionError(f"last message was '{dashboard.message}'")
+
+
+def test_start_reports_to_dashboard_instead_of_stdout(capsys):
+    task = create_task('started')
+    with TaskRegistry([task]) as tasks:
+        dashboard = TaskDashboard(tasks)
+        dashboard.handle_input(f"s {task.id}\n")
+        dashboard.update_message()
+        assert dashboard.message == "Task: started queued"
+        assert task.commandFinished.wait(WAIT_TIMEOUT)
+        dashboard.handle_input(f"s {task.id}\n")
+        assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert capsys.readouterr().out == ''
+
+
+def test_terminate_runs_off_the_ui_thread(capsys):
+    task = create_task('stopped', 'sleep 30')
+    with TaskRegistry([task]) as tasks:
+        dashboard = TaskDashboard(tasks)
+        task.start_task()
+        wait_until_running(task)
+        begin_time = time.monotonic()
+        dashboard.execute(f"t {task.id}")
+        assert time.monotonic() - begin_time < DEFAULT_SHUTDOWN_GRACE_PERIOD
+        dashboard.update_message()
+        # Stopping a command that exits on SIGTERM may be done already
+        assert (dashboard.message == f"Stopping task {task.id}..." or
+                dashboard.message.startswith(f"Task {task.id}: Stopped"))
+        assert wait_for_message(dashboard, f"Task {task.id}: Stopped 1 tasks")
+        assert task.state is TaskState.TERMINATED
+        assert task.terminationReason == "Terminated from dashboard"
+        dashboard.execute(f"t {task.id}")
+        assert wait_for_message(dashboard, f"Task {task.id} is not running")
+    # Only the start outside the dashboard printed, stdout isn't redirected while the dashboard is stopping a task
+    assert capsys.readouterr().out == "Task: stopped queued\n"
+
+
+def test_unknown_commands_and_tasks_are_reported():
+    with TaskRegistry() as tasks:
+        dashboard = TaskDashboard(tasks)
+        dashboard.execute('x')
+        dashboard.update_message()
+        assert dashboard.message.startswith("Unknown command 'x'")
+        dashboard.execute('s 404')
+        dashboard.update_message()
+        assert dashboard.message == "No task with id '404'"
+        dashboard.execute('q')
+        assert not dashboard.running
@@ -0,0 +1,38 @@
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskScheduler import TaskScheduler
+from src.task.TaskState import TaskState
+from tests.conftest import create_task, wait_until_running
+import pytest
+
+WAIT_TIMEOUT = 10.0
+
+
+def test_asyncio_shutdown_lets_running_commands_finish():
+    TaskScheduler.configure(2, TaskEngineEnum.ASYNCIO)
+    task = create_task('sleeper', 'sleep 0.3')
+    task.start_task()
+    wait_until_running(task)
+    TaskScheduler.shutdown()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert task.state is TaskState.FINISHED
+    assert task.commandRuns[-1].return_code == 0
+    TaskScheduler.join()
+
+
+# Stopping the loop from outside is the failure simulated here, the loop thread reports it as it ends
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_asyncio_stopped_loop_terminates_running_tasks():
+    TaskScheduler.configure(1, TaskEngineEnum.ASYNCIO)
+    task = create_task('stuck', 'sleep 30')
+    task.start_task()
+    wait_until_running(task)
+    engine = TaskScheduler._engine
+    engine.loop.call_soon_threadsafe(engine.loop.stop)
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert task.state is TaskState.TERMINATED
+    assert task.terminationReason == "Event loop stopped before the command finished"
+    engine.loop_thread.join(WAIT_TIMEOUT)
+    assert engine.loop.is_closed()
+    # Signals sent after the loop closed are dropped instead of raising
+    engine.terminate_process(task)
+    engine.kill_process(task)
@@ -0,0 +1,72 @@
+from src.task.TaskGraph import TaskGraph, TaskGraphExecutor
+from src.task.TaskState import TaskState
+from tests.conftest import create_task, create_loaded_task
+import pytest
+
+WAIT_TIMEOUT = 10.0
+
+
+def test_runs_tasks_in_dependency_order():
+    first = create_task('first', 'sleep 0.1')
+    second = create_task('second', depends_on=['first'])
+    third = create_task('third', depends_on=['first', 'second'])
+    executor = TaskGraphExecutor(TaskGraph([first, second, third]), [third, second, first])
+    assert executor.run(WAIT_TIMEOUT)
+    assert [task.name for task in executor.started] == ['first', 'second', 'third']
+    assert all(task.state is TaskState.FINISHED for task in (first, second, third))
+    assert [task.name for task in executor.get_critical_path()[0]] == ['first', 'second', 'third']
+
+
+def test_failed_dependency_skips_dependents():
+    broken = create_task('broken', 'true', timeout=0.2)
+    broken.command = 'sleep 5'
+    dependent = create_task('dependent', depends_on=['broken'])
+    executor = TaskGraphExecutor(TaskGraph([broken, dependent]), [broken, dependent])
+    assert executor.run(WAIT_TIMEOUT)
+    assert broken.state is TaskState.TERMINATED
+    assert "'broken' ended as Terminated" in executor.skipped[dependent.id]
+    assert dependent.state is TaskState.TO_DO
+
+
+def test_non_zero_exit_code_skips_dependents():
+    first = create_task('first')
+    failing = create_task('failing', 'exit 3', depends_on=['first'])
+    last = create_task('last', depends_on=['failing'])
+    executor = TaskGraphExecutor(TaskGraph([first, failing, last]), [first, failing, last])
+    assert executor.run(WAIT_TIMEOUT)
+    assert failing.state is TaskState.FINISHED
+    assert failing.commandRuns[-1].return_code == 3
+    assert "'failing' exited with code 3" in executor.skipped[last.id]
+    assert last.state is TaskState.TO_DO
+    assert [task.name for task in executor.started] == ['first', 'failing']
+
+
+def test_dependency_failed_earlier_skips_dependent():
+    failing = create_task('failing', 'exit 3')
+    dependent = create_task('dependent', depends_on=['failing'])
+    assert TaskGraphExecutor(TaskGraph([failing, dependent]), [failing]).run(WAIT_TIMEOUT)
+    executor = TaskGraphExecutor(TaskGraph([failing, dependent]), [dependent])
+    assert executor.run(WAIT_TIMEOUT)
+    assert executor.skipped[dependent.id] == "Depends on 'failing' which exited with code 3 and not run now"
+    assert executor.started == []
+
+
+def test_cycle_is_skipped():
+    first = create_task('first', depends_on=['second'])
+    second = create_task('second', depends_on=['first'])
+    executor = TaskGraphExecutor(TaskGraph([first, second]), [first, second])
+    assert executor.run(WAIT_TIMEOUT)
+    assert executor.started == []
+    assert executor.skipped[first.id].startswith("Dependency cycle")
+
+
+@pytest.mark.parametrize('state', [TaskState.QUEUED, TaskState.IN_PROGRESS])
+def test_task_loaded_as_running_is_skipped_instead_of_waited_for(state):
+    stale = create_loaded_task('stale', state)
+    dependent = create_task('dependent', depends_on=['stale'])
+    independent = create_task('independent')
+    executor = TaskGraphExecutor(TaskGraph([stale, dependent, independent]), [stale, dependent, independent])
+    assert executor.run(WAIT_TIMEOUT)
+    assert "can't run in this session" in executor.skipped[stale.id]
+    assert dependent.id in executor.skipped
+    assert independent.state is TaskState.FINISHED
@@ -0,0 +1,108 @@
+from src.instrumentation import Instrumentation, NullTimer, Timer
+from src.loader import JsonTaskLoader, TaskLoadReport
+from tests.test_loader import write_task_file
+import json
+import pytest
+import threading
+
+
+@pytest.fixture
+def instrumentation():
+    enabled = Instrumentation.enabled
+    Instrumentation.reset()
+    Instrumentation.configure(True)
+    yield Instrumentation
+    Instrumentation.configure(enabled)
+    Instrumentation.reset()
+
+
+def test_disabled_instrumentation_records_nothing(instrumentation):
+    instrumentation.disable()
+    instrumentation.count('calls')
+    instrumentation.add_time('step', 1.0)
+    timer = instrumentation.timer('step')
+    assert isinstance(timer, NullTimer)
+    assert instrumentation.timer('other') is timer
+    with timer:
+        pass
+    report = instrumentation.get_report()
+    assert not report['enabled']
+    assert report['timers'] == {} and report['counters'] == {}
+
+
+def test_counters_add_up_across_threads(instrumentation):
+    def count():
+        for _ in range(1000):
+            instrumentation.count('calls')
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    instrumentation.count('files', 5)
+    assert instrumentation.get_report()['counters'] == {'calls': 4000, 'files': 5}
+
+
+def test_timer_statistics(instrumentation):
+    for seconds in (0.1, 0.3, 0.2):
+        instrumentation.add_time('step', seconds)
+    with instrumentation.timer('block') as timer:
+        assert isinstance(timer, Timer)
+    timers = instrumentation.get_report()['timers']
+    assert timers['step']['count'] == 3
+    assert timers['step']['total'] == pytest.approx(0.6)
+    assert timers['step']['avg'] == pytest.approx(0.2)
+    assert timers['step']['min'] == 0.1 and timers['step']['max'] == 0.3
+    assert timers['block']['count'] == 1 and timers['block']['total'] >= 0
+
+
+def test_timer_records_time_when_block_raises(instrumentation):
+    with pytest.raises(ValueError):
+        with instrumentation.timer('failing'):
+            raise ValueError()
+    assert instrumentation.get_report()['timers']['failing']['count'] == 1
+
+
+def test_reset_clears_timers_and_counters(instrumentation):
+    instrumentation.count('calls')
+    instrumentation.add_time('step', 0.1)
+    instrumentation.reset()
+    report = instrumentation.get_report()
+    assert report['timers'] == {} and report['counters'] == {}
+
+
+def test_report_msg_lists_timers_and_counters(instrumentation):
+    instrumentation.add_time('step', 0.002)
+    instrumentation.count('calls', 3)
+    msg_lines = instrumentation.get_report_msg().split('\n')
+    assert msg_lines[0].startswith("Instrumentation enabled")
+    assert msg_lines[1] == "step: 1 x avg 2.000ms, max 2.000ms, total 0.002s"
+    assert msg_lines[2] == "calls: 3"
+
+
+def test_shutdown_exports_json_report(instrumentation, tmp_path):
+    export_file_path = str(tmp_path / 'metrics.json')
+    instrumentation.configure(True, export_file_path=export_file_path)
+    instrumentation.count('calls', 2)
+    instrumentation.add_time('step', 0.5)
+    try:
+        assert instrumentation.shutdown() == [export_file_path]
+    finally:
+        instrumentation.configure(True)
+    with open(export_file_path) as file:
+        report = json.load(file)
+    assert report['counters'] == {'calls': 2}
+    assert report['timers']['step'] == {'count': 1, 'total': 0.5, 'avg': 0.5, 'min': 0.5, 'max': 0.5}
+
+
+def test_shutdown_without_outputs_writes_nothing(instrumentation):
+    assert instrumentation.shutdown() == []
+
+
+def test_loader_counts_parsed_files(instrumentation, tmp_path):
+    for name in ('a', 'b', 'c'):
+        write_task_file(tmp_path, name, name=name)
+    JsonTaskLoader.load_all_tasks(str(tmp_path), TaskLoadReport())
+    report = instrumentation.get_report()
+    assert report['counters']['loader.files_parsed'] == 3
+    assert report['timers']['loader.parse_files']['count'] == 1
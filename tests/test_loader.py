@@ -0,0 +1,102 @@
+from src.cache import TaskParseCache, CACHE_FORMAT_VERSION
+from src.loader import JsonTaskLoader, TaskLoadReport, PARALLEL_LOAD_THRESHOLD
+from src.task.TaskState import TaskState
+import json
+import os
+import pickle
+import pytest
+
+
+def write_task_file(dir_path, file_name: str, **fields) -> str:
+    record = {'name': file_name, 'state': 1, 'priority': 2, 'category': 1, 'description': '', 'beginDate': None,
+              'finishDate': None, 'deadlineDate': '2030-01-01T00:00:00', 'command': 'true', **fields}
+    file_path = os.path.join(dir_path, file_name + '.json')
+    with open(file_path, 'w') as file:
+        json.dump(record, file)
+    return file_path
+
+
+@pytest.mark.parametrize('use_processes', [False, True], ids=['threads', 'processes'])
+def test_bad_files_are_reported_and_the_rest_loaded(tmp_path, use_processes):
+    file_count = 2 * PARALLEL_LOAD_THRESHOLD
+    for i in range(file_count):
+        write_task_file(tmp_path, f'task{i:03}', state=3 if i % 2 else 1)
+    (tmp_path / 'task010.json').write_text('{')
+    write_task_file(tmp_path, 'task020', state=9)
+    with open(tmp_path / 'task030.json', 'w') as file:
+        json.dump({'name': 'task030', 'state': 1}, file)
+    nested = tmp_path / 'nested'
+    nested.mkdir()
+    write_task_file(nested, 'deeper')
+
+    report = TaskLoadReport()
+    tasks = JsonTaskLoader.load_all_tasks(str(tmp_path), report, max_workers=4, use_processes=use_processes)
+    assert len(tasks) == file_count - 3 + 1
+    assert sorted(os.path.basename(path) for path in report.errors) == ['task010.json', 'task020.json',
+                                                                        'task030.json']
+    assert report.errors[str(tmp_path / 'task010.json')].startswith('JSONDecodeError')
+    assert "Unknown task state '9'" in report.errors[str(tmp_path / 'task020.json')]
+    assert "missing field 'priority'" in report.errors[str(tmp_path / 'task030.json')]
+    assert len(report.loaded_files) == len(tasks)
+    assert "3 files failed" in report.get_summary_msg()
+    # Same order as the sorted files, whatever order the pool finished in
+    assert [task.name for task in tasks] == [os.path.splitext(os.path.basename(path))[0]
+                                             for path in report.loaded_files]
+    assert tasks[0].name == 'deeper'
+    assert tasks[2].name == 'task001' and tasks[2].state is TaskState.FINISHED
+
+
+def test_errors_are_printed_without_report(tmp_path, capsys):
+    write_task_file(tmp_path, 'good')
+    (tmp_path / 'bad.json').write_text('[]')
+    tasks = JsonTaskLoader.load_all_tasks(str(tmp_path))
+    assert [task.name for task in tasks] == ['good']
+    assert "Loaded 1 tasks, 1 files failed" in capsys.readouterr().out
+
+
+def test_cached_record_without_new_fields_is_parsed_again(tmp_path):
+    tasks_dir = tmp_path / 'tasks'
+    tasks_dir.mkdir()
+    file_path = write_task_file(tasks_dir, 'cached', timeout=5, dependsOn=[], resultCache={'ttl': 60})
+    cache = TaskParseCache(str(tmp_path / 'tasks.cache'))
+    # Record as an older version cached it, before timeout, dependsOn and resultCache existed
+    stale_record = {'name': 'cached', 'state': 1, 'priority': 2, 'category': 1, 'description': '', 'beginDate': None,
+                    'finishDate': None, 'deadlineDate': None, 'command': 'true'}
+    cache.put(file_path, os.stat(file_path), stale_record)
+
+    tasks = JsonTaskLoader.load_all_tasks(str(tasks_dir), TaskLoadReport(), cache=cache)
+    assert tasks[0].timeout == 5
+    assert tasks[0].resultCache.ttl == 60
+    assert cache.get(file_path, os.stat(file_path))['timeout'] == 5
+
+
+def test_cache_of_other_format_version_is_dropped(tmp_path):
+    cache_file_path = str(tmp_path / 'tasks.cache')
+    cache = TaskParseCache(cache_file_path)
+    cache.put('task.json', os.stat(tmp_path), {})
+    cache.save()
+    assert TaskParseCache.open(cache_file_path).entries
+    with open(cache_file_path, 'wb') as file:
+        pickle.dump((CACHE_FORMAT_VERSION - 1, cache.entries), file)
+    assert not TaskParseCache.open(cache_file_path).entries
+
+
+def test_file_removed_after_listing_is_reported(tmp_path, monkeypatch):
+    tasks_dir = tmp_path / 'tasks'
+    tasks_dir.mkdir()
+    kept_file_path = write_task_file(tasks_dir, 'kept')
+    removed_file_path = write_task_file(tasks_dir, 'removed')
+    find_task_files = JsonTaskLoader.find_task_files
+
+    def find_then_remove(*args, **kwargs):
+        file_paths = find_task_files(*args, **kwargs)
+        os.remove(removed_file_path)
+        return file_paths
+
+    monkeypatch.setattr(JsonTaskLoader, 'find_task_files', find_then_remove)
+    report = TaskLoadReport()
+    cache = TaskParseCache(str(tmp_path / 'tasks.cache'))
+    tasks = JsonTaskLoader.load_all_tasks(str(tasks_dir), report, cache=cache)
+    assert [task.name for task in tasks] == ['kept']
+    assert report.loaded_files == [kept_file_path]
+    assert report.errors[removed_file_path].startswith('FileNotFoundError')
@@ -0,0 +1,59 @@
+from src.task.Logger import Logger
+import os
+import queue
+import threading
+import time
+
+
+def test_records_survive_rotation_on_last_flush(tmp_path):
+    saved = (Logger._flush_size, Logger._flush_interval, Logger._max_file_size, Logger._log_dir_path)
+    saved_log_file_path = Logger._log_file_path
+    Logger.shutdown()
+    Logger.configure(1024 * 1024, 60.0, 100, str(tmp_path))
+    Logger._log_file_path = None
+    try:
+        for i in range(3):
+            Logger.log(f"record {i}")
+        # Every record is written by the final flush, which goes over max file size and rotates
+        Logger.shutdown()
+        log_text = ''.join(open(os.path.join(tmp_path, file_name), encoding='utf-8').read()
+                           for file_name in sorted(os.listdir(tmp_path)))
+        assert all(f"record {i}" in log_text for i in range(3))
+        assert len(os.listdir(tmp_path)) == 2
+        assert os.path.getsize(Logger.get_log_file_path()) == 0
+    finally:
+        Logger.configure(*saved)
+        Logger._log_file_path = saved_log_file_path
+
+
+
+class SlowQueue(queue.SimpleQueue):
+    # Records take a while to be put, so shutdown comes in between the writer check and the put
+    def put(self, item, block=True, timeout=None):
+        if item is not None:
+            time.sleep(0.1)
+        super().put(item, block, timeout)
+
+
+def test_record_logged_during_shutdown_is_not_lost(tmp_path, monkeypatch):
+    saved = (Logger._flush_size, Logger._flush_interval, Logger._max_file_size, Logger._log_dir_path)
+    saved_log_file_path = Logger._log_file_path
+    Logger.shutdown()
+    Logger.configure(1024 * 1024, 60.0, 1024 * 1024 * 1024, str(tmp_path))
+    Logger._log_file_path = None
+    monkeypatch.setattr(Logger, '_queue', SlowQueue())
+    try:
+        Logger.log("first record")
+        late = threading.Thread(target=Logger.log, args=("late record",))
+        late.start()
+        time.sleep(0.02)
+        Logger.shutdown()
+        late.join()
+        Logger.shutdown()
+        log_text = ''.join(open(os.path.join(tmp_path, file_name), encoding='utf-8').read()
+                           for file_name in os.listdir(tmp_path))
+        assert "first record" in log_text
+        assert "late record" in log_text
+    finally:
+        Logger.configure(*saved)
+        Logger._log_file_path = saved_log_file_path
@@ -0,0 +1,89 @@
+from src.menu.MenuRefactor import (ConsoleWindowManager, ConsoleWindowAbstract, MainConsoleWindow, MenuSettings,
+                                   BrowseTasksConsoleWindow, MenuSettingsConsoleWindow, ActionResult,
+                                   ActionResultTypeEnum)
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskState import TaskState
+from tests.conftest import create_task, wait_until_running
+import io
+import sys
+import traceback
+
+GRACE_PERIOD = 0.5
+# More windows than the default recursion limit, a recursive menu would overflow long before
+NAVIGATION_DEPTH = 2 * sys.getrecursionlimit()
+
+
+class NestingConsoleWindow(ConsoleWindowAbstract):
+    """
+    Opens another window like itself on every action and records how deep the call stack was at that moment
+    """
+    __slots__ = ['stack_depths']
+    stack_depths: list[int]
+
+    def __init__(self, stack_depths: list[int]):
+        super().__init__({1: 'go deeper'}, {1: self.go_deeper})
+        self.stack_depths = stack_depths
+
+    def go_deeper(self) -> ActionResult:
+        self.stack_depths.append(len(traceback.extract_stack()))
+        return ActionResult(ActionResultTypeEnum.SHOW_NEXT, NestingConsoleWindow(self.stack_depths))
+
+
+def create_window_manager(*tasks) -> tuple[ConsoleWindowManager, MainConsoleWindow]:
+    registry = TaskRegistry(tasks)
+    window_manager = ConsoleWindowManager(registry, GRACE_PERIOD)
+    main_window = MainConsoleWindow(registry, MenuSettings())
+    window_manager.add_new_window(main_window)
+    return window_manager, main_window
+
+
+def test_deep_navigation_keeps_call_stack_flat(capsys):
+    stack_depths = []
+    window_manager = ConsoleWindowManager(TaskRegistry(), GRACE_PERIOD)
+    window_manager.add_new_window(NestingConsoleWindow(stack_depths))
+    window_manager.run_script(io.StringIO('1\n' * NAVIGATION_DEPTH))
+    assert len(stack_depths) == NAVIGATION_DEPTH
+    assert len(set(stack_depths)) == 1
+    assert len(window_manager.window_stack) == NAVIGATION_DEPTH + 1
+    assert not window_manager.running
+    assert "Goodbye" in capsys.readouterr().out
+
+
+def test_back_pops_windows_and_quits_on_main_window(capsys):
+    window_manager, main_window = create_window_manager()
+    window_manager.run_script(io.StringIO('1\n2\n0\n0\n0\n1\n'))
+    assert window_manager.window_stack == [main_window]
+    assert not window_manager.running
+    # Answer after quit is never read
+    assert capsys.readouterr().out.count("Enter 1 to browse tasks") == 2
+
+
+def test_windows_are_pushed_in_order():
+    window_manager, main_window = create_window_manager()
+    window_manager.run_script(io.StringIO('1\n2\n'))
+    assert [type(window) for window in window_manager.window_stack] == [MainConsoleWindow, BrowseTasksConsoleWindow,
+                                                                        MenuSettingsConsoleWindow]
+    assert not window_manager.running
+
+
+def test_invalid_input_is_reported_and_menu_goes_on(capsys):
+    window_manager, main_window = create_window_manager()
+    window_manager.run_script(io.StringIO('abc\n42\n\n0\n'))
+    out = capsys.readouterr().out
+    assert out.count("Text you entered is not an integer") == 2
+    assert "Not allowed number entered!" in out
+    assert window_manager.window_stack == [main_window]
+    assert out.count("Goodbye") == 1
+
+
+def test_end_of_script_quits_and_stops_running_tasks(capsys):
+    sleeper = create_task('sleeper', 'sleep 30')
+    window_manager, _ = create_window_manager(sleeper)
+    sleeper.start_task()
+    wait_until_running(sleeper)
+    stdin = sys.stdin
+    window_manager.run_script(io.StringIO(''))
+    assert sys.stdin is stdin
+    assert sleeper.state is TaskState.TERMINATED
+    assert sleeper.terminationReason == "Terminated on quit"
+    assert "Stopped 1 tasks" in capsys.readouterr().out
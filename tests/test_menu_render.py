@@ -0,0 +1,43 @@
+from src.menu.MenuRefactor import MenuSettings, WrongSettingException
+from src.task.TaskState import TaskState
+from tests.conftest import create_task
+import pytest
+
+
+def test_pages_are_clamped_and_hold_page_size_tasks():
+    settings = MenuSettings()
+    settings.change_page_size(3)
+    tasks = [create_task(f"paged{i}") for i in range(7)]
+    assert settings.get_page_count(tasks) == 3
+    assert settings.get_page_count([]) == 1
+    last_page = settings.get_tasks_page_msg(tasks, 3)
+    assert "paged6" in last_page and "paged5" not in last_page
+    assert last_page.endswith("Page 3/3 ( 7 tasks )")
+    assert settings.get_tasks_page_msg(tasks, 10) == last_page
+    assert settings.get_tasks_page_msg(tasks, -1).endswith("Page 1/3 ( 7 tasks )")
+    with pytest.raises(WrongSettingException):
+        settings.change_page_size(0)
+
+
+def test_rendered_line_is_reused_until_task_changes():
+    settings = MenuSettings()
+    task = create_task('rendered')
+    line = settings.get_task_print_msg(task)
+    assert settings.get_task_print_msg(task) is line
+    task.state = TaskState.QUEUED
+    assert "state [Queued]" in settings.get_task_print_msg(task)
+    task.change_description('new description')
+    settings.add_print('description')
+    assert "description [new description]" in settings.get_task_print_msg(task)
+
+
+def test_rendered_line_follows_print_fields():
+    settings = MenuSettings()
+    other_settings = MenuSettings()
+    task = create_task('printed')
+    assert "command [" in settings.get_task_print_msg(task)
+    settings.remove_print('command')
+    assert "command [" not in settings.get_task_print_msg(task)
+    # Line cached for other print fields is never served
+    assert "command [" in other_settings.get_task_print_msg(task)
+    assert "command [" not in settings.get_task_print_msg(task)
@@ -0,0 +1,70 @@
+from src.task.TaskOutput import TaskOutputBuffer, DEFAULT_BUFFER_SIZE
+from src.task.TaskState import TaskState
+from tests.conftest import create_task
+import random
+
+WAIT_TIMEOUT = 10.0
+
+
+def test_buffer_keeps_last_characters_when_it_wraps():
+    buffer = TaskOutputBuffer(10, None)
+    buffer.write('abcdef')
+    assert buffer.get_text() == 'abcdef'
+    assert not buffer.is_truncated()
+    buffer.write('ghijkl')
+    assert buffer.get_text() == 'cdefghijkl'
+    assert buffer.is_truncated()
+    # Write longer than the whole buffer replaces everything in it
+    buffer.write('0123456789abc')
+    assert buffer.get_text() == '3456789abc'
+    assert buffer.size == 10
+    assert buffer.written_size == 25
+
+
+def test_buffer_matches_tail_of_random_writes():
+    generator = random.Random(0)
+    buffer = TaskOutputBuffer(100, None)
+    written = []
+    for _ in range(500):
+        text = ''.join(generator.choice('xyz\n') for _ in range(generator.randint(0, 40)))
+        buffer.write(text)
+        written.append(text)
+        assert buffer.get_text() == ''.join(written)[-100:]
+    assert buffer.size == len(buffer.get_text()) == 100
+
+
+def test_multibyte_characters_split_between_reads():
+    buffer = TaskOutputBuffer(100, None)
+    data = 'zażółć gęślą jaźń'.encode('utf-8')
+    for i in range(len(data)):
+        buffer.write_bytes(data[i:i + 1])
+    buffer.close()
+    assert buffer.get_text() == 'zażółć gęślą jaźń'
+    assert buffer.total_bytes == len(data)
+
+
+def test_spill_file_keeps_whole_output(tmp_path):
+    spill_file_path = str(tmp_path / 'task.out')
+    buffer = TaskOutputBuffer(5, spill_file_path)
+    for i in range(20):
+        buffer.write_bytes(f"line {i}\n".encode('utf-8'))
+    buffer.close()
+    with open(spill_file_path, encoding='utf-8') as file:
+        assert file.read() == ''.join(f"line {i}\n" for i in range(20))
+    assert buffer.get_text() == 'e 19\n'
+    assert f"full output in {spill_file_path}" in buffer.get_summary_msg()
+
+
+def test_task_keeps_tail_of_long_output():
+    TaskOutputBuffer.configure(1000, None)
+    try:
+        task = create_task('chatty', 'seq 1 100000')
+        task.start_task()
+        assert task.commandFinished.wait(WAIT_TIMEOUT)
+    finally:
+        TaskOutputBuffer.configure(DEFAULT_BUFFER_SIZE, None)
+    assert task.state is TaskState.FINISHED
+    expected = ''.join(f"{i}\n" for i in range(1, 100001))
+    assert task.commandOutput.get_text() == expected[-1000:]
+    assert task.commandOutput.total_bytes == len(expected)
+    assert task.commandOutput.is_truncated()
@@ -0,0 +1,181 @@
+from src.menu.MenuRefactor import TaskConsoleWindow
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskOutputStore import TaskOutputSegment, TaskOutputStore, OutputCompressionEnum, INDEX_FILE_EXTENSION
+from src.task.TaskScheduler import TaskScheduler, get_default_worker_count
+from src.task.TaskState import TaskState
+from tests.conftest import create_task
+import asyncio
+import gzip
+import lzma
+import os
+import pytest
+import random
+import time
+
+CHUNK_SIZE = 100
+WAIT_TIMEOUT = 10.0
+
+
+def get_output(size: int) -> bytes:
+    generator = random.Random(size)
+    return bytes(generator.choice(b'abcdefgh \n') for _ in range(size))
+
+
+def write_segment(file_path: str, compression: OutputCompressionEnum, data: bytes) -> TaskOutputSegment:
+    segment = TaskOutputSegment.create(file_path, compression, CHUNK_SIZE, {'taskName': 'written'})
+    # Writes of uneven sizes, so chunks don't line up with them
+    generator = random.Random(len(data))
+    offset = 0
+    while offset < len(data):
+        size = generator.randint(1, 3 * CHUNK_SIZE)
+        segment.write(data[offset:offset + size])
+        offset += size
+    segment.close()
+    return segment
+
+
+@pytest.mark.parametrize('compression', list(OutputCompressionEnum), ids=str)
+def test_random_reads_match_output(tmp_path, compression):
+    data = get_output(5000)
+    file_path = str(tmp_path / ('run' + compression.get_file_extension()))
+    segment = write_segment(file_path, compression, data)
+    assert segment.size == len(data)
+    assert len(segment.chunks) > 1
+    reopened = TaskOutputSegment.open(file_path)
+    assert reopened.metadata == {'taskName': 'written'}
+    generator = random.Random(0)
+    for _ in range(200):
+        offset = generator.randint(0, len(data) + 10)
+        size = generator.randint(0, 3 * CHUNK_SIZE)
+        assert segment.read(offset, size) == data[offset:offset + size]
+        assert reopened.read(offset, size) == data[offset:offset + size]
+    assert reopened.read(0, len(data)) == data
+    # Chunks are complete gzip members (xz streams), the file reads as a whole with zcat / xzcat
+    with open(file_path, 'rb') as file:
+        decompress = gzip.decompress if compression is OutputCompressionEnum.GZIP else lzma.decompress
+        assert decompress(file.read()) == data
+
+
+def test_reads_of_open_segment_include_pending_output(tmp_path):
+    data = get_output(450)
+    segment = TaskOutputSegment.create(str(tmp_path / 'live.out.gz'), OutputCompressionEnum.GZIP, CHUNK_SIZE, {})
+    segment.write(data[:400])
+    segment.write(data[400:])
+    assert len(segment.pending) == 50
+    assert segment.read(0, len(data)) == data
+    assert segment.read(len(data) - 30, 100) == data[-30:]
+    # Not readable by open until it's closed, the index is written last
+    with pytest.raises(OSError):
+        TaskOutputSegment.open(segment.file_path)
+    assert segment.close()
+    assert not segment.close()
+    assert not segment.pending
+    assert TaskOutputSegment.open(segment.file_path).read(0, len(data)) == data
+
+
+def test_pages(tmp_path):
+    data = get_output(250)
+    segment = write_segment(str(tmp_path / 'paged.out.xz'), OutputCompressionEnum.LZMA, data)
+    assert segment.get_page_count(100) == 3
+    assert segment.get_page_count(250) == 1
+    assert segment.read_page(3, 100) == data[200:].decode('utf-8')
+    assert segment.read_page(4, 100) == ''
+    empty = write_segment(str(tmp_path / 'empty.out.gz'), OutputCompressionEnum.GZIP, b'')
+    assert empty.get_page_count(100) == 1
+    assert empty.read_page(1, 100) == ''
+
+
+def test_run_output_is_stored(tmp_path):
+    TaskOutputStore.configure(True, str(tmp_path), OutputCompressionEnum.LZMA, chunk_size=CHUNK_SIZE)
+    task = create_task('stored', 'seq 1 500')
+    task.start_task()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert task.state is TaskState.FINISHED
+    expected = ''.join(f"{i}\n" for i in range(1, 501)).encode('utf-8')
+    segment = TaskOutputSegment.open(task.commandOutput.segment.file_path)
+    assert segment.metadata['taskName'] == 'stored'
+    assert segment.read(0, segment.size) == expected
+    assert os.path.exists(segment.get_index_file_path())
+
+
+def test_asyncio_engine_compresses_full_chunks_off_the_event_loop(tmp_path, monkeypatch):
+    compress = OutputCompressionEnum.compress
+    compressed_on_loop = []
+
+    def record_compress(compression: OutputCompressionEnum, data: bytes) -> bytes:
+        try:
+            asyncio.get_running_loop()
+            compressed_on_loop.append(len(data))
+        except RuntimeError:
+            pass
+        return compress(compression, data)
+
+    monkeypatch.setattr(OutputCompressionEnum, 'compress', record_compress)
+    TaskOutputStore.configure(True, str(tmp_path), chunk_size=CHUNK_SIZE)
+    TaskScheduler.configure(1, TaskEngineEnum.ASYNCIO)
+    try:
+        task = create_task('stored', 'seq 1 2000')
+        task.start_task()
+        assert task.commandFinished.wait(WAIT_TIMEOUT)
+        assert task.state is TaskState.FINISHED
+    finally:
+        TaskScheduler.shutdown()
+        TaskScheduler.join()
+        TaskScheduler.configure(get_default_worker_count())
+    segment = TaskOutputSegment.open(task.commandOutput.segment.file_path)
+    assert segment.read(0, segment.size) == ''.join(f"{i}\n" for i in range(1, 2001)).encode('utf-8')
+    # Only the rest smaller than a chunk is compressed by close on the loop
+    assert all(size < CHUNK_SIZE for size in compressed_on_loop)
+
+
+def test_summary_of_segment_without_compressed_output(tmp_path):
+    segment = TaskOutputSegment.create(str(tmp_path / 'pending.out.gz'), OutputCompressionEnum.GZIP, CHUNK_SIZE, {})
+    assert segment.get_summary_msg().startswith("0 bytes in 0 gzip chunks, ")
+    segment.write(b'x' * 10)
+    assert "compressed to" not in segment.get_summary_msg()
+    # Inconsistent sizes can't come from write, the message still must not divide by zero
+    segment.compressed_size = 5
+    segment.size = len(segment.pending)
+    assert "compressed to" not in segment.get_summary_msg()
+
+
+@pytest.mark.parametrize('index', ['{', '{"compression": "zip", "chunkSize": 100}', '{"compression": "gzip"}'],
+                         ids=['not_json', 'unknown_compression', 'missing_fields'])
+def test_damaged_index_is_reported_by_menu(tmp_path, monkeypatch, capsys, index):
+    TaskOutputStore.configure(True, str(tmp_path), chunk_size=CHUNK_SIZE)
+    task = create_task('damaged', 'seq 1 100')
+    task.start_task()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    with open(task.commandRuns[-1].output_path + INDEX_FILE_EXTENSION, 'w') as file:
+        file.write(index)
+    monkeypatch.setattr('builtins.input', lambda prompt='': '')
+    assert TaskConsoleWindow(task).select_output_segment() is None
+    assert "Index of stored output is damaged" in capsys.readouterr().out
+
+
+def test_prune_removes_oldest_segments_above_max_size(tmp_path):
+    file_paths = []
+    for i in range(4):
+        file_path = str(tmp_path / f'run{i}.out.gz')
+        write_segment(file_path, OutputCompressionEnum.GZIP, get_output(1000 + i))
+        # Oldest first, a second apart
+        modified = time.time() - 10 + i
+        os.utime(file_path, (modified, modified))
+        file_paths.append(file_path)
+    sizes = [os.path.getsize(path) + os.path.getsize(path + INDEX_FILE_EXTENSION) for path in file_paths]
+    TaskOutputStore.configure(True, str(tmp_path), max_size=sizes[2] + sizes[3])
+    assert TaskOutputStore.prune() == 2
+    assert [os.path.exists(path) for path in file_paths] == [False, False, True, True]
+    assert not os.path.exists(file_paths[0] + INDEX_FILE_EXTENSION)
+    assert TaskOutputStore.prune() == 0
+
+
+def test_prune_removes_segments_older_than_max_age(tmp_path):
+    old = str(tmp_path / 'old.out.xz')
+    new = str(tmp_path / 'new.out.gz')
+    write_segment(old, OutputCompressionEnum.LZMA, get_output(100))
+    write_segment(new, OutputCompressionEnum.GZIP, get_output(100))
+    os.utime(old, (time.time() - 120, time.time() - 120))
+    TaskOutputStore.configure(True, str(tmp_path), max_age=60)
+    assert TaskOutputStore.prune() == 1
+    assert not os.path.exists(old) and os.path.exists(new)
@@ -0,0 +1,127 @@
+from _datetime import datetime, timedelta
+from src.menu.TaskQuery import SortedTaskView, TaskQueryEngine, parse_filter, matches_filter, get_sort_value, \
+    FilterParseException
+from src.task.TaskCategory import TaskCategory
+from src.task.TaskPriority import TaskPriority
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskState import TaskState
+from tests.conftest import create_task
+import random
+import pytest
+
+
+def create_tasks(count: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        task = create_task(f"task{rnd.randrange(count):04d}", priority=rnd.choice(list(TaskPriority)),
+                           category=rnd.choice(list(TaskCategory)),
+                           deadline_date=datetime(2030, 1, 1) + timedelta(days=rnd.randrange(365)))
+        task.state = rnd.choice(list(TaskState))
+        tasks.append(task)
+    return tasks
+
+
+def get_filter(*filter_texts: str) -> dict:
+    task_filter = {}
+    for filter_text in filter_texts:
+        field_name, condition = parse_filter(filter_text)
+        task_filter.setdefault(field_name, []).append(condition)
+    return task_filter
+
+
+def query_brute_force(tasks, task_filter: dict, sort_field: str, ascending: bool) -> list:
+    matching = [task for task in tasks if matches_filter(task, task_filter)]
+    matching.sort(key=lambda task: (get_sort_value(getattr(task, sort_field)), task.id), reverse=not ascending)
+    return matching
+
+
+@pytest.fixture
+def registry():
+    with TaskRegistry(create_tasks(400)) as registry:
+        yield registry
+
+
+def test_parse_filter_accepts_labels_names_and_orders():
+    assert parse_filter('state=InProgress')[1][1] is TaskState.IN_PROGRESS
+    assert parse_filter('state = in_progress')[1][1] is TaskState.IN_PROGRESS
+    assert parse_filter('priority=1')[1][1] is TaskPriority.URGENT_IMPORTANT
+    assert parse_filter('deadlineDate<2030-02-01') == ('deadlineDate', ('<', datetime(2030, 2, 1),
+                                                                        'deadlineDate<2030-02-01'))
+
+
+@pytest.mark.parametrize('filter_text', ['state', 'state>ToDo', 'color=red', 'id=x', 'state=Sleeping'])
+def test_parse_filter_rejects_invalid_filters(filter_text):
+    with pytest.raises(FilterParseException):
+        parse_filter(filter_text)
+
+
+def test_sorted_view_stays_sorted_through_changes():
+    tasks = create_tasks(200)
+    view = SortedTaskView('deadlineDate', tasks)
+    rnd = random.Random(1)
+    for task in rnd.sample(tasks, 50):
+        task.deadlineDate = datetime(2030, 1, 1) + timedelta(days=rnd.randrange(365))
+        view.update(task)
+    for task in tasks[:20]:
+        view.remove(task)
+    kept = tasks[20:]
+    assert view.get_ids(True) == [task.id for task in query_brute_force(kept, {}, 'deadlineDate', True)]
+    assert view.get_ids(False) == [task.id for task in query_brute_force(kept, {}, 'deadlineDate', False)]
+
+
+@pytest.mark.parametrize('filter_texts', [(), ('state=Finished',), ('priority=1', 'category=work'),
+                                          ('name^=task01',), ('id>100', 'id<=300', 'state=ToDo'),
+                                          ('deadlineDate>=2030-06-01',)])
+@pytest.mark.parametrize('sort_field, ascending', [('id', True), ('name', False), ('state', True),
+                                                   ('deadlineDate', False), ('finishDate', True)])
+def test_query_matches_brute_force(registry, filter_texts, sort_field, ascending):
+    task_filter = get_filter(*filter_texts)
+    engine = TaskQueryEngine(registry)
+    assert engine.query(task_filter, sort_field, ascending) == query_brute_force(registry, task_filter, sort_field,
+                                                                                  ascending)
+
+
+def test_query_follows_state_changes_and_removals(registry):
+    engine = TaskQueryEngine(registry)
+    task_filter = get_filter('state=InProgress')
+    first_result = engine.query(task_filter, 'state', True)
+    assert engine.query(task_filter, 'state', True) is first_result  # reused while nothing changes
+
+    rnd = random.Random(2)
+    tasks = list(registry)
+    for task in rnd.sample(tasks, 100):
+        task.state = rnd.choice(list(TaskState))
+    for task in rnd.sample(tasks, 30):
+        registry.remove(task)
+    registry.add(create_task('late', priority=TaskPriority.URGENT_IMPORTANT))
+    for sort_field in ('state', 'priority', 'id'):
+        assert engine.query(task_filter, sort_field, True) == query_brute_force(registry, task_filter, sort_field,
+                                                                                 True)
+    assert engine.query({}, 'priority', True) == query_brute_force(registry, {}, 'priority', True)
+
+
+def test_query_result_changes_with_filter(registry):
+    engine = TaskQueryEngine(registry)
+    task_filter = get_filter('category=work')
+    work = engine.query(task_filter, 'id', True)
+    task_filter.setdefault('priority', []).append(parse_filter('priority=2')[1])
+    assert engine.query(task_filter, 'id', True) == [task for task in work
+                                                      if task.priority is TaskPriority.NOT_URGENT_IMPORTANT]
+
+
+def test_query_narrowed_by_state_index_follows_transitions(registry):
+    tasks = list(registry)
+    for task in tasks:
+        task.state = TaskState.FINISHED
+    engine = TaskQueryEngine(registry)
+    task_filter = get_filter('state=Queued')
+    assert engine.query(task_filter, 'deadlineDate', True) == []
+    for task in tasks[::40]:
+        task.state = TaskState.QUEUED
+    # Few queued tasks, so they're taken from the registry's state group instead of the whole sorted view
+    assert engine._TaskQueryEngine__get_index_candidates(task_filter) is not None
+    assert engine.query(task_filter, 'deadlineDate', True) == query_brute_force(registry, task_filter,
+                                                                                 'deadlineDate', True)
+    tasks[0].state = TaskState.IN_PROGRESS
+    assert tasks[0] not in engine.query(task_filter, 'deadlineDate', True)
@@ -0,0 +1,48 @@
+from src.task.Task import Task
+from src.task.TaskPriority import TaskPriority
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskState import TaskState
+from tests.conftest import create_task
+
+
+def test_indexes_follow_task_changes():
+    task = create_task('indexed')
+    with TaskRegistry([task]) as registry:
+        task.state = TaskState.QUEUED
+        task.priority = TaskPriority.URGENT_IMPORTANT
+        assert registry.get_by_state(TaskState.QUEUED) == [task]
+        assert registry.count_by_state(TaskState.TO_DO) == 0
+        assert registry.get_by_priority(TaskPriority.URGENT_IMPORTANT) == [task]
+        registry.remove(task)
+        assert registry.count_by_state(TaskState.QUEUED) == 0
+        assert task not in registry
+
+
+def test_closed_registry_stops_listening():
+    task = create_task('forgotten')
+    registry = TaskRegistry([task])
+    registry.close()
+    assert registry._on_task_changed not in Task._change_listeners
+    task.state = TaskState.FINISHED
+    assert registry.count_by_state(TaskState.TO_DO) == 1
+
+
+def test_listener_removed_while_notifying_does_not_skip_the_next_one():
+    task = create_task('notifying')
+    calls = []
+
+    def remove_itself(*args):
+        calls.append('first')
+        Task.remove_change_listener(remove_itself)
+
+    def second(*args):
+        calls.append('second')
+
+    Task.add_change_listener(remove_itself)
+    Task.add_change_listener(second)
+    try:
+        task.change_description('changed')
+        task.change_description('changed again')
+    finally:
+        Task.remove_change_listener(second)
+    assert calls == ['first', 'second', 'second']
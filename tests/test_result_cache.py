@@ -0,0 +1,55 @@
+from src.task.TaskResultCache import TaskResultCache, ResultCachePolicy, DEFAULT_RESULT_CACHE_SIZE
+import os
+import pytest
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    cache_dir = tmp_path / 'results'
+    TaskResultCache.configure(True, str(cache_dir), 100)
+    yield cache_dir
+    TaskResultCache.configure(False)
+
+
+def test_disabled_cache_status_does_not_touch_disk(tmp_path):
+    cache_dir = tmp_path / 'results'
+    TaskResultCache.configure(False, str(cache_dir))
+    assert TaskResultCache.get_status_msg() == "Result cache disabled"
+    assert not cache_dir.exists()
+
+
+def test_cached_output_is_returned_until_ttl(cache_dir):
+    key = TaskResultCache.get_key('echo hi', ResultCachePolicy(60))
+    assert TaskResultCache.get(key, 60) is None
+    TaskResultCache.put(key, 'echo hi', 'hi\n', 3, 0)
+    entry, text = TaskResultCache.get(key, 60)
+    assert text == 'hi\n'
+    assert entry.command == 'echo hi' and entry.return_code == 0
+    assert TaskResultCache.get(key, -1) is None
+    assert TaskResultCache.get(key, 60) is None
+    assert "0 outputs" in TaskResultCache.get_status_msg()
+
+
+def test_index_survives_reconfigure(cache_dir):
+    TaskResultCache.put('key', 'echo hi', 'hi\n', 3, 0)
+    TaskResultCache.configure(True, str(cache_dir), DEFAULT_RESULT_CACHE_SIZE)
+    assert TaskResultCache.get('key', 60)[1] == 'hi\n'
+    assert TaskResultCache.get_status_msg().startswith("Result cache enabled: 1 outputs, 3 of")
+
+
+def test_least_recently_used_output_is_evicted(cache_dir):
+    TaskResultCache.put('first', 'a', 'a' * 40, 40, 0)
+    TaskResultCache.put('second', 'b', 'b' * 40, 40, 0)
+    assert TaskResultCache.get('first', 60) is not None
+    TaskResultCache.put('third', 'c', 'c' * 40, 40, 0)
+    assert TaskResultCache.get('second', 60) is None
+    assert TaskResultCache.get('first', 60) is not None
+    assert not os.path.exists(cache_dir / 'second.out')
+
+
+def test_key_changes_with_declared_environment(monkeypatch):
+    policy = ResultCachePolicy(60, env=['RESULT_CACHE_TEST'])
+    monkeypatch.delenv('RESULT_CACHE_TEST', raising=False)
+    unset_key = TaskResultCache.get_key('echo hi', policy)
+    monkeypatch.setenv('RESULT_CACHE_TEST', '')
+    assert TaskResultCache.get_key('echo hi', policy) != unset_key
@@ -0,0 +1,67 @@
+from _datetime import datetime
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskRun import TaskRun, wait_process, get_size_msg
+from src.task.TaskScheduler import TaskScheduler, get_default_worker_count
+from tests.conftest import create_task
+import os
+import pytest
+import subprocess
+import sys
+import time
+
+WAIT_TIMEOUT = 10.0
+# Burns CPU for a while and holds about 50 MiB, so both show up in its resource usage
+BUSY_COMMAND = (f"{sys.executable} -c \"import time; data = bytearray(50 * 1024 * 1024); end = time.process_time() + "
+                f"0.2\nwhile time.process_time() < end: pass\"")
+
+
+@pytest.mark.skipif(not hasattr(os, 'wait4'), reason="resource usage of a child needs os.wait4")
+def test_wait_process_records_resource_usage():
+    begin_date = datetime.now()
+    begin_time = time.monotonic()
+    process = subprocess.Popen(BUSY_COMMAND, shell=True)
+    run = wait_process(process, begin_date, begin_time)
+    assert run.return_code == 0
+    assert process.returncode == 0
+    assert run.wall_time >= 0.2
+    assert run.get_cpu_time() >= 0.2
+    assert run.user_time > 0
+    assert run.max_rss >= 50 * 1024 * 1024
+    assert run.finish_date >= begin_date
+    assert "max RSS" in run.get_msg()
+
+
+def test_already_reaped_process_keeps_exit_code_and_wall_time():
+    process = subprocess.Popen('exit 3', shell=True)
+    process.wait()
+    run = wait_process(process, datetime.now(), time.monotonic())
+    assert run.return_code == 3
+    assert run.user_time is None and run.get_cpu_time() is None and run.max_rss is None
+    assert run.get_msg().endswith(f"exit code 3, wall {run.wall_time:.3f}s")
+
+
+@pytest.mark.parametrize('engine', list(TaskEngineEnum), ids=str)
+def test_every_run_of_task_is_recorded(engine):
+    TaskScheduler.configure(2, engine)
+    try:
+        task = create_task('measured', 'exit 2')
+        for _ in range(2):
+            task.start_task()
+            assert task.commandFinished.wait(WAIT_TIMEOUT)
+    finally:
+        TaskScheduler.shutdown()
+        TaskScheduler.join()
+        TaskScheduler.configure(get_default_worker_count())
+    assert [run.return_code for run in task.commandRuns] == [2, 2]
+    assert task.commandRuns[0].begin_date < task.commandRuns[1].begin_date
+    # asyncio reaps processes itself, their resource usage can't be known
+    assert all((run.max_rss is not None) == (engine is TaskEngineEnum.THREAD and hasattr(os, 'wait4'))
+               for run in task.commandRuns)
+
+
+def test_size_msg():
+    assert get_size_msg(512) == "512 B"
+    assert get_size_msg(2048) == "2 KiB"
+    assert get_size_msg(3 * 1024 ** 3) == "3.0 GiB"
+    run = TaskRun(datetime(2025, 1, 1), datetime(2025, 1, 1), 0, 1.5, 1.0, 0.25, 3 * 1024 * 1024)
+    assert run.get_msg() == "2025-01-01 00:00:00: exit code 0, wall 1.500s, user 1.000s, sys 0.250s, max RSS 3 MiB"
@@ -0,0 +1,145 @@
+from src.task.Task import Task
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskPriority import TaskPriority
+from src.task.TaskScheduler import TaskScheduler, SchedulingPolicyEnum
+from src.task.TaskState import TaskState
+from tests.conftest import create_task
+import threading
+import pytest
+
+WAIT_TIMEOUT = 10.0
+
+
+class StateRecorder:
+    """
+    Records order tasks start in and the most of them running at once
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+
+    def __enter__(self):
+        Task.add_change_listener(self.on_task_changed)
+        return self
+
+    def __exit__(self, *exc_info):
+        Task.remove_change_listener(self.on_task_changed)
+
+    def on_task_changed(self, task: Task, field_name: str, old_value, new_value):
+        if field_name != 'state':
+            return
+        with self.lock:
+            if new_value is TaskState.IN_PROGRESS:
+                self.started.append(task.name)
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            elif old_value is TaskState.IN_PROGRESS:
+                self.running -= 1
+
+
+def wait_for_all(tasks: list[Task]):
+    for task in tasks:
+        assert task.commandFinished.wait(WAIT_TIMEOUT), f"task '{task.name}' did not finish"
+
+
+@pytest.mark.parametrize('engine', list(TaskEngineEnum))
+def test_never_runs_more_commands_than_workers(engine):
+    TaskScheduler.configure(2, engine)
+    tasks = [create_task(f"sleeper{i}", 'sleep 0.1') for i in range(8)]
+    with StateRecorder() as recorder:
+        for task in tasks:
+            task.start_task()
+        wait_for_all(tasks)
+    assert recorder.max_running == 2
+    assert all(task.state is TaskState.FINISHED for task in tasks)
+    assert TaskScheduler.busy_workers() == 0
+
+
+@pytest.mark.parametrize('engine', list(TaskEngineEnum))
+def test_queued_tasks_start_by_priority(engine):
+    TaskScheduler.configure(1, engine, SchedulingPolicyEnum.PRIORITY)
+    blocker = create_task('blocker', 'sleep 0.3')
+    tasks = [create_task('low', priority=TaskPriority.NOT_URGENT_NOT_IMPORTANT),
+             create_task('high', priority=TaskPriority.URGENT_IMPORTANT),
+             create_task('medium', priority=TaskPriority.URGENT_NOT_IMPORTANT)]
+    with StateRecorder() as recorder:
+        blocker.start_task()
+        # Everything else is queued while the only worker runs the blocker
+        while blocker.state is not TaskState.IN_PROGRESS:
+            blocker.commandFinished.wait(0.01)
+        for task in tasks:
+            task.start_task()
+        wait_for_all([blocker, *tasks])
+    assert recorder.started == ['blocker', 'high', 'medium', 'low']
+
+
+def test_submit_after_shutdown_waits_for_old_workers():
+    TaskScheduler.configure(1)
+    first = create_task('first', 'sleep 0.3')
+    second = create_task('second', 'true')
+    with StateRecorder() as recorder:
+        first.start_task()
+        while first.state is not TaskState.IN_PROGRESS:
+            first.commandFinished.wait(0.01)
+        TaskScheduler.shutdown()
+        second.start_task()
+        wait_for_all([first, second])
+    assert recorder.max_running == 1
+    assert second.state is TaskState.FINISHED
+
+
+@pytest.mark.parametrize('engine', list(TaskEngineEnum))
+def test_task_failing_to_spawn_ends_terminated(engine, monkeypatch):
+    TaskScheduler.configure(1, engine)
+    task = create_task('broken', 'true')
+
+    def fail_to_spawn(*args, **kwargs):
+        raise OSError("no more processes")
+
+    monkeypatch.setattr('subprocess.Popen', fail_to_spawn)
+    monkeypatch.setattr('asyncio.create_subprocess_shell', fail_to_spawn)
+    task.start_task()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert task.state is TaskState.TERMINATED
+    assert 'no more processes' in task.terminationReason
+
+
+@pytest.mark.parametrize('engine', list(TaskEngineEnum))
+def test_command_left_running_by_shutdown_can_be_terminated(engine):
+    TaskScheduler.configure(1, engine)
+    task = create_task('left running', 'sleep 30')
+    task.start_task()
+    while task.commandProcess is None:
+        assert not task.commandFinished.wait(0.01)
+    TaskScheduler.shutdown()
+    task.terminate_task()
+    assert task.commandFinished.is_set()
+    assert task.state is TaskState.TERMINATED
+    TaskScheduler.join()
+    # Stopped engine is gone once joined, a late signal goes to the process group itself
+    TaskScheduler.kill_process(task)
+
+
+def test_state_listeners_run_outside_of_scheduler_lock():
+    TaskScheduler.configure(1)
+    task = create_task('listened')
+    other = create_task('other')
+    cancelled = []
+
+    def on_task_changed(changed_task: Task, field_name: str, old_value, new_value):
+        if changed_task is task and field_name == 'state' and new_value is TaskState.IN_PROGRESS:
+            # Listener handing work to another thread that needs the scheduler, while it waits for it
+            canceller = threading.Thread(target=lambda: cancelled.append(TaskScheduler.cancel(other)))
+            canceller.start()
+            canceller.join(WAIT_TIMEOUT)
+
+    Task.add_change_listener(on_task_changed)
+    try:
+        task.start_task()
+        wait_for_all([task])
+    finally:
+        Task.remove_change_listener(on_task_changed)
+    assert cancelled == [False]
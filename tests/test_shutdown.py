@@ -0,0 +1,116 @@
+from src.task.Task import Task
+from src.task.TaskScheduler import TaskScheduler, get_default_worker_count
+from src.task.TaskShutdown import TaskShutdown, KILL_WAIT_PERIOD
+from src.task.TaskState import TaskState
+from tests.conftest import create_task, create_loaded_task, wait_until_running
+import pytest
+
+WAIT_TIMEOUT = 10.0
+GRACE_PERIOD = 0.5
+# Shell ignores SIGTERM and so does sleep, which inherits it, only SIGKILL stops the command
+IGNORE_TERM_COMMAND = "trap '' TERM; sleep 30"
+
+
+@pytest.fixture
+def worker_count(request):
+    TaskScheduler.configure(request.param)
+    yield request.param
+    TaskScheduler.shutdown()
+    TaskScheduler.join()
+    TaskScheduler.configure(get_default_worker_count())
+
+
+@pytest.mark.parametrize('worker_count', [1], indirect=True)
+def test_queued_tasks_are_cancelled(worker_count):
+    running = create_task('running', 'sleep 30')
+    queued = create_task('queued', 'sleep 30')
+    running.start_task()
+    wait_until_running(running)
+    queued.start_task()
+    report = TaskShutdown.stop_tasks([running, queued], "Shutting down", GRACE_PERIOD)
+    assert report.cancelled == [queued]
+    assert report.terminated == [running]
+    assert queued.state is TaskState.TERMINATED
+    assert queued.terminationReason == "Shutting down"
+    assert TaskScheduler.queue_depth() == 0
+    assert not queued.commandRuns
+
+
+@pytest.mark.parametrize('worker_count', [4], indirect=True)
+def test_running_tasks_are_terminated_together(worker_count):
+    tasks = [create_task(f'sleeper {i}', 'sleep 30') for i in range(worker_count)]
+    for task in tasks:
+        task.start_task()
+    for task in tasks:
+        wait_until_running(task)
+    report = TaskShutdown.stop_tasks(tasks, "Shutting down", GRACE_PERIOD)
+    assert sorted(report.terminated, key=lambda task: task.id) == tasks
+    assert not report.killed and not report.unresponsive
+    assert report.wall_time < GRACE_PERIOD
+    for task in tasks:
+        assert task.state is TaskState.TERMINATED
+        assert task.commandFinished.is_set()
+
+
+@pytest.mark.parametrize('worker_count', [2], indirect=True)
+def test_task_ignoring_terminate_is_killed_after_grace_period(worker_count):
+    stubborn = create_task('stubborn', IGNORE_TERM_COMMAND)
+    polite = create_task('polite', 'sleep 30')
+    for task in (stubborn, polite):
+        task.start_task()
+        wait_until_running(task)
+    report = TaskShutdown.stop_tasks([stubborn, polite], "Shutting down", GRACE_PERIOD)
+    assert report.terminated == [polite]
+    assert report.killed == [stubborn]
+    # One deadline for all of them, not a grace period per task
+    assert GRACE_PERIOD <= report.wall_time < GRACE_PERIOD + KILL_WAIT_PERIOD
+    assert stubborn.state is TaskState.TERMINATED
+    assert "Killed: 'stubborn'" in report.get_summary_msg()
+
+
+def test_tasks_not_running_in_this_session_are_cancelled_or_left_alone():
+    stale = create_loaded_task('stale', TaskState.IN_PROGRESS)
+    finished = create_loaded_task('finished', TaskState.FINISHED)
+    to_do = create_task('to do')
+    report = TaskShutdown.stop_tasks([stale, finished, to_do], "Shutting down", GRACE_PERIOD)
+    assert report.cancelled == [stale]
+    assert report.wall_time < GRACE_PERIOD
+    assert stale.state is TaskState.TERMINATED
+    assert finished.state is TaskState.FINISHED
+    assert to_do.state is TaskState.TO_DO
+
+
+def test_task_ending_during_grace_period_keeps_its_finish():
+    stubborn = create_task('stubborn', "trap '' TERM; sleep 0.2")
+    stubborn.start_task()
+    wait_until_running(stubborn)
+    state_changes = []
+
+    def on_task_changed(task: Task, field_name: str, old_value, new_value):
+        if field_name == 'state':
+            state_changes.append((new_value, task.finishDate))
+
+    Task.add_change_listener(on_task_changed)
+    try:
+        report = TaskShutdown.stop_tasks([stubborn], "Shutting down", 5.0)
+    finally:
+        Task.remove_change_listener(on_task_changed)
+    assert report.terminated == [stubborn]
+    assert state_changes == [(TaskState.TERMINATED, stubborn.finishDate)]
+
+
+def test_task_finished_before_termination_request_stays_finished(monkeypatch):
+    quick = create_task('quick', 'sleep 0.2')
+    request_termination = Task._request_termination
+
+    def finish_first(task: Task, reason: str) -> bool:
+        # Worker wins the race, the command ends after its state was checked and before it's asked to stop
+        task.commandFinished.wait(WAIT_TIMEOUT)
+        return request_termination(task, reason)
+
+    quick.start_task()
+    wait_until_running(quick)
+    monkeypatch.setattr(Task, '_request_termination', finish_first)
+    report = TaskShutdown.stop_tasks([quick], "Shutting down", GRACE_PERIOD)
+    assert quick.state is TaskState.FINISHED
+    assert not report.terminated and not report.cancelled
@@ -0,0 +1,97 @@
+from _datetime import datetime, timedelta
+from src.menu.MenuRefactor import MainConsoleWindow, MenuSettings
+from src.task.LatencySketch import LatencySketch, DEFAULT_RELATIVE_ACCURACY, MIN_TRACKED_DURATION
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskState import TaskState
+from src.task.TaskStatistics import TaskStatistics
+from tests.conftest import create_task
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def registry():
+    with TaskRegistry([create_task(f"counted{i}") for i in range(5)]) as registry:
+        yield registry
+
+
+def test_counters_follow_transitions_from_creation(registry):
+    task_statistics = TaskStatistics(registry)
+    try:
+        tasks = list(registry)
+        tasks[0].state = TaskState.IN_PROGRESS
+        tasks[1].state = TaskState.FINISHED
+        registry.remove(tasks[2])
+        assert task_statistics.get_state_counts() == {'ToDo': 2, 'InProgress': 1, 'Finished': 1}
+    finally:
+        task_statistics.close()
+
+
+def test_main_window_shows_statistics_it_was_given(registry):
+    task_statistics = TaskStatistics(registry)
+    try:
+        window = MainConsoleWindow(registry, MenuSettings(), task_statistics=task_statistics)
+        assert window.next_stats_window().next_window.task_statistics is task_statistics
+    finally:
+        task_statistics.close()
+
+
+def complete_run(task, state: TaskState, seconds: float):
+    task.state = TaskState.QUEUED
+    task.beginDate = datetime(2030, 1, 1)
+    task.state = TaskState.IN_PROGRESS
+    task.finishDate = task.beginDate + timedelta(seconds=seconds)
+    task.state = state
+
+
+def test_every_run_is_a_latency_sample(registry):
+    task_statistics = TaskStatistics(registry)
+    try:
+        task = next(iter(registry))
+        for seconds in (1.0, 2.0, 4.0):
+            complete_run(task, TaskState.FINISHED, seconds)
+        sketch = task_statistics.get_latency_sketch(TaskState.FINISHED)
+        assert sketch.count == 3
+        assert sketch.min == 1.0 and sketch.max == 4.0
+        # Counters still hold only the latest completion of every task
+        assert task_statistics.get_avg_complete_time() == 4.0
+        registry.remove(task)
+        assert task_statistics.get_latency_sketch(TaskState.FINISHED).count == 3
+        assert task_statistics.get_avg_complete_time() is None
+    finally:
+        task_statistics.close()
+
+
+def test_finished_task_terminated_afterward_moves_its_sample(registry):
+    task_statistics = TaskStatistics(registry)
+    try:
+        task = next(iter(registry))
+        complete_run(task, TaskState.FINISHED, 1.0)
+        task.state = TaskState.TERMINATED
+        assert task_statistics.get_latency_sketch(TaskState.FINISHED).count == 0
+        assert task_statistics.get_latency_sketch(TaskState.TERMINATED).count == 1
+    finally:
+        task_statistics.close()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sketch_percentiles_are_within_relative_accuracy(seed):
+    rng = np.random.default_rng(seed)
+    durations = rng.lognormal(mean=0.0, sigma=2.0, size=20_000) + MIN_TRACKED_DURATION
+    sketch = LatencySketch()
+    for duration in durations:
+        sketch.add(float(duration))
+    for percentile in (1, 10, 25, 50, 75, 90, 99, 99.9):
+        expected = np.percentile(durations, percentile, method='lower')
+        assert sketch.get_percentile(percentile) == pytest.approx(expected, rel=DEFAULT_RELATIVE_ACCURACY)
+
+
+def test_histogram_buckets_are_disjoint():
+    sketch = LatencySketch()
+    for duration in (0.0, 0.0004, 0.0009, 0.001, 0.0015, 0.003, 0.7, 1.0, 1.9, 2.0, 300.0):
+        sketch.add(duration)
+    histogram = sketch.get_histogram()
+    assert histogram[0] == (0.0, MIN_TRACKED_DURATION, 3)
+    for (low, high, _), (next_low, _, _) in zip(histogram, histogram[1:]):
+        assert low < high <= next_low
+    assert sum(bucket_count for _, _, bucket_count in histogram) == sketch.count
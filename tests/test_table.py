@@ -0,0 +1,49 @@
+from src.task.TaskRegistry import TaskRegistry
+from src.task.TaskState import TaskState
+from src.task.TaskTable import TaskTable
+from tests.conftest import create_task
+import pytest
+
+WAIT_TIMEOUT = 10.0
+
+
+def get_complete_times(tasks) -> dict[str, float]:
+    # What the table computes, one task at a time. Dates are epoch floats there, so only close to these
+    return {f"{task.id} | {task.name}": (task.finishDate - task.beginDate).total_seconds() for task in tasks
+            if (task.state is TaskState.FINISHED or task.state is TaskState.TERMINATED)
+            and task.beginDate is not None and task.finishDate is not None}
+
+
+def run_tasks(tasks):
+    for task in tasks:
+        task.start_task()
+    for task in tasks:
+        assert task.commandFinished.wait(WAIT_TIMEOUT)
+
+
+def test_complete_times_follow_state_changes():
+    tasks = [create_task(f'table{i}', f'sleep 0.0{i}') for i in range(6)]
+    with TaskRegistry(tasks) as registry:
+        table = TaskTable(registry)
+        assert table.calc_complete_times() == {}
+        assert table.calc_avg_complete_time() is None
+
+        run_tasks(tasks[:3])
+        table.sync()
+        assert table.calc_complete_times() == pytest.approx(get_complete_times(tasks), abs=1e-5)
+
+        added = create_task('added', 'sleep 0.02')
+        registry.add(added)
+        registry.remove(tasks[0])
+        run_tasks([added, *tasks[3:5]])
+        # Run again, its new dates replace the old ones
+        run_tasks([tasks[1]])
+        table.sync()
+        expected = get_complete_times([*tasks[1:], added])
+        assert table.calc_complete_times() == pytest.approx(expected, abs=1e-5)
+        assert table.calc_avg_complete_time() == pytest.approx(sum(expected.values()) / len(expected), abs=1e-5)
+        assert table.size == len(registry)
+        table.close()
+        registry.remove(added)
+        table.sync()
+        assert table.size == len(registry) + 1
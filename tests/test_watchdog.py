@@ -0,0 +1,64 @@
+from src.task.TaskEngine import TaskEngineEnum
+from src.task.TaskScheduler import TaskScheduler, get_default_worker_count
+from src.task.TaskState import TaskState
+from src.task.TaskWatchdog import TaskWatchdog, DEFAULT_KILL_GRACE_PERIOD
+from tests.conftest import create_task
+import pytest
+import time
+
+WAIT_TIMEOUT = 10.0
+GRACE_PERIOD = 0.3
+# Shell ignores SIGTERM and so does sleep, which inherits it, only SIGKILL stops the command
+IGNORE_TERM_COMMAND = "trap '' TERM; sleep 30"
+
+
+@pytest.fixture(params=[TaskEngineEnum.THREAD, TaskEngineEnum.ASYNCIO], ids=str)
+def engine_type(request):
+    TaskScheduler.configure(2, request.param)
+    TaskWatchdog.configure(GRACE_PERIOD)
+    yield request.param
+    TaskScheduler.shutdown()
+    TaskScheduler.join()
+    TaskScheduler.configure(get_default_worker_count())
+    TaskWatchdog.configure(DEFAULT_KILL_GRACE_PERIOD)
+
+
+def test_command_within_timeout_finishes(engine_type):
+    task = create_task('quick', 'true', timeout=5)
+    task.start_task()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert task.state is TaskState.FINISHED
+    assert task.terminationReason is None
+
+
+def test_timed_out_command_is_terminated(engine_type):
+    task = create_task('slow', 'sleep 30', timeout=0.2)
+    begin_time = time.monotonic()
+    task.start_task()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert time.monotonic() - begin_time < 0.2 + GRACE_PERIOD + 1
+    assert task.state is TaskState.TERMINATED
+    assert task.terminationReason == "Timed out after 0.2s"
+    assert task.commandRuns[-1].return_code != 0
+
+
+def test_command_ignoring_terminate_is_killed_after_grace_period(engine_type):
+    task = create_task('stubborn', IGNORE_TERM_COMMAND, timeout=0.2)
+    begin_time = time.monotonic()
+    task.start_task()
+    assert task.commandFinished.wait(WAIT_TIMEOUT)
+    assert time.monotonic() - begin_time >= 0.2 + GRACE_PERIOD
+    assert task.state is TaskState.TERMINATED
+    assert task.terminationReason == f"Timed out after 0.2s, killed after {GRACE_PERIOD:g}s grace period"
+
+
+def test_timeout_applies_to_each_run(engine_type):
+    task = create_task('repeated', 'sleep 0.5', timeout=0.8)
+    for _ in range(2):
+        task.start_task()
+        assert task.commandFinished.wait(WAIT_TIMEOUT)
+        assert task.state is TaskState.FINISHED
+    # Entries of the finished runs are dropped once they come up, without touching the task
+    time.sleep(0.8 + GRACE_PERIOD)
+    assert task.state is TaskState.FINISHED
+    assert task.terminationReason is None
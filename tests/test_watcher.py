@@ -0,0 +1,100 @@
+from src.cache import TaskParseCache
+from src.loader import JsonTaskLoader, TaskLoadReport
+from src.task.TaskRegistry import TaskRegistry
+from src.watcher import TaskDirectoryWatcher
+from tests.test_loader import write_task_file
+import os
+import pytest
+
+
+@pytest.fixture
+def tasks_dir(tmp_path):
+    tasks_dir = tmp_path / 'tasks'
+    tasks_dir.mkdir()
+    return tasks_dir
+
+
+def rewrite_task_file(dir_path, file_name: str, **fields) -> str:
+    file_path = write_task_file(dir_path, file_name, **fields)
+    # Rewritten within the same clock tick would look unchanged
+    file_stat = os.stat(file_path)
+    os.utime(file_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000_000))
+    return file_path
+
+
+@pytest.fixture
+def start_watching():
+    registries = []
+
+    def start(tasks_dir, cache: TaskParseCache | None = None) -> tuple[TaskRegistry, TaskDirectoryWatcher]:
+        report = TaskLoadReport()
+        tasks = TaskRegistry(JsonTaskLoader.load_all_tasks(str(tasks_dir), report, cache=cache))
+        registries.append(tasks)
+        return tasks, TaskDirectoryWatcher(str(tasks_dir), tasks, report, cache=cache)
+
+    yield start
+    for registry in registries:
+        registry.close()
+
+
+def get_by_name(tasks: TaskRegistry, name: str):
+    return next(task for task in tasks if task.name == name)
+
+
+def test_files_changed_before_watcher_starts_are_reloaded(tasks_dir):
+    write_task_file(tasks_dir, 'a')
+    report = TaskLoadReport()
+    with TaskRegistry(JsonTaskLoader.load_all_tasks(str(tasks_dir), report)) as tasks:
+        rewrite_task_file(tasks_dir, 'a', command='echo changed')
+        write_task_file(tasks_dir, 'b')
+        watcher = TaskDirectoryWatcher(str(tasks_dir), tasks, report)
+        assert watcher.poll() == (1, 1, 0)
+        assert get_by_name(tasks, 'a').command == 'echo changed'
+        assert watcher.poll() == (0, 0, 0)
+
+
+def test_reload_creating_cycle_is_rejected(tasks_dir, start_watching):
+    write_task_file(tasks_dir, 'a', dependsOn=['b'])
+    write_task_file(tasks_dir, 'b')
+    tasks, watcher = start_watching(tasks_dir)
+    rewrite_task_file(tasks_dir, 'b', dependsOn=['a'], command='echo changed')
+    assert watcher.poll() == (0, 0, 0)
+    assert get_by_name(tasks, 'b').dependsOn == []
+    assert get_by_name(tasks, 'b').command == 'true'
+    assert 'cycle' in next(iter(watcher.rejected_files.values()))
+
+
+def test_rename_breaking_unchanged_task_is_rejected(tasks_dir, start_watching):
+    write_task_file(tasks_dir, 'a', dependsOn=['b'])
+    write_task_file(tasks_dir, 'b')
+    tasks, watcher = start_watching(tasks_dir)
+    file_path = rewrite_task_file(tasks_dir, 'b', name='renamed')
+    assert watcher.poll() == (0, 0, 0)
+    assert {task.name for task in tasks} == {'a', 'b'}
+    assert file_path in watcher.rejected_files
+
+
+def test_rejected_file_is_retried_until_its_dependency_appears(tasks_dir, start_watching):
+    write_task_file(tasks_dir, 'a')
+    tasks, watcher = start_watching(tasks_dir)
+    write_task_file(tasks_dir, 'c', dependsOn=['b'])
+    assert watcher.poll() == (0, 0, 0)
+    assert len(tasks) == 1
+    write_task_file(tasks_dir, 'b')
+    assert watcher.poll() == (2, 0, 0)
+    assert {task.name for task in tasks} == {'a', 'b', 'c'}
+    assert not watcher.rejected_files
+
+
+def test_reload_keeps_parse_cache_up_to_date(tasks_dir, tmp_path, start_watching):
+    cache_file_path = str(tmp_path / 'tasks.cache')
+    write_task_file(tasks_dir, 'a')
+    removed_file_path = write_task_file(tasks_dir, 'b')
+    tasks, watcher = start_watching(tasks_dir, TaskParseCache.open(cache_file_path))
+    changed_file_path = rewrite_task_file(tasks_dir, 'a', command='echo changed')
+    os.remove(removed_file_path)
+    assert watcher.poll() == (0, 1, 1)
+
+    cache = TaskParseCache.open(cache_file_path)
+    assert cache.get(changed_file_path, os.stat(changed_file_path))['command'] == 'echo changed'
+    assert removed_file_path not in cache.entries